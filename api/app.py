@@ -2,15 +2,25 @@
 STRIX v2 API Server
 Flask + LangChain + Supabase
 """
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, g
 from flask_cors import CORS
+import gzip
 import json
 import os
 import sys
+import threading
+import time
 from datetime import datetime
 
-# Strix v1 경로 추가 (기존 모듈 재사용)
-sys.path.append(os.path.join(os.path.dirname(__file__), '../../strix/src'))
+# The rag package imports config relatively, so load both through the `api` package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.config import config
+from api.rag.registry import registry
+from api.rag.metrics import registry as metrics_registry, HTTP_REQUEST_SECONDS, PROMETHEUS_CONTENT_TYPE
+from api.rag.tracing import tracer, set_request_id, new_request_id, parse_traceparent, SPAN_KIND_SERVER
+from api.rag.tabular import wants_tsv, query_tsv, TSV_MEDIA_TYPE
+from api.rag.report import ReportBuilder, DEFAULT_SECTIONS, XLSX_MEDIA_TYPE, report_filename, iter_file
 
 # Mock 모드 설정 (Supabase 없이도 실행 가능)
 MOCK_MODE = os.getenv('MOCK_MODE', 'true').lower() == 'true'
@@ -18,6 +28,68 @@ MOCK_MODE = os.getenv('MOCK_MODE', 'true').lower() == 'true'
 app = Flask(__name__)
 CORS(app)
 
+# RAG 컴포넌트는 프로세스당 하나 (registry가 최초 사용 시 생성, 스레드 간 공유)
+if not MOCK_MODE and config.WARMUP_ON_STARTUP:
+    threading.Thread(target=registry.warmup, name="strix-warmup", daemon=True).start()
+
+@app.before_request
+def start_observation():
+    """Trace the request under a request ID and start its latency timer"""
+    g.started = time.perf_counter()
+    trace_id, parent_span_id = parse_traceparent(request.headers.get("traceparent"))
+    g.span_context = tracer.span(
+        f"{request.method} {request.path}",
+        kind=SPAN_KIND_SERVER,
+        trace_id=trace_id,
+        parent_span_id=parent_span_id,
+        **{"http.method": request.method, "http.target": request.path}
+    )
+    g.span = g.span_context.__enter__()
+    # A client's X-Request-ID is echoed as is; the trace ID goes in its own header
+    g.request_id = request.headers.get("x-request-id") or g.span.trace_id or new_request_id()
+    set_request_id(g.request_id)
+    g.span.set_attribute("request_id", g.request_id)
+
+@app.after_request
+def finish_observation(response):
+    """Record per-route latency and return the request ID"""
+    response.headers["X-Request-ID"] = g.request_id
+    if g.span.trace_id:
+        response.headers["X-Trace-ID"] = g.span.trace_id
+    g.span.set_attribute("http.status_code", response.status_code)
+    # Label by route template to keep cardinality bounded
+    path = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - g.started,
+        method=request.method,
+        path=path,
+        status=str(response.status_code)
+    )
+    return response
+
+@app.after_request
+def compress_response(response):
+    """gzip large responses for clients sending Accept-Encoding: gzip"""
+    if (config.GZIP_MIN_BYTES > 0
+            and not response.direct_passthrough
+            and "Content-Encoding" not in response.headers
+            and "gzip" in request.headers.get("Accept-Encoding", "")):
+        data = response.get_data()
+        if len(data) >= config.GZIP_MIN_BYTES:
+            response.set_data(gzip.compress(data, compresslevel=6))
+            response.headers["Content-Encoding"] = "gzip"
+            response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+@app.teardown_request
+def close_span(exc):
+    span_context = g.pop("span_context", None)
+    if span_context is not None:
+        if exc is None:
+            span_context.__exit__(None, None, None)
+        else:
+            span_context.__exit__(type(exc), exc, exc.__traceback__)
+
 # Mock 데이터
 MOCK_RESPONSES = {
     "default": {
@@ -62,11 +134,16 @@ def query():
         if not question:
             return jsonify({"error": "No question provided"}), 400
         
+        # format=tsv 또는 Accept: text/tab-separated-values → VBA용 TSV 표
+        tsv = wants_tsv(request.args.get('format'), request.headers.get('Accept'))
+        
         # Mock 모드
         if MOCK_MODE:
             response = MOCK_RESPONSES["default"].copy()
             response["question"] = question
             response["timestamp"] = datetime.now().isoformat()
+            if tsv:
+                return Response(query_tsv(response), content_type=TSV_MEDIA_TYPE)
             
             # UTF-8 응답
             return Response(
@@ -74,19 +151,27 @@ def query():
                 mimetype='application/json; charset=utf-8'
             )
         
-        # 실제 RAG 처리 (Supabase + LangChain)
-        from rag.strix_chain import STRIXChain
-        chain = STRIXChain()
-        result = chain.invoke({"question": question})
+        # 실제 RAG 처리 (main.py와 같은 공유 STRIXRAGChain, 캐시/메트릭 포함)
+        result = registry.rag_chain().invoke(
+            question=question,
+            doc_type=doc_type,
+            filter=data.get('filter'),
+            search_type=data.get('search_type'),
+            mmr_lambda=data.get('mmr_lambda'),
+            recency_weight=data.get('recency_weight')
+        )
         
         response = {
             "answer": result.get('answer', ''),
-            "confidence": 0.9,
-            "internal_docs": len(result.get('internal_docs', [])),
-            "external_docs": len(result.get('external_docs', [])),
-            "sources": [],
-            "timestamp": datetime.now().isoformat()
+            "confidence": result.get('confidence', 0.0),
+            "internal_docs": result.get('internal_docs', 0),
+            "external_docs": result.get('external_docs', 0),
+            "sources": result.get('sources', []),
+            "request_id": result.get('request_id'),
+            "timestamp": result.get('timestamp', datetime.now().isoformat())
         }
+        if tsv:
+            return Response(query_tsv(response, data.get('include_sources', True)), content_type=TSV_MEDIA_TYPE)
         
         return Response(
             json.dumps(response, ensure_ascii=False),
@@ -122,20 +207,36 @@ def collect():
 
 @app.route('/api/analyze', methods=['POST'])
 def analyze():
-    """AI 분석"""
+    """AI 분석 (필터로 고른 문서를 map-reduce로 요약해 인사이트 도출)"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         
         # Mock 분석 결과
-        result = {
-            "status": "success",
-            "insights": [
-                {"category": "전략", "insight": "SK온 합병으로 20조원 시너지", "confidence": 0.92},
-                {"category": "기술", "insight": "전고체 배터리 2027년 양산", "confidence": 0.88},
-                {"category": "리스크", "insight": "IRA 정책 변경 가능성 70%", "confidence": 0.85}
-            ],
-            "timestamp": datetime.now().isoformat()
-        }
+        if MOCK_MODE:
+            result = {
+                "status": "success",
+                "insights": [
+                    {"category": "전략", "insight": "SK온 합병으로 20조원 시너지", "confidence": 0.92},
+                    {"category": "기술", "insight": "전고체 배터리 2027년 양산", "confidence": 0.88},
+                    {"category": "리스크", "insight": "IRA 정책 변경 가능성 70%", "confidence": 0.85}
+                ],
+                "timestamp": datetime.now().isoformat()
+            }
+            
+            return Response(
+                json.dumps(result, ensure_ascii=False),
+                mimetype='application/json; charset=utf-8'
+            )
+        
+        filter = dict(data.get('filter') or {})
+        if data.get('doc_type') in ('internal', 'external'):
+            filter['doc_type'] = data['doc_type']
+        analysis = registry.insight_engine().analyze(
+            filter=filter or None,
+            focus=data.get('focus'),
+            max_documents=data.get('max_documents') or config.ANALYSIS_MAX_DOCUMENTS
+        )
+        result = {"status": "success", **analysis, "timestamp": datetime.now().isoformat()}
         
         return Response(
             json.dumps(result, ensure_ascii=False),
@@ -146,17 +247,23 @@ def analyze():
 
 @app.route('/api/feedback', methods=['POST'])
 def feedback():
-    """피드백 처리"""
+    """피드백 처리 (백그라운드 일괄 저장, 낮은 평점은 해당 질문의 답변 캐시 삭제)"""
     try:
         data = request.get_json()
         feedback_text = data.get('feedback', '')
         
-        # 피드백 저장 (실제로는 DB에 저장)
+        entry = registry.feedback_store().submit(
+            feedback=feedback_text,
+            question=data.get('question'),
+            answer=data.get('answer'),
+            rating=data.get('rating'),
+            request_id=data.get('request_id')
+        )
         result = {
             "status": "success",
             "message": "피드백이 저장되었습니다",
-            "feedback_id": f"FB_{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            "timestamp": datetime.now().isoformat()
+            "feedback_id": entry["feedback_id"],
+            "timestamp": entry["timestamp"]
         }
         
         return Response(
@@ -166,87 +273,173 @@ def feedback():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/feedback', methods=['GET'])
+def get_feedback():
+    """질문별 피드백 조회 (question 없으면 피드백이 많은 질문 목록)"""
+    try:
+        store = registry.feedback_store()
+        question = request.args.get('question')
+        limit = request.args.get('limit', 50, type=int)
+        if question:
+            result = {"question": question, "summary": store.summary(question), "entries": store.by_question(question, limit)}
+        else:
+            result = {"questions": store.questions(limit), "store": store.stats()}
+        
+        return Response(
+            json.dumps(result, ensure_ascii=False),
+            mimetype='application/json; charset=utf-8'
+        )
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/report', methods=['POST'])
 def generate_report():
-    """보고서 생성"""
+    """보고서 생성 (섹션별 RAG 답변을 동시에 생성해 XLSX로 다운로드)"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
+        title = data.get('title') or "월간 배터리 산업 동향 보고서"
+        sections = data.get('sections') or DEFAULT_SECTIONS
+        if not all(isinstance(section, dict) and section.get('title') and section.get('question')
+                   for section in sections):
+            return jsonify({"error": "Each section needs a title and a question"}), 400
         
         # Mock 보고서 생성
-        result = {
-            "status": "success",
-            "report": {
-                "title": "월간 배터리 산업 동향 보고서",
-                "date": datetime.now().strftime('%Y-%m-%d'),
-                "sections": [
-                    "Executive Summary",
-                    "시장 동향",
-                    "경쟁사 분석",
-                    "기술 개발 현황",
-                    "리스크 평가",
-                    "전략 제언"
-                ],
-                "pages": 25,
-                "charts": 12,
-                "tables": 8
-            },
-            "file_path": f"reports/STRIX_Report_{datetime.now().strftime('%Y%m%d')}.xlsx",
-            "timestamp": datetime.now().isoformat()
-        }
+        if MOCK_MODE:
+            result = {
+                "status": "success",
+                "report": {
+                    "title": title,
+                    "date": datetime.now().strftime('%Y-%m-%d'),
+                    "sections": [section["title"] for section in sections],
+                    "pages": 25,
+                    "charts": 12,
+                    "tables": 8
+                },
+                "file_path": f"reports/{report_filename()}",
+                "timestamp": datetime.now().isoformat()
+            }
+            
+            return Response(
+                json.dumps(result, ensure_ascii=False),
+                mimetype='application/json; charset=utf-8'
+            )
         
+        builder = ReportBuilder(
+            registry.rag_chain(),
+            registry.vector_store(),
+            max_workers=config.REPORT_MAX_WORKERS,
+            table_rows=config.REPORT_TABLE_ROWS
+        )
+        path = builder.build(
+            title,
+            sections,
+            doc_type=data.get('doc_type', 'both'),
+            filter=data.get('filter'),
+            directory=config.REPORT_DIR or None
+        )
+        # 파일을 청크 단위로 스트리밍하고 전송 후 삭제 (xlsx는 이미 압축되어 gzip 제외)
         return Response(
-            json.dumps(result, ensure_ascii=False),
-            mimetype='application/json; charset=utf-8'
+            iter_file(path),
+            content_type=XLSX_MEDIA_TYPE,
+            headers={
+                "Content-Disposition": f"attachment; filename={report_filename()}",
+                "Content-Length": str(os.path.getsize(path))
+            },
+            direct_passthrough=True
         )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/issues/predict', methods=['POST'])
 def predict_issues():
-    """이슈 예측"""
+    """이슈 예측 (날짜 구간별 용어/엔티티 빈도의 급증 탐지 + 상위 후보만 LLM 설명)"""
     try:
+        data = request.get_json(silent=True) or {}
+        
         # Mock 예측 결과
-        result = {
-            "status": "success",
-            "predictions": [
-                {
-                    "issue": "SK온 합병 지연 가능성",
-                    "probability": 0.15,
-                    "impact": "high",
-                    "recommendation": "대체 시나리오 준비"
-                },
-                {
-                    "issue": "원자재 가격 20% 상승",
-                    "probability": 0.65,
-                    "impact": "medium",
-                    "recommendation": "헤징 전략 수립"
-                }
-            ],
-            "timestamp": datetime.now().isoformat()
-        }
+        if MOCK_MODE:
+            result = {
+                "status": "success",
+                "predictions": [
+                    {
+                        "issue": "SK온 합병 지연 가능성",
+                        "probability": 0.15,
+                        "impact": "high",
+                        "recommendation": "대체 시나리오 준비"
+                    },
+                    {
+                        "issue": "원자재 가격 20% 상승",
+                        "probability": 0.65,
+                        "impact": "medium",
+                        "recommendation": "헤징 전략 수립"
+                    }
+                ],
+                "timestamp": datetime.now().isoformat()
+            }
+            
+            return Response(
+                json.dumps(result, ensure_ascii=False),
+                mimetype='application/json; charset=utf-8'
+            )
+        
+        prediction = registry.issue_predictor().predict(
+            as_of=data.get('as_of'),
+            top_k=int(data.get('top_k', 10)),
+            narrative=bool(data.get('narrative', True))
+        )
+        result = {"status": "success", **prediction, "timestamp": datetime.now().isoformat()}
         
         return Response(
             json.dumps(result, ensure_ascii=False),
             mimetype='application/json; charset=utf-8'
         )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/health', methods=['GET'])
 def health():
-    """서버 상태 확인"""
+    """서버 상태 확인 (liveness, 컴포넌트를 생성하지 않음)"""
+    status = registry.status()
     return jsonify({
         "status": "healthy",
         "mode": "mock" if MOCK_MODE else "production",
+        "components": {
+            name: "operational" if component["initialized"] else "not_initialized"
+            for name, component in status["components"].items()
+        },
+        "caches": registry.vector_store().cache_stats() if status["components"]["vector_store"]["initialized"] else None,
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 준비 완료 전 503 (mock 모드는 항상 준비됨)"""
+    status = registry.status()
+    is_ready = MOCK_MODE or status["ready"]
+    return jsonify({**status, "ready": is_ready}), 200 if is_ready else 503
+
+@app.route('/api/warmup', methods=['POST'])
+def warmup():
+    """RAG 컴포넌트 즉시 생성"""
+    status = registry.warmup()
+    if status["error"]:
+        return jsonify({"error": status["error"]}), 500
+    return jsonify(status)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus 메트릭"""
+    return Response(metrics_registry.render(), mimetype=PROMETHEUS_CONTENT_TYPE)
+
 if __name__ == '__main__':
     print(f"""
     ========================================
     STRIX v2 API Server
     Mode: {'Mock' if MOCK_MODE else 'Production'}
-    URL: http://localhost:5000
+    URL: http://localhost:{config.PORT}
     ========================================
     """)
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # threaded: 요청 스레드들이 하나의 RAG 체인 / 벡터 스토어 / HTTP 연결 풀을 공유
+    app.run(host=config.HOST, port=config.PORT, debug=config.DEBUG_MODE, threaded=True)
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+Cross-worker cache benchmark for STRIX v2
+
+Replays one Zipf-distributed stream of repeated queries, spread round-robin
+over several worker processes (like a load balancer in front of uvicorn
+workers), each with a per-worker LRU cache, with and without a shared tier.
+Reports the hit rate per layer and the lookup latency of each layer; with a
+shared tier the hit rate should not drop as workers are added.
+
+The redis backend runs against REDIS_URL / --redis-url, or against an
+in-process fakeredis TCP server when no URL is given.
+
+Usage (from the repository root):
+    python -m api.benchmarks.cache_bench --workers 1,2,4,8 --backends none,sqlite,redis
+"""
+from typing import List, Dict, Any, Optional
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from langchain_core.documents import Document
+from ..rag.retrieval_cache import RetrievalCache
+from ..rag.shared_cache import create_shared_cache
+from .common import latency_summary, write_results, compare_results, print_table
+
+BACKENDS = ("none", "sqlite", "redis")
+
+
+def query_stream(args: argparse.Namespace) -> np.ndarray:
+    """Query IDs of the whole request stream (Zipf popularity over --distinct queries)"""
+    rng = np.random.default_rng(args.seed)
+    return (rng.zipf(args.zipf, args.requests) - 1) % args.distinct
+
+
+def cached_value(query_id: int) -> tuple:
+    """A retrieval result of realistic size: 10 scored chunks"""
+    return tuple(
+        (Document(page_content=f"query {query_id} chunk {i} " + "배터리 " * 80,
+                  metadata={"source": f"doc-{query_id}-{i}.pdf", "doc_type": "internal"}), 0.9 - i * 0.01)
+        for i in range(10)
+    )
+
+
+def run_worker(args: argparse.Namespace) -> None:
+    """Worker process: serve every workers-th request of the stream through the cache"""
+    shared = create_shared_cache(args.backend, path=args.path, url=args.redis_url)
+    cache = RetrievalCache(args.l1_size, 0, "retrieval", shared, "corpus:bench")
+    requests = query_stream(args)[args.worker_index::args.workers]
+    latencies: Dict[str, List[float]] = {"l1": [], "l2": [], "miss": []}
+    # Start together so the workers' streams interleave
+    sys.stdin.readline()
+    for query_id in requests:
+        hits = cache.hits
+        started = time.perf_counter()
+        value, version = cache.get(("similarity_search", int(query_id)))
+        elapsed = time.perf_counter() - started
+        if value is None:
+            latencies["miss"].append(elapsed)
+            # The search a miss costs
+            time.sleep(args.miss_ms / 1000)
+            cache.put(("similarity_search", int(query_id)), cached_value(int(query_id)), version)
+        elif cache.hits > hits:
+            latencies["l1"].append(elapsed)
+        else:
+            latencies["l2"].append(elapsed)
+    print(json.dumps({
+        "l1_hits": cache.hits,
+        "l2_hits": cache.shared_hits,
+        "misses": cache.misses,
+        "latencies": {layer: values for layer, values in latencies.items()}
+    }), flush=True)
+
+
+def start_fake_redis() -> str:
+    """Serve a fakeredis stand-in on a free local port; returns its URL"""
+    from fakeredis import TcpFakeServer
+    server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return f"redis://{host}:{port}/0"
+
+
+def run_setting(args: argparse.Namespace, backend: str, workers: int, scratch: str) -> Dict[str, Any]:
+    # Fresh shared state per setting
+    path = os.path.join(scratch, f"cache-{backend}-{workers}.sqlite")
+    redis_url = args.redis_url
+    if backend == "redis":
+        import redis
+        redis.Redis.from_url(redis_url).flushdb()
+    command = [sys.executable, "-m", "api.benchmarks.cache_bench", "--worker", "--backend", backend,
+               "--path", path, "--redis-url", redis_url, "--workers", str(workers),
+               "--requests", str(args.requests), "--distinct", str(args.distinct), "--zipf", str(args.zipf),
+               "--l1-size", str(args.l1_size), "--miss-ms", str(args.miss_ms), "--seed", str(args.seed)]
+    processes = [
+        subprocess.Popen(command + ["--worker-index", str(i)], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for i in range(workers)
+    ]
+    # Let every worker finish importing before the stream starts
+    time.sleep(2.0)
+    for process in processes:
+        process.stdin.write("start\n")
+        process.stdin.flush()
+    reports = [json.loads(process.stdout.readline()) for process in processes]
+    for process in processes:
+        process.wait()
+
+    l1 = sum(r["l1_hits"] for r in reports)
+    l2 = sum(r["l2_hits"] for r in reports)
+    misses = sum(r["misses"] for r in reports)
+    total = l1 + l2 + misses
+    latencies = {layer: [v for r in reports for v in r["latencies"][layer]] for layer in ("l1", "l2", "miss")}
+    return {
+        "backend": backend,
+        "workers": workers,
+        "requests": total,
+        "hit_rate": round((l1 + l2) / total, 4),
+        "l1_hit_rate": round(l1 / total, 4),
+        "l2_hit_rate": round(l2 / total, 4),
+        "l1_p50_ms": latency_summary(latencies["l1"])["p50_ms"],
+        "l2_p50_ms": latency_summary(latencies["l2"])["p50_ms"],
+        "miss_lookup_p50_ms": latency_summary(latencies["miss"])["p50_ms"]
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="STRIX v2 cross-worker cache benchmark")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated: " + ",".join(BACKENDS))
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--distinct", type=int, default=5000, help="Distinct queries in the stream")
+    parser.add_argument("--zipf", type=float, default=1.2, help="Zipf exponent of query popularity")
+    parser.add_argument("--l1-size", type=int, default=256, help="Per-worker LRU entries")
+    parser.add_argument("--miss-ms", type=float, default=0.0, help="Simulated search time per miss")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", ""),
+                        help="Redis-compatible server (default: in-process fakeredis)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", help="Name for the result file (defaults to the git revision)")
+    parser.add_argument("--output-dir", help="Result directory (default: bench_results/)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-index", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--backend", default="none", help=argparse.SUPPRESS)
+    parser.add_argument("--path", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.worker:
+        args.workers = int(args.workers)
+        return args
+    args.workers = [int(w) for w in args.workers.split(",") if w.strip()]
+    args.backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    unknown = set(args.backends) - set(BACKENDS)
+    if unknown:
+        parser.error(f"Unknown backends: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.worker:
+        run_worker(args)
+        return
+
+    if "redis" in args.backends and not args.redis_url:
+        args.redis_url = start_fake_redis()
+        print(f"Using fakeredis stand-in at {args.redis_url}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="strix-cache-") as scratch:
+        for backend in args.backends:
+            for workers in args.workers:
+                row = run_setting(args, backend, workers, scratch)
+                results.append(row)
+                print(f"{backend:6} workers={workers} hit_rate={row['hit_rate']} "
+                      f"(l1={row['l1_hit_rate']}, l2={row['l2_hit_rate']})")
+
+    print()
+    print_table(results, ["backend", "workers", "requests", "hit_rate", "l1_hit_rate", "l2_hit_rate",
+                          "l1_p50_ms", "l2_p50_ms", "miss_lookup_p50_ms"])
+    parameters = {key: value for key, value in vars(args).items()
+                  if key not in ("compare", "output_dir", "worker", "worker_index", "backend", "path")}
+    path = write_results("cache", results, parameters, args.output_dir, args.label)
+    print(f"\nResults written to {path}")
+
+    if args.compare:
+        print("\n".join(compare_results(args.compare, results, ["backend", "workers"])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Shared helpers for STRIX v2 benchmarks
+Latency statistics, process memory and machine-readable result files
+"""
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+import platform
+import subprocess
+import numpy as np
+
+API_DIR = Path(__file__).resolve().parent.parent
+REPO_DIR = API_DIR.parent
+DEFAULT_RESULTS_DIR = REPO_DIR / "bench_results"
+
+
+def latency_summary(latencies_s: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean/max in milliseconds"""
+    if not latencies_s:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0, "max_ms": 0.0}
+    values = np.asarray(latencies_s) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(values.mean()), 3),
+        "max_ms": round(float(values.max()), 3)
+    }
+
+
+def rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Resident memory of a process and its children in MB (Linux /proc)"""
+    pid = pid or os.getpid()
+    pids = [pid]
+    children_file = Path(f"/proc/{pid}/task/{pid}/children")
+    if children_file.exists():
+        pids += [int(child) for child in children_file.read_text().split()]
+
+    total_kb = 0
+    for p in pids:
+        try:
+            for line in Path(f"/proc/{p}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total_kb += int(line.split()[1])
+                    break
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return round(total_kb / 1024, 1) if total_kb else None
+
+
+def pss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Proportional set size in MB: shared pages (e.g. mmap page cache) split across processes"""
+    try:
+        for line in Path(f"/proc/{pid or os.getpid()}/smaps_rollup").read_text().splitlines():
+            if line.startswith("Pss:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        pass
+    return None
+
+
+def git_revision() -> str:
+    """Current commit hash (or 'unknown' outside a git checkout)"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR,
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(
+    benchmark: str,
+    results: List[Dict[str, Any]],
+    parameters: Dict[str, Any],
+    output_dir: Optional[str] = None,
+    label: Optional[str] = None
+) -> Path:
+    """
+    Write a result file bench_results/<benchmark>-<label|revision>-<timestamp>.json
+
+    Returns:
+        Path of the written file
+    """
+    directory = Path(output_dir) if output_dir else DEFAULT_RESULTS_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    revision = git_revision()
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = directory / f"{benchmark}-{label or revision}-{timestamp}.json"
+
+    payload = {
+        "benchmark": benchmark,
+        "label": label,
+        "git_revision": revision,
+        "timestamp": datetime.now().isoformat(),
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "parameters": parameters,
+        "results": results
+    }
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def compare_results(baseline_path: str, results: List[Dict[str, Any]], keys: List[str]) -> List[str]:
+    """
+    Compare results against a previous result file
+
+    Args:
+        baseline_path: Earlier result JSON
+        results: Current results
+        keys: Fields identifying a result row (e.g. scenario, concurrency)
+
+    Returns:
+        Report lines with relative change per metric
+    """
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    previous = {tuple(row.get(key) for key in keys): row for row in baseline["results"]}
+
+    lines = [f"Compared with {baseline_path} ({baseline.get('git_revision')})"]
+    for row in results:
+        ident = tuple(row.get(key) for key in keys)
+        old = previous.get(ident)
+        if old is None:
+            continue
+        changes = []
+        for metric, value in row.items():
+            if metric in keys or not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            old_value = old.get(metric)
+            if isinstance(old_value, (int, float)) and old_value:
+                changes.append(f"{metric} {(value - old_value) / old_value:+.1%}")
+        lines.append(f"  {ident}: " + ", ".join(changes))
+    return lines
+
+
+def print_table(rows: List[Dict[str, Any]], columns: List[str]) -> None:
+    """Print rows as an aligned text table"""
+    widths = {
+        column: max(len(column), *(len(str(row.get(column, ""))) for row in rows))
+        for column in columns
+    }
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row.get(column, "")).ljust(widths[column]) for column in columns))
@@ -0,0 +1,281 @@
+"""
+Synthetic Korean battery-industry corpus for STRIX v2 benchmarks
+
+Generates chunks shaped like our data (internal reports, external news and
+Excel tables with doc_type / organization / date metadata) plus labeled
+queries. Every chunk carries one "fact" (company x technology x theme x
+region); queries ask about a fact and its relevant chunks are known exactly.
+
+Usage (from the repository root):
+    python -m api.benchmarks.corpus --chunks 100000 --queries 500 --output bench_data/corpus_100k
+"""
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from itertools import accumulate
+from pathlib import Path
+import argparse
+import json
+import random
+
+COMPANIES = ["SK온", "LG에너지솔루션", "삼성SDI", "CATL", "BYD", "파나소닉", "테슬라", "에코프로비엠",
+             "포스코퓨처엠", "엘앤에프", "고려아연", "노스볼트", "CALB", "궈쉬안", "현대자동차", "GM"]
+TECHNOLOGIES = ["전고체 배터리", "LFP 배터리", "NCM 배터리", "나트륨이온 배터리", "4680 원통형 셀", "하이니켈 양극재",
+                "실리콘 음극재", "리튬메탈 배터리", "46시리즈 셀", "셀투팩 기술", "건식 전극 공정", "배터리 재활용"]
+THEMES = ["양산 계획", "수주 계약", "공장 증설", "원가 절감", "가격 인상", "정책 대응", "특허 분쟁", "리콜 이슈",
+          "합작법인 설립", "기술 제휴", "수율 개선", "공급망 다변화"]
+REGIONS = ["북미", "유럽", "중국", "헝가리", "인도네시아", "한국", "일본", "멕시코"]
+
+INTERNAL_ORGANIZATIONS = ["전략기획팀", "R&D센터", "기술전략팀", "재무팀", "생산기술팀", "구매팀", "품질경영팀"]
+EXTERNAL_SOURCES = ["Bloomberg", "Reuters", "전자신문", "한국경제", "SNE리서치", "BNEF", "매일경제", "조선비즈"]
+INTERNAL_CATEGORIES = ["report", "analysis", "memo", "presentation"]
+EXTERNAL_CATEGORIES = ["news", "research", "competitor", "policy"]
+
+FACT_SENTENCES = [
+    "{company}의 {region} {tech} {theme}이 {year}년 {quarter}분기 기준 {value}% 진척된 것으로 파악된다.",
+    "{region} 시장에서 {company}는 {tech} {theme}을 통해 {value}억 달러 규모를 확보했다.",
+    "{company} {tech} 관련 {theme} 발표에 따르면 {region} 거점의 목표는 {year}년이다.",
+    "{tech} 부문에서 {company}의 {region} {theme} 일정이 {value}개월 앞당겨졌다.",
+]
+FILLER_SENTENCES = [
+    "배터리 업계 전반의 수요 둔화 우려가 이어지고 있다.",
+    "원자재 가격 변동성이 확대되면서 수익성 관리가 중요해졌다.",
+    "완성차 업체들의 전동화 전략 수정이 잇따르고 있다.",
+    "각국 정부의 보조금 정책 변화가 주요 변수로 꼽힌다.",
+    "차세대 기술 확보를 위한 연구개발 투자가 확대되는 추세다.",
+    "공급망 안정화를 위한 현지화 전략이 가속화되고 있다.",
+    "업계는 하반기 시장 회복 여부에 주목하고 있다.",
+    "에너지저장장치 시장이 새로운 성장 동력으로 부상했다.",
+]
+# Matches the loader's defaults (CHUNK_SIZE 1000 - CHUNK_OVERLAP 200)
+CHUNK_STRIDE = 800
+
+QUERY_TEMPLATES = [
+    "{company} {tech} {theme} {region}",
+    "{company}의 {region} {tech} {theme} 현황은?",
+    "{region}에서 {company}가 추진하는 {tech} {theme} 알려줘",
+    "{tech} {theme} 관련 {company} {region} 동향",
+]
+
+
+@dataclass(frozen=True)
+class Fact:
+    """One labeled piece of information"""
+    company: str
+    tech: str
+    theme: str
+    region: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.company}|{self.tech}|{self.theme}|{self.region}"
+
+
+@dataclass
+class CorpusChunk:
+    """One chunk with metadata and the fact it carries"""
+    id: str
+    text: str
+    metadata: Dict[str, Any]
+    fact: str
+
+
+@dataclass
+class LabeledQuery:
+    """A query and the IDs of the chunks relevant to it"""
+    id: str
+    text: str
+    fact: str
+    relevant_ids: List[str] = field(default_factory=list)
+    filter: Optional[Dict[str, Any]] = None
+
+
+class SyntheticCorpus:
+    """
+    Deterministic corpus generator
+
+    Args:
+        num_chunks: Number of chunks to generate
+        num_facts: Distinct facts (default: about one per 3 chunks)
+        seed: Random seed
+        end_date: Latest document date (dates spread over the previous 3 years)
+    """
+
+    def __init__(
+        self,
+        num_chunks: int,
+        num_facts: Optional[int] = None,
+        seed: int = 42,
+        end_date: Optional[date] = None
+    ):
+        self.num_chunks = num_chunks
+        self.seed = seed
+        self.end_date = end_date or date(2025, 8, 31)
+        rng = random.Random(seed)
+        num_facts = num_facts or max(1, num_chunks // 3)
+        self.facts = self._sample_facts(rng, num_facts)
+        self._chunk_facts: Dict[str, List[str]] = {}
+
+    @staticmethod
+    def _sample_facts(rng: random.Random, count: int) -> List[Fact]:
+        space = len(COMPANIES) * len(TECHNOLOGIES) * len(THEMES) * len(REGIONS)
+        facts = []
+        for index in rng.sample(range(space), min(count, space)):
+            index, company = divmod(index, len(COMPANIES))
+            index, tech = divmod(index, len(TECHNOLOGIES))
+            region, theme = divmod(index, len(THEMES))
+            facts.append(Fact(COMPANIES[company], TECHNOLOGIES[tech], THEMES[theme], REGIONS[region]))
+        return facts
+
+    def _metadata(self, rng: random.Random, doc_number: int, fact: Fact) -> Tuple[Dict[str, Any], str]:
+        """Document-level metadata; returns (metadata, kind)"""
+        kind = rng.choices(["report", "news", "excel"], weights=[0.4, 0.45, 0.15])[0]
+        doc_date = self.end_date - timedelta(days=int(rng.expovariate(1 / 240)) % 1095)
+
+        if kind == "news":
+            source = rng.choice(EXTERNAL_SOURCES)
+            metadata = {
+                "doc_type": "external",
+                "category": rng.choice(EXTERNAL_CATEGORIES),
+                "organization": source,
+                "source": f"https://news.example.com/{source}/{doc_number}",
+                "title": f"[{source}] {fact.company} {fact.tech} {fact.theme}",
+                "file_type": "html"
+            }
+        else:
+            organization = rng.choice(INTERNAL_ORGANIZATIONS)
+            file_type = "xlsx" if kind == "excel" else rng.choice(["pdf", "docx", "pptx"])
+            metadata = {
+                "doc_type": "internal",
+                "category": "analysis" if kind == "excel" else rng.choice(INTERNAL_CATEGORIES),
+                "organization": organization,
+                "source": f"/shared/{organization}/{doc_date.year}/doc_{doc_number}.{file_type}",
+                "title": f"{fact.tech} {fact.theme} {'데이터' if kind == 'excel' else '보고서'} ({organization})",
+                "file_type": file_type
+            }
+        metadata["date"] = doc_date.isoformat()
+        return metadata, kind
+
+    @staticmethod
+    def _fact_sentence(rng: random.Random, fact: Fact) -> str:
+        return rng.choice(FACT_SENTENCES).format(
+            company=fact.company, tech=fact.tech, theme=fact.theme, region=fact.region,
+            year=rng.randint(2025, 2030), quarter=rng.randint(1, 4), value=rng.randint(5, 95)
+        )
+
+    def _text(self, rng: random.Random, kind: str, fact: Fact, metadata: Dict[str, Any]) -> str:
+        if kind == "excel":
+            rows = [f"Sheet: {fact.tech} {fact.theme}", "구분\t지역\t업체\t수치\t비고"]
+            rows.append(f"1\t{fact.region}\t{fact.company}\t{rng.randint(10, 999)}\t{fact.theme}")
+            for i in range(2, rng.randint(5, 12)):
+                rows.append(
+                    f"{i}\t{rng.choice(REGIONS)}\t{rng.choice(COMPANIES)}\t{rng.randint(10, 999)}\t{rng.choice(THEMES)}"
+                )
+            return "\n".join(rows)
+
+        sentences = [self._fact_sentence(rng, fact)]
+        sentences += rng.sample(FILLER_SENTENCES, rng.randint(2, 5))
+        # Mention unrelated entities so lexical overlap alone is not enough
+        distractor = rng.choice(self.facts)
+        sentences.append(f"한편 {distractor.company}는 {rng.choice(TECHNOLOGIES)} 분야를 검토 중이다.")
+        rng.shuffle(sentences)
+        prefix = f"{metadata['title']}\n" if metadata["start_index"] == 0 else ""
+        return prefix + " ".join(sentences)
+
+    def chunks(self) -> Iterator[CorpusChunk]:
+        """
+        Generate all chunks (deterministic for a given seed)
+
+        Chunks are grouped into source documents of 1-6 consecutive chunks
+        sharing metadata, with `start_index` advancing like the loader's splitter.
+        """
+        rng = random.Random(self.seed + 1)
+        # Zipf-like fact popularity: some topics are covered by many documents
+        cum_weights = list(accumulate(1 / (rank + 1) ** 0.5 for rank in range(len(self.facts))))
+        self._chunk_facts = {}
+        index = 0
+        doc_number = 0
+        while index < self.num_chunks:
+            # Every fact appears at least once, then popularity-weighted
+            if doc_number < len(self.facts):
+                primary = self.facts[doc_number]
+            else:
+                primary = rng.choices(self.facts, cum_weights=cum_weights)[0]
+            doc_metadata, kind = self._metadata(rng, doc_number, primary)
+            doc_chunks = min(rng.randint(1, 6), self.num_chunks - index)
+
+            for position in range(doc_chunks):
+                # Later chunks of a document drift to related facts
+                fact = primary if position == 0 or rng.random() < 0.5 else rng.choices(self.facts, cum_weights=cum_weights)[0]
+                metadata = dict(doc_metadata, start_index=position * CHUNK_STRIDE)
+                chunk_id = f"chunk_{index:08d}"
+                self._chunk_facts.setdefault(fact.key, []).append(chunk_id)
+                yield CorpusChunk(chunk_id, self._text(rng, kind, fact, metadata), metadata, fact.key)
+                index += 1
+            doc_number += 1
+
+    def queries(self, count: int, with_filters: bool = True) -> List[LabeledQuery]:
+        """
+        Labeled queries over facts present in the corpus (call after chunks())
+
+        With `with_filters`, a third of the queries carry a doc_type filter;
+        their relevant IDs are restricted accordingly by the caller.
+        """
+        if not self._chunk_facts:
+            for _ in self.chunks():
+                pass
+        rng = random.Random(self.seed + 2)
+        facts = {fact.key: fact for fact in self.facts}
+        keys = sorted(self._chunk_facts)
+        queries = []
+        for i in range(count):
+            fact = facts[rng.choice(keys)]
+            text = rng.choice(QUERY_TEMPLATES).format(
+                company=fact.company, tech=fact.tech, theme=fact.theme, region=fact.region
+            )
+            query_filter = None
+            if with_filters and i % 3 == 2:
+                query_filter = {"doc_type": rng.choice(["internal", "external"])}
+            queries.append(LabeledQuery(
+                id=f"q_{i:05d}",
+                text=text,
+                fact=fact.key,
+                relevant_ids=list(self._chunk_facts[fact.key]),
+                filter=query_filter
+            ))
+        return queries
+
+
+def write_corpus(corpus: SyntheticCorpus, num_queries: int, output: str) -> None:
+    """Write chunks.jsonl and queries.jsonl"""
+    directory = Path(output)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / "chunks.jsonl", "w", encoding="utf-8") as f:
+        for chunk in corpus.chunks():
+            f.write(json.dumps({
+                "id": chunk.id, "text": chunk.text, "metadata": chunk.metadata, "fact": chunk.fact
+            }, ensure_ascii=False) + "\n")
+    with open(directory / "queries.jsonl", "w", encoding="utf-8") as f:
+        for query in corpus.queries(num_queries):
+            f.write(json.dumps({
+                "id": query.id, "text": query.text, "fact": query.fact,
+                "relevant_ids": query.relevant_ids, "filter": query.filter
+            }, ensure_ascii=False) + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic STRIX corpus")
+    parser.add_argument("--chunks", type=int, default=10000)
+    parser.add_argument("--facts", type=int, help="Distinct facts (default: chunks / 3)")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", required=True, help="Output directory")
+    args = parser.parse_args(argv)
+
+    corpus = SyntheticCorpus(args.chunks, args.facts, args.seed)
+    write_corpus(corpus, args.queries, args.output)
+    print(f"Wrote {args.chunks} chunks and {args.queries} queries to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
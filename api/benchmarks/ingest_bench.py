@@ -0,0 +1,125 @@
+"""
+Bulk ingestion throughput benchmark for STRIX v2
+
+Embeds and stores a synthetic corpus through fake embeddings with a
+realistic latency model (fixed cost per request plus cost per 1k tokens)
+and an optional tokens-per-minute limit, comparing:
+
+- serial: fixed batches of --serial-batch texts embedded one request at a
+  time, then stored (what add_documents did before the ingest pipeline)
+- pipelined: IngestPipeline (token-sized adaptive batches, concurrent
+  requests, writes overlapped with embedding)
+
+Usage (from the repository root):
+    python -m api.benchmarks.ingest_bench --chunks 20000 --concurrency 1,4,8
+    python -m api.benchmarks.ingest_bench --chunks 5000 --tokens-per-minute 1000000
+"""
+from typing import List, Dict, Any, Optional
+import argparse
+import time
+import numpy as np
+from langchain_core.documents import Document
+from ..rag.fakes import FakeEmbeddings
+from ..rag.ingest import IngestPipeline, AdaptiveBatchSizer, estimate_tokens
+from ..rag.local_store import LocalVectorStore
+from .corpus import SyntheticCorpus
+from .common import write_results, compare_results, print_table
+
+
+def make_embeddings(args: argparse.Namespace) -> FakeEmbeddings:
+    return FakeEmbeddings(
+        dimensions=args.dimensions,
+        latency_ms=args.latency_ms,
+        seed=args.seed,
+        ms_per_1k_tokens=args.ms_per_1k_tokens,
+        tokens_per_minute=args.tokens_per_minute
+    )
+
+
+def run_serial(args: argparse.Namespace, documents: List[Document]) -> Dict[str, Any]:
+    embeddings = make_embeddings(args)
+    store = LocalVectorStore(embeddings, initial_capacity=len(documents))
+    started = time.perf_counter()
+    vectors: List[List[float]] = []
+    for offset in range(0, len(documents), args.serial_batch):
+        batch = documents[offset:offset + args.serial_batch]
+        vectors.extend(embeddings.embed_documents([doc.page_content for doc in batch]))
+    store.add_vectors(np.asarray(vectors, dtype=np.float32), documents)
+    return {"mode": "serial", "concurrency": 1, "seconds": time.perf_counter() - started, "stored": len(store)}
+
+
+def run_pipelined(args: argparse.Namespace, documents: List[Document], concurrency: int) -> Dict[str, Any]:
+    embeddings = make_embeddings(args)
+    store = LocalVectorStore(embeddings, initial_capacity=len(documents))
+    sizer = AdaptiveBatchSizer(
+        batch_tokens=args.batch_tokens,
+        max_concurrency=concurrency,
+        target_seconds=args.target_seconds
+    )
+    pipeline = IngestPipeline(embeddings, store.add_vectors, sizer, backoff_seconds=0.5)
+    started = time.perf_counter()
+    pipeline.run(documents)
+    return {
+        "mode": "pipelined",
+        "concurrency": concurrency,
+        "seconds": time.perf_counter() - started,
+        "stored": len(store),
+        **{f"final_{key}": value for key, value in sizer.stats().items()}
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="STRIX v2 bulk ingestion benchmark")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--concurrency", default="1,4,8", help="Comma-separated pipeline concurrency limits")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Fake latency per embedding request")
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=10.0, help="Fake latency per 1k input tokens")
+    parser.add_argument("--tokens-per-minute", type=int, default=0, help="Fake rate limit (0 = none)")
+    parser.add_argument("--serial-batch", type=int, default=1000, help="Texts per request in serial mode")
+    parser.add_argument("--batch-tokens", type=int, default=8000, help="Initial pipeline batch size")
+    parser.add_argument("--target-seconds", type=float, default=2.0)
+    parser.add_argument("--skip-serial", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", help="Name for the result file (defaults to the git revision)")
+    parser.add_argument("--output-dir", help="Result directory (default: bench_results/)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args(argv)
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    documents = [
+        Document(page_content=chunk.text, metadata=chunk.metadata)
+        for chunk in SyntheticCorpus(args.chunks, seed=args.seed).chunks()
+    ]
+    tokens = sum(estimate_tokens(doc.page_content) for doc in documents)
+    print(f"{len(documents)} chunks, {tokens} estimated tokens")
+
+    runs = [] if args.skip_serial else [lambda: run_serial(args, documents)]
+    runs += [lambda c=c: run_pipelined(args, documents, c) for c in args.concurrency]
+    results = []
+    for run in runs:
+        row = run()
+        row["seconds"] = round(row["seconds"], 2)
+        row["chunks_per_second"] = round(len(documents) / row["seconds"], 1)
+        row["tokens_per_second"] = round(tokens / row["seconds"], 1)
+        results.append(row)
+        print(f"{row['mode']:9} concurrency={row['concurrency']} {row['seconds']}s "
+              f"{row['chunks_per_second']} chunks/s")
+
+    print()
+    print_table(results, ["mode", "concurrency", "seconds", "chunks_per_second", "tokens_per_second",
+                          "final_batch_tokens", "final_concurrency", "final_rate_limits"])
+    parameters = {key: value for key, value in vars(args).items() if key not in ("compare", "output_dir")}
+    path = write_results("ingest", results, parameters, args.output_dir, args.label)
+    print(f"\nResults written to {path}")
+
+    if args.compare:
+        print("\n".join(compare_results(args.compare, results, ["mode", "concurrency"])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+End-to-end load test for the STRIX v2 FastAPI server
+
+Starts api/main.py under uvicorn with fake providers and the local vector
+backend, seeds it with documents, then drives each endpoint at the requested
+concurrency levels and reports throughput, latency percentiles and memory.
+
+Usage (from the repository root):
+    python -m api.benchmarks.load_test --concurrency 1,8,32 --requests 200
+    python -m api.benchmarks.load_test --compare bench_results/load_test-abc123-....json
+"""
+from typing import List, Dict, Any, Optional
+import argparse
+import asyncio
+import io
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import httpx
+from .common import API_DIR, latency_summary, rss_mb, write_results, compare_results, print_table
+
+SCENARIOS = ("query", "search", "upload", "batch")
+
+QUESTIONS = [
+    "SK온 합병 계획은?",
+    "전고체 배터리 양산 일정은?",
+    "BYD 급속충전 기술 동향",
+    "IRA 정책 변경이 배터리 산업에 미치는 영향",
+    "LFP 배터리 원가 경쟁력 분석",
+    "리튬 가격 전망과 원자재 리스크",
+    "북미 배터리 공장 투자 현황",
+    "나트륨이온 배터리 상용화 가능성"
+]
+
+TOPICS = ["전고체 배터리", "LFP 배터리", "리튬 가격", "SK온 합병", "BYD 급속충전", "IRA 정책", "북미 공장", "나트륨이온"]
+PHRASES = [
+    "{topic} 관련 시장 동향을 분석한 결과 {n}% 성장이 예상된다.",
+    "{topic}에 대한 경쟁사 대응 전략이 {n}건 보고되었다.",
+    "{topic} 기술 개발은 {year}년 양산을 목표로 진행 중이다.",
+    "전략기획팀은 {topic}의 리스크를 {n}개 항목으로 정리했다.",
+    "{topic} 분야 투자 규모는 {n}조원 수준으로 추산된다."
+]
+
+
+def seed_document(rng: random.Random, sentences: int = 40) -> str:
+    """Synthetic Korean battery-industry text"""
+    return "\n".join(
+        rng.choice(PHRASES).format(
+            topic=rng.choice(TOPICS),
+            n=rng.randint(1, 99),
+            year=rng.randint(2025, 2030)
+        )
+        for _ in range(sentences)
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_environment(args: argparse.Namespace) -> Dict[str, str]:
+    """Environment for the server under test"""
+    env = dict(os.environ)
+    env.update({
+        "MOCK_MODE": "false",
+        "LLM_PROVIDER": "fake",
+        "EMBEDDING_PROVIDER": "fake",
+        "VECTOR_BACKEND": "local",
+        "DEBUG_MODE": "false",
+        "MIN_RELEVANCE_SCORE": str(args.min_relevance),
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "FAKE_LLM_TOKENS_PER_SECOND": str(args.llm_tokens_per_second),
+        "FAKE_EMBEDDING_LATENCY_MS": str(args.embedding_latency_ms),
+        "FAKE_ERROR_RATE": str(args.error_rate),
+        "USER_AGENT": "strix-load-test"
+    })
+    return env
+
+
+def start_server(args: argparse.Namespace, port: int) -> subprocess.Popen:
+    """Start uvicorn serving api/main.py"""
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--app-dir", str(API_DIR),
+        "--host", "127.0.0.1",
+        "--port", str(port),
+        "--workers", str(args.workers),
+        "--log-level", "warning"
+    ]
+    return subprocess.Popen(command, cwd=str(API_DIR), env=server_environment(args))
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get("/api/health")
+            if response.status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become ready")
+
+
+async def seed(client: httpx.AsyncClient, documents: int, seed_value: int) -> None:
+    """Upload seed documents and wait until they are searchable"""
+    rng = random.Random(seed_value)
+    for start in range(0, documents, 20):
+        files = [
+            ("files", (f"seed_{i}.txt", seed_document(rng).encode("utf-8"), "text/plain"))
+            for i in range(start, min(start + 20, documents))
+        ]
+        doc_type = "internal" if (start // 20) % 2 == 0 else "external"
+        response = await client.post("/api/documents/batch", params={"doc_type": doc_type}, files=files)
+        response.raise_for_status()
+
+    # Uploads are indexed in background tasks
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        response = await client.get("/api/documents/search", params={"query": TOPICS[0], "limit": 1})
+        if response.json().get("document_count"):
+            return
+        await asyncio.sleep(0.5)
+
+
+def build_request(scenario: str, rng: random.Random) -> Dict[str, Any]:
+    """httpx request arguments for one scenario call"""
+    if scenario == "query":
+        return {
+            "method": "POST",
+            "url": "/api/query",
+            "json": {"question": rng.choice(QUESTIONS), "doc_type": rng.choice(["both", "internal", "external"])}
+        }
+    if scenario == "search":
+        return {
+            "method": "GET",
+            "url": "/api/documents/search",
+            "params": {"query": rng.choice(QUESTIONS), "limit": 10}
+        }
+    if scenario == "upload":
+        return {
+            "method": "POST",
+            "url": "/api/documents/upload",
+            "params": {"doc_type": "internal", "organization": "전략기획팀"},
+            "files": {"file": ("upload.txt", io.BytesIO(seed_document(rng).encode("utf-8")), "text/plain")}
+        }
+    if scenario == "batch":
+        return {
+            "method": "POST",
+            "url": "/api/documents/batch",
+            "params": {"doc_type": "external"},
+            "files": [
+                ("files", (f"batch_{i}.txt", seed_document(rng).encode("utf-8"), "text/plain"))
+                for i in range(5)
+            ]
+        }
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: str,
+    concurrency: int,
+    total_requests: int,
+    server_pid: Optional[int],
+    seed_value: int
+) -> Dict[str, Any]:
+    """Drive one scenario with a fixed number of concurrent workers"""
+    latencies: List[float] = []
+    errors = 0
+    issued = 0
+    peak_rss = rss_mb(server_pid) if server_pid else None
+    rss_before = peak_rss
+
+    async def worker(worker_id: int):
+        nonlocal errors, issued
+        rng = random.Random(seed_value * 1000 + worker_id)
+        while issued < total_requests:
+            issued += 1
+            request = build_request(scenario, rng)
+            start = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    async def sample_memory():
+        nonlocal peak_rss
+        while True:
+            await asyncio.sleep(0.25)
+            current = rss_mb(server_pid)
+            if current and (peak_rss is None or current > peak_rss):
+                peak_rss = current
+
+    sampler = asyncio.create_task(sample_memory()) if server_pid else None
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    if sampler:
+        sampler.cancel()
+
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        **latency_summary(latencies),
+        "server_rss_before_mb": rss_before,
+        "server_rss_peak_mb": peak_rss
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    process = None
+    base_url = args.url
+    if not base_url:
+        port = free_port()
+        process = start_server(args, port)
+        base_url = f"http://127.0.0.1:{port}"
+
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 10)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+            await wait_ready(client)
+            if args.seed_documents:
+                await seed(client, args.seed_documents, args.seed)
+
+            results = []
+            for scenario in args.scenarios:
+                for concurrency in args.concurrency:
+                    result = await run_scenario(
+                        client,
+                        scenario,
+                        concurrency,
+                        args.requests,
+                        process.pid if process else None,
+                        args.seed
+                    )
+                    results.append(result)
+                    print(f"{scenario:8} c={concurrency:<4} {result['throughput_rps']:>8} rps  "
+                          f"p50={result['p50_ms']}ms p99={result['p99_ms']}ms errors={result['errors']}")
+            return results
+    finally:
+        if process:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="STRIX v2 API load test")
+    parser.add_argument("--url", help="Target an already running server instead of starting one")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated: " + ",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--seed-documents", type=int, default=200, help="Documents uploaded before measuring")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--min-relevance", type=float, default=0.1,
+                        help="MIN_RELEVANCE_SCORE for the server (hash embeddings score lower than real ones)")
+    parser.add_argument("--label", help="Name for the result file (defaults to the git revision)")
+    parser.add_argument("--output-dir", help="Result directory (default: bench_results/)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+
+    print()
+    print_table(results, ["scenario", "concurrency", "requests", "errors", "throughput_rps",
+                          "p50_ms", "p95_ms", "p99_ms", "server_rss_peak_mb"])
+    parameters = {key: value for key, value in vars(args).items() if key not in ("compare", "output_dir")}
+    path = write_results("load_test", results, parameters, args.output_dir, args.label)
+    print(f"\nResults written to {path}")
+
+    if args.compare:
+        print("\n".join(compare_results(args.compare, results, ["scenario", "concurrency"])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Retrieval quality / latency benchmark for STRIX v2
+
+Builds local indexes over a synthetic corpus at several sizes and measures
+recall@k against the labels, recall@k against the exact float32 top k
+(what the index loses by approximating), MRR and per-query search latency
+for each index setting. Query embeddings are computed up front, so
+latencies are index time only.
+
+Usage (from the repository root):
+    python -m api.benchmarks.retrieval_bench --sizes 10000,100000 --queries 300
+    python -m api.benchmarks.retrieval_bench --sizes 1000000 --dimensions 256 --settings flat
+    python -m api.benchmarks.retrieval_bench --sizes 100000 --settings flat,int8,pq4,pq8   # recall vs. memory
+    python -m api.benchmarks.retrieval_bench --sizes 100000 --settings flat,pca256,pca256-norescore,trunc256
+    python -m api.benchmarks.retrieval_bench --sizes 100000,400000 --dimensions 256 --settings flat,shard4
+"""
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from dataclasses import dataclass
+import argparse
+import time
+import numpy as np
+from langchain_core.documents import Document
+from ..rag.fakes import FakeEmbeddings
+from ..rag.local_store import LocalVectorStore
+from ..rag.sharded_store import ShardedVectorStore
+from ..rag.metadata_index import matches_filter
+from ..rag.mmr import mmr_select
+from .corpus import SyntheticCorpus, LabeledQuery
+from .common import latency_summary, rss_mb, write_results, compare_results, print_table
+
+
+@dataclass
+class IndexSetting:
+    """
+    A retrieval mode / index configuration under test
+
+    build(vectors, documents, ids, embeddings) -> index
+    search(index, query_vector, k, filter) -> ranked chunk IDs
+    """
+    name: str
+    build: Callable[..., Any]
+    search: Callable[..., List[str]]
+
+
+def _build_flat(vectors: np.ndarray, documents: List[Document], ids: List[str], embeddings: FakeEmbeddings) -> LocalVectorStore:
+    store = LocalVectorStore(embeddings, initial_capacity=len(ids))
+    store.add_vectors(vectors, documents, ids)
+    return store
+
+
+def _builder(**options) -> Callable[..., LocalVectorStore]:
+    """Build a local store with non-default storage options"""
+    def build(vectors: np.ndarray, documents: List[Document], ids: List[str], embeddings: FakeEmbeddings) -> LocalVectorStore:
+        store = LocalVectorStore(embeddings, initial_capacity=len(ids), **options)
+        store.add_vectors(vectors, documents, ids)
+        return store
+    return build
+
+
+def _sharded_builder(shards: int, shard_key: str = "hash") -> Callable[..., ShardedVectorStore]:
+    """Build a sharded store (worker processes are started per build and closed after the run)"""
+    def build(vectors: np.ndarray, documents: List[Document], ids: List[str], embeddings: FakeEmbeddings) -> ShardedVectorStore:
+        store = ShardedVectorStore(embeddings, shards, shard_key, initial_capacity=len(ids) // shards + 1)
+        store.add_vectors(vectors, documents, ids)
+        return store
+    return build
+
+
+def _search_flat(index: LocalVectorStore, query_vector: np.ndarray, k: int, filter: Optional[Dict[str, Any]]) -> List[str]:
+    return [doc.id for doc, _ in index.similarity_search_by_vector_with_score(query_vector, k=k, filter=filter)]
+
+
+def _search_mmr(index: LocalVectorStore, query_vector: np.ndarray, k: int, filter: Optional[Dict[str, Any]],
+                fetch_multiplier: int = 6, lambda_mult: float = 0.5) -> List[str]:
+    candidates = index.similarity_search_by_vector_returning_embeddings(query_vector, k=k * fetch_multiplier, filter=filter)
+    if not candidates:
+        return []
+    order = mmr_select(query_vector, np.stack([vector for _, _, vector in candidates]), k, lambda_mult)
+    return [candidates[i][0].id for i in order]
+
+
+# Registry of settings; extended as new retrieval modes / index types are added
+INDEX_SETTINGS: Dict[str, IndexSetting] = {
+    "flat": IndexSetting("flat", _build_flat, _search_flat),
+    "mmr": IndexSetting("mmr", _build_flat, _search_mmr),
+    "int8": IndexSetting("int8", _builder(vector_storage="int8"), _search_flat),
+    "pq4": IndexSetting("pq4", _builder(vector_storage="pq", pq_subvector_dimensions=4), _search_flat),
+    "pq8": IndexSetting("pq8", _builder(vector_storage="pq", pq_subvector_dimensions=8), _search_flat),
+    "pq8-rescore16": IndexSetting(
+        "pq8-rescore16", _builder(vector_storage="pq", pq_subvector_dimensions=8, rescore_multiplier=16), _search_flat
+    ),
+    "shard4": IndexSetting("shard4", _sharded_builder(4), _search_flat),
+    "shard4-doctype": IndexSetting("shard4-doctype", _sharded_builder(4, "doc_type"), _search_flat),
+    "trunc256": IndexSetting("trunc256", _builder(projection="truncate", projection_dimensions=256), _search_flat),
+    "pca256": IndexSetting("pca256", _builder(projection="pca", projection_dimensions=256), _search_flat),
+    "pca256-norescore": IndexSetting(
+        "pca256-norescore", _builder(projection="pca", projection_dimensions=256, projection_rescore=False), _search_flat
+    ),
+    "pca256-int8": IndexSetting(
+        "pca256-int8", _builder(projection="pca", projection_dimensions=256, vector_storage="int8"), _search_flat
+    ),
+}
+
+
+def evaluate(ranked: List[str], relevant: set, k: int) -> Tuple[float, float]:
+    """recall@k (against min(k, |relevant|)) and reciprocal rank"""
+    if not relevant:
+        return 1.0, 1.0
+    hits = sum(1 for chunk_id in ranked[:k] if chunk_id in relevant)
+    recall = hits / min(k, len(relevant))
+    reciprocal_rank = 0.0
+    for rank, chunk_id in enumerate(ranked[:k], start=1):
+        if chunk_id in relevant:
+            reciprocal_rank = 1.0 / rank
+            break
+    return recall, reciprocal_rank
+
+
+def exact_recall(ranked: List[str], exact: List[str], k: int) -> float:
+    """Share of the exact (float32 flat) top k found in the top k"""
+    if not exact:
+        return 1.0
+    return len(set(ranked[:k]) & set(exact[:k])) / min(k, len(exact))
+
+
+def run_size(args: argparse.Namespace, size: int, settings: List[IndexSetting]) -> List[Dict[str, Any]]:
+    """Generate, embed and benchmark one corpus size"""
+    embeddings = FakeEmbeddings(dimensions=args.dimensions, seed=args.seed)
+    corpus = SyntheticCorpus(size, seed=args.seed)
+
+    started = time.perf_counter()
+    ids, documents, texts = [], [], []
+    for chunk in corpus.chunks():
+        ids.append(chunk.id)
+        texts.append(chunk.text)
+        documents.append(Document(page_content=chunk.text, metadata=chunk.metadata))
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    del texts
+    embed_seconds = time.perf_counter() - started
+    print(f"[{size}] corpus generated and embedded in {embed_seconds:.1f}s")
+
+    queries: List[LabeledQuery] = corpus.queries(args.queries)
+    metadata_by_id = {chunk_id: doc.metadata for chunk_id, doc in zip(ids, documents)}
+    query_vectors = np.asarray(embeddings.embed_documents([q.text for q in queries]), dtype=np.float32)
+    relevant_sets = [
+        {chunk_id for chunk_id in q.relevant_ids if matches_filter(metadata_by_id[chunk_id], q.filter)}
+        for q in queries
+    ]
+
+    # Ground truth for the approximation: exact float32 scan, full dimensions
+    exact_index = _builder(vector_storage="float32", projection="none")(vectors, documents, ids, embeddings)
+    exact_sets = [
+        _search_flat(exact_index, vector, args.k, q.filter) for q, vector in zip(queries, query_vectors)
+    ]
+    del exact_index
+
+    results = []
+    for setting in settings:
+        rss_before = rss_mb()
+        started = time.perf_counter()
+        index = setting.build(vectors, documents, ids, embeddings)
+        build_seconds = time.perf_counter() - started
+
+        # Warm up
+        for q, vector in zip(queries[:5], query_vectors[:5]):
+            setting.search(index, vector, args.k, q.filter)
+
+        latencies, recalls, exact_recalls, reciprocal_ranks, distinct_sources = [], [], [], [], []
+        for q, vector, relevant, exact in zip(queries, query_vectors, relevant_sets, exact_sets):
+            started = time.perf_counter()
+            ranked = setting.search(index, vector, args.k, q.filter)
+            latencies.append(time.perf_counter() - started)
+            recall, rr = evaluate(ranked, relevant, args.k)
+            recalls.append(recall)
+            exact_recalls.append(exact_recall(ranked, exact, args.k))
+            reciprocal_ranks.append(rr)
+            # Diversity: distinct source documents among the top k chunks
+            distinct_sources.append(len({metadata_by_id[chunk_id].get("source") for chunk_id in ranked[:args.k]}))
+
+        memory = getattr(index, "memory_bytes", None)
+        disk = getattr(index, "disk_bytes", None)
+        row = {
+            "setting": setting.name,
+            "chunks": size,
+            "dimensions": args.dimensions,
+            "k": args.k,
+            f"recall@{args.k}": round(float(np.mean(recalls)), 4),
+            f"exact_recall@{args.k}": round(float(np.mean(exact_recalls)), 4),
+            "mrr": round(float(np.mean(reciprocal_ranks)), 4),
+            "distinct_sources": round(float(np.mean(distinct_sources)), 2),
+            **latency_summary(latencies),
+            "qps": round(len(latencies) / sum(latencies), 1) if latencies else 0.0,
+            "build_s": round(build_seconds, 3),
+            "index_mb": round(memory() / 2**20, 1) if callable(memory) else None,
+            "disk_mb": round(disk() / 2**20, 1) if callable(disk) else None,
+            "rss_delta_mb": round((rss_mb() or 0) - (rss_before or 0), 1)
+        }
+        results.append(row)
+        if hasattr(index, "close"):
+            index.close()
+        print(f"[{size}] {setting.name:12} recall@{args.k}={row[f'recall@{args.k}']} "
+              f"exact_recall@{args.k}={row[f'exact_recall@{args.k}']} mrr={row['mrr']} "
+              f"p50={row['p50_ms']}ms p99={row['p99_ms']}ms")
+        del index
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="STRIX v2 retrieval quality / latency benchmark")
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated corpus sizes (chunks)")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dimensions", type=int, default=1536, help="Fake embedding dimensions")
+    parser.add_argument("--settings", default=",".join(INDEX_SETTINGS),
+                        help="Comma-separated index settings: " + ",".join(INDEX_SETTINGS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", help="Name for the result file (defaults to the git revision)")
+    parser.add_argument("--output-dir", help="Result directory (default: bench_results/)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args(argv)
+    args.sizes = [int(size) for size in args.sizes.split(",")]
+    args.settings = [name.strip() for name in args.settings.split(",") if name.strip()]
+    unknown = set(args.settings) - set(INDEX_SETTINGS)
+    if unknown:
+        parser.error(f"Unknown settings: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    settings = [INDEX_SETTINGS[name] for name in args.settings]
+
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(args, size, settings))
+
+    print()
+    print_table(results, ["setting", "chunks", f"recall@{args.k}", f"exact_recall@{args.k}", "mrr", "distinct_sources",
+                          "p50_ms", "p95_ms", "p99_ms", "qps", "build_s", "index_mb", "disk_mb"])
+    parameters = {key: value for key, value in vars(args).items() if key not in ("compare", "output_dir")}
+    path = write_results("retrieval", results, parameters, args.output_dir, args.label)
+    print(f"\nResults written to {path}")
+
+    if args.compare:
+        print("\n".join(compare_results(args.compare, results, ["setting", "chunks"])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Cold start / per-worker memory benchmark for STRIX v2 local index snapshots
+
+Writes a snapshot of a synthetic corpus, then starts several worker processes
+that each open the index and run queries, either memory-mapping the snapshot
+("mmap", pages shared through the OS page cache) or loading a private copy
+("copy", the cost of rebuilding the index in every worker).
+
+Usage (from the repository root):
+    python -m api.benchmarks.snapshot_bench --chunks 200000 --workers 4
+"""
+from typing import List, Dict, Any, Optional
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from langchain_core.documents import Document
+from ..rag.fakes import FakeEmbeddings
+from ..rag.local_store import LocalVectorStore
+from ..rag.snapshot import Snapshot, current_snapshot
+from .corpus import SyntheticCorpus
+from .common import latency_summary, rss_mb, pss_mb, write_results, compare_results, print_table
+
+MODES = ("mmap", "copy")
+
+
+def build_snapshot(args: argparse.Namespace, directory: str) -> float:
+    """Embed the corpus and write it as a snapshot; returns seconds taken"""
+    started = time.perf_counter()
+    embeddings = FakeEmbeddings(dimensions=args.dimensions, seed=args.seed)
+    store = LocalVectorStore(embeddings, initial_capacity=args.chunks)
+    batch: List[Any] = []
+    for chunk in SyntheticCorpus(args.chunks, seed=args.seed).chunks():
+        batch.append(chunk)
+        if len(batch) == 5000:
+            _add_batch(store, embeddings, batch)
+            batch = []
+    _add_batch(store, embeddings, batch)
+    store.save(directory)
+    return time.perf_counter() - started
+
+
+def _add_batch(store: LocalVectorStore, embeddings: FakeEmbeddings, chunks: List[Any]) -> None:
+    if chunks:
+        vectors = np.asarray(embeddings.embed_documents([c.text for c in chunks]), dtype=np.float32)
+        documents = [Document(page_content=c.text, metadata=c.metadata) for c in chunks]
+        store.add_vectors(vectors, documents, [c.id for c in chunks])
+
+
+def run_worker(args: argparse.Namespace) -> None:
+    """Worker process: open, query, report, then wait so siblings are measured concurrently"""
+    embeddings = FakeEmbeddings(dimensions=args.dimensions, seed=args.seed)
+    started = time.perf_counter()
+    if args.mode == "mmap":
+        store = LocalVectorStore.open(args.worker, embeddings)
+    else:
+        # Baseline: every worker holds a private copy of the whole index
+        snapshot = Snapshot(current_snapshot(args.worker))
+        store = LocalVectorStore(embeddings, initial_capacity=len(snapshot))
+        store.add_vectors(np.array(snapshot.vectors), list(snapshot.documents), list(snapshot.ids))
+        del snapshot
+    open_seconds = time.perf_counter() - started
+
+    queries = SyntheticCorpus(1, seed=args.seed).queries(args.queries, with_filters=False)
+    vectors = embeddings.embed_documents([q.text for q in queries])
+    latencies = []
+    for vector in vectors:
+        started = time.perf_counter()
+        store.similarity_search_by_vector_with_score(vector, k=10)
+        latencies.append(time.perf_counter() - started)
+
+    print(json.dumps({"open_ms": round(open_seconds * 1000, 2), "first_query_ms": round(latencies[0] * 1000, 2),
+                      **latency_summary(latencies[1:])}), flush=True)
+    sys.stdin.readline()
+    print(json.dumps({"rss_mb": rss_mb(), "pss_mb": pss_mb()}), flush=True)
+
+
+def run_mode(args: argparse.Namespace, directory: str, mode: str) -> Dict[str, Any]:
+    command = [sys.executable, "-m", "api.benchmarks.snapshot_bench", "--worker", directory, "--mode", mode,
+               "--dimensions", str(args.dimensions), "--queries", str(args.queries), "--seed", str(args.seed)]
+    workers = [
+        subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(args.workers)
+    ]
+    timings = [json.loads(worker.stdout.readline()) for worker in workers]
+    for worker in workers:
+        worker.stdin.write("report\n")
+        worker.stdin.flush()
+    memory = [json.loads(worker.stdout.readline()) for worker in workers]
+    for worker in workers:
+        worker.wait()
+
+    return {
+        "mode": mode,
+        "chunks": args.chunks,
+        "workers": args.workers,
+        "open_ms": round(float(np.mean([t["open_ms"] for t in timings])), 2),
+        "first_query_ms": round(float(np.mean([t["first_query_ms"] for t in timings])), 2),
+        "p50_ms": round(float(np.mean([t["p50_ms"] for t in timings])), 3),
+        "rss_mb_per_worker": round(float(np.mean([m["rss_mb"] or 0 for m in memory])), 1),
+        "pss_mb_per_worker": round(float(np.mean([m["pss_mb"] or 0 for m in memory])), 1),
+        "pss_mb_total": round(float(sum(m["pss_mb"] or 0 for m in memory)), 1)
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="STRIX v2 snapshot cold start / memory benchmark")
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated: " + ",".join(MODES))
+    parser.add_argument("--directory", help="Snapshot directory (default: a temporary directory)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", help="Name for the result file (defaults to the git revision)")
+    parser.add_argument("--output-dir", help="Result directory (default: bench_results/)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default="mmap", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    args.modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"Unknown modes: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.worker:
+        run_worker(args)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="strix-snapshot-") as scratch:
+        directory = args.directory or scratch
+        build_seconds = build_snapshot(args, directory)
+        print(f"Snapshot of {args.chunks} chunks written in {build_seconds:.1f}s")
+        results = []
+        for mode in args.modes:
+            row = run_mode(args, directory, mode)
+            results.append(row)
+            print(f"{mode:5} open={row['open_ms']}ms first_query={row['first_query_ms']}ms "
+                  f"pss/worker={row['pss_mb_per_worker']}MB")
+
+    print()
+    print_table(results, ["mode", "chunks", "workers", "open_ms", "first_query_ms", "p50_ms",
+                          "rss_mb_per_worker", "pss_mb_per_worker", "pss_mb_total"])
+    parameters = {key: value for key, value in vars(args).items()
+                  if key not in ("compare", "output_dir", "worker", "mode")}
+    path = write_results("snapshot", results, parameters, args.output_dir, args.label)
+    print(f"\nResults written to {path}")
+
+    if args.compare:
+        print("\n".join(compare_results(args.compare, results, ["mode", "workers"])))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ Configuration module for STRIX v2 RAG system
 """
 import os
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Optional, List
 
 # Load environment variables
 load_dotenv()
@@ -14,7 +14,8 @@ class Config:
     # LLM Settings
     OPENAI_API_KEY: str = os.getenv('OPENAI_API_KEY', '')
     GOOGLE_API_KEY: str = os.getenv('GOOGLE_API_KEY', '')
-    LLM_PROVIDER: str = os.getenv('LLM_PROVIDER', 'openai')  # 'openai' or 'google'
+    LLM_PROVIDER: str = os.getenv('LLM_PROVIDER', 'openai')  # 'openai', 'google' or 'fake'
+    EMBEDDING_PROVIDER: str = os.getenv('EMBEDDING_PROVIDER', 'openai')  # 'openai' or 'fake'
     
     # Supabase Settings
     SUPABASE_URL: str = os.getenv('SUPABASE_URL', '')
@@ -22,23 +23,146 @@ class Config:
     SUPABASE_SERVICE_KEY: str = os.getenv('SUPABASE_SERVICE_KEY', '')
     
     # Vector Store Settings
+    VECTOR_BACKEND: str = os.getenv('VECTOR_BACKEND', 'supabase')  # 'supabase' or 'local'
+    # Local index vector storage: 'float32' (in memory), 'int8' or 'pq' (codes in memory,
+    # full-precision vectors memory-mapped from LOCAL_INDEX_DIR for re-scoring)
+    VECTOR_STORAGE: str = os.getenv('VECTOR_STORAGE', 'float32')
+    PQ_SUBVECTOR_DIMENSIONS: int = int(os.getenv('PQ_SUBVECTOR_DIMENSIONS', '4'))  # 1 byte per 4 floats = 16x
+    RESCORE_MULTIPLIER: int = int(os.getenv('RESCORE_MULTIPLIER', '4'))  # top k * multiplier re-scored exactly
+    LOCAL_INDEX_DIR: str = os.getenv('LOCAL_INDEX_DIR', 'index_data')
+    # Local index dimensionality reduction: 'none', 'truncate' (Matryoshka prefix of
+    # text-embedding-3-* vectors) or 'pca' (fitted on the corpus); applied before VECTOR_STORAGE
+    VECTOR_PROJECTION: str = os.getenv('VECTOR_PROJECTION', 'none')
+    PROJECTION_DIMENSIONS: int = int(os.getenv('PROJECTION_DIMENSIONS', '256'))
+    PROJECTION_RESCORE: bool = os.getenv('PROJECTION_RESCORE', 'true').lower() == 'true'  # full-dimension re-score
+    # Persist the local index as mmap snapshots + write-ahead log under LOCAL_INDEX_DIR/<collection>
+    LOCAL_INDEX_PERSIST: bool = os.getenv('LOCAL_INDEX_PERSIST', 'false').lower() == 'true'
+    WAL_CHECKPOINT_BYTES: int = int(os.getenv('WAL_CHECKPOINT_BYTES', str(64 * 1024 * 1024)))
+    # Split the local index across worker processes (1 = single in-process index)
+    LOCAL_INDEX_SHARDS: int = int(os.getenv('LOCAL_INDEX_SHARDS', '1'))
+    SHARD_KEY: str = os.getenv('SHARD_KEY', 'hash')  # 'hash' (by ID), 'doc_type' or 'organization'
     VECTOR_COLLECTION_NAME: str = os.getenv('VECTOR_COLLECTION_NAME', 'strix_documents')
     EMBEDDING_MODEL: str = os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small')
+    EMBEDDING_DIMENSIONS: int = int(os.getenv('EMBEDDING_DIMENSIONS', '0'))  # 0 = model default
     CHUNK_SIZE: int = int(os.getenv('CHUNK_SIZE', '1000'))
     CHUNK_OVERLAP: int = int(os.getenv('CHUNK_OVERLAP', '200'))
+    CONTEXT_EXPANSION: str = os.getenv('CONTEXT_EXPANSION', 'neighbors')  # 'neighbors', 'parent' or 'none'
+    CONTEXT_WINDOW_CHUNKS: int = int(os.getenv('CONTEXT_WINDOW_CHUNKS', '1'))  # neighbours per side
+    CONTEXT_MAX_CHARS: int = int(os.getenv('CONTEXT_MAX_CHARS', '3000'))  # expanded text per retrieved chunk
+    
+    # Metadata pre-filter index (local vector backend)
+    METADATA_INDEX_FIELDS: List[str] = os.getenv(
+        'METADATA_INDEX_FIELDS', 'doc_type,organization,category,file_type,source'
+    ).split(',')
+    METADATA_DATE_FIELDS: List[str] = os.getenv('METADATA_DATE_FIELDS', 'date,loaded_at').split(',')
     
     # Application Settings
     MOCK_MODE: bool = os.getenv('MOCK_MODE', 'false').lower() == 'true'
     DEBUG_MODE: bool = os.getenv('DEBUG_MODE', 'true').lower() == 'true'
     PORT: int = int(os.getenv('PORT', '5000'))
     HOST: str = os.getenv('HOST', '0.0.0.0')
+    # Build RAG components in the background at startup (else on first request or POST /api/warmup)
+    WARMUP_ON_STARTUP: bool = os.getenv('WARMUP_ON_STARTUP', 'true').lower() == 'true'
+    HTTP_POOL_SIZE: int = int(os.getenv('HTTP_POOL_SIZE', '20'))  # keep-alive connections to the OpenAI API
+    GZIP_MIN_BYTES: int = int(os.getenv('GZIP_MIN_BYTES', '1024'))  # gzip larger responses, 0 disables
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv('HTTP_TIMEOUT_SECONDS', '60'))
     
     # RAG Settings
     MAX_SEARCH_RESULTS: int = int(os.getenv('MAX_SEARCH_RESULTS', '10'))
     MIN_RELEVANCE_SCORE: float = float(os.getenv('MIN_RELEVANCE_SCORE', '0.7'))
+    SEARCH_TYPE: str = os.getenv('SEARCH_TYPE', 'similarity')  # 'similarity' or 'mmr'
+    MMR_FETCH_MULTIPLIER: int = int(os.getenv('MMR_FETCH_MULTIPLIER', '6'))  # candidate pool = k * multiplier
+    MMR_LAMBDA: float = float(os.getenv('MMR_LAMBDA', '0.5'))  # 1.0 = relevance only, 0.0 = diversity only
+    SEARCH_MAX_PAGE_SIZE: int = int(os.getenv('SEARCH_MAX_PAGE_SIZE', '1000'))  # JSON/TSV page limit (larger: cursor or ndjson)
+    SEARCH_STREAM_BATCH_SIZE: int = int(os.getenv('SEARCH_STREAM_BATCH_SIZE', '500'))  # documents per NDJSON write
+    SEARCH_STREAM_MAX_RESULTS: int = int(os.getenv('SEARCH_STREAM_MAX_RESULTS', '100000'))
+    RETRIEVAL_CACHE_SIZE: int = int(os.getenv('RETRIEVAL_CACHE_SIZE', '1024'))  # 0 disables
+    RETRIEVAL_CACHE_TTL_SECONDS: float = float(os.getenv('RETRIEVAL_CACHE_TTL_SECONDS', '300'))  # 0 = no expiry
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv('EMBEDDING_CACHE_SIZE', '4096'))  # query embeddings, 0 disables
+    EMBEDDING_CACHE_TTL_SECONDS: float = float(os.getenv('EMBEDDING_CACHE_TTL_SECONDS', '86400'))
+    ANSWER_CACHE_SIZE: int = int(os.getenv('ANSWER_CACHE_SIZE', '256'))  # generated answers, 0 disables
+    ANSWER_CACHE_TTL_SECONDS: float = float(os.getenv('ANSWER_CACHE_TTL_SECONDS', '3600'))
+    # Cross-worker tier under the caches above: 'none', 'sqlite' (one host; SHARED_CACHE_PATH,
+    # e.g. on /dev/shm) or 'redis' (any Redis-compatible server at REDIS_URL)
+    SHARED_CACHE_BACKEND: str = os.getenv('SHARED_CACHE_BACKEND', 'none')
+    SHARED_CACHE_PATH: str = os.getenv('SHARED_CACHE_PATH', 'cache/strix_cache.sqlite')
+    SHARED_CACHE_MAX_ENTRIES: int = int(os.getenv('SHARED_CACHE_MAX_ENTRIES', '100000'))  # sqlite only
+    REDIS_URL: str = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    SHARED_CACHE_VERSION_POLL_SECONDS: float = float(os.getenv('SHARED_CACHE_VERSION_POLL_SECONDS', '1'))  # staleness bound after other workers' writes
+    # Recency-aware ranking: score = (1 - weight) * similarity + weight * 0.5 ** (age / half-life)
+    RECENCY_WEIGHT: float = float(os.getenv('RECENCY_WEIGHT', '0'))  # 0 = similarity only
+    RECENCY_HALF_LIFE_DAYS: float = float(os.getenv('RECENCY_HALF_LIFE_DAYS', '30'))
+    RECENCY_FIELDS: List[str] = os.getenv('RECENCY_FIELDS', 'date,loaded_at').split(',')  # first present wins
+    RECENCY_MAX_AGE_DAYS: int = int(os.getenv('RECENCY_MAX_AGE_DAYS', '0'))  # exclude older documents, 0 = no limit
+    RECENCY_FETCH_MULTIPLIER: int = int(os.getenv('RECENCY_FETCH_MULTIPLIER', '4'))  # Supabase candidate over-fetch
+    # Feedback store: buffered in memory, written in batches by a background thread
+    FEEDBACK_BACKEND: str = os.getenv('FEEDBACK_BACKEND', 'sqlite')  # 'sqlite' or 'log' (append-only JSON lines)
+    FEEDBACK_PATH: str = os.getenv('FEEDBACK_PATH', '')  # '' = feedback/strix_feedback.sqlite / .jsonl
+    FEEDBACK_BATCH_SIZE: int = int(os.getenv('FEEDBACK_BATCH_SIZE', '100'))
+    FEEDBACK_FLUSH_SECONDS: float = float(os.getenv('FEEDBACK_FLUSH_SECONDS', '1'))
+    FEEDBACK_NEGATIVE_RATING: int = int(os.getenv('FEEDBACK_NEGATIVE_RATING', '2'))  # ratings <= this drop cached answers
+    FAQ_PREWARM_COUNT: int = int(os.getenv('FAQ_PREWARM_COUNT', '20'))  # frequent questions answered at warmup, 0 disables
+    FAQ_PREWARM_LOCK_PATH: str = os.getenv('FAQ_PREWARM_LOCK_PATH', 'feedback/strix_prewarm.lock')  # one pre-warming worker per host
+    FAQ_MIN_COUNT: int = int(os.getenv('FAQ_MIN_COUNT', '2'))  # feedback entries for a question to count as frequent
+    # Bulk ingestion (add_documents): token-sized embedding batches, concurrent requests, overlapped writes
+    INGEST_BATCH_TOKENS: int = int(os.getenv('INGEST_BATCH_TOKENS', '8000'))  # initial estimated tokens per embedding request
+    INGEST_MIN_BATCH_TOKENS: int = int(os.getenv('INGEST_MIN_BATCH_TOKENS', '500'))
+    INGEST_MAX_BATCH_TOKENS: int = int(os.getenv('INGEST_MAX_BATCH_TOKENS', '100000'))
+    INGEST_MAX_CONCURRENCY: int = int(os.getenv('INGEST_MAX_CONCURRENCY', '4'))  # embedding requests in flight
+    INGEST_TARGET_SECONDS: float = float(os.getenv('INGEST_TARGET_SECONDS', '2'))  # batch size adapts toward this request latency
+    INGEST_MAX_RETRIES: int = int(os.getenv('INGEST_MAX_RETRIES', '5'))  # per batch, non-rate-limit errors
+
+    # Folder watcher (python -m api.watch, or WATCH_ON_STARTUP in the API)
+    WATCH_DIRS: str = os.getenv('WATCH_DIRS', '')  # comma-separated 'path[=doc_type]'
+    WATCH_DOC_TYPE: str = os.getenv('WATCH_DOC_TYPE', 'internal')  # doc_type of folders without one
+    WATCH_DEBOUNCE_SECONDS: float = float(os.getenv('WATCH_DEBOUNCE_SECONDS', '2'))  # quiet time before a file is indexed
+    WATCH_MAX_DELAY_SECONDS: float = float(os.getenv('WATCH_MAX_DELAY_SECONDS', '30'))  # upper bound under constant writes
+    WATCH_STATE_PATH: str = os.getenv('WATCH_STATE_PATH', '')  # '' = watch/strix_watch.json
+    WATCH_ON_STARTUP: bool = os.getenv('WATCH_ON_STARTUP', 'false').lower() == 'true'
+    # Map-reduce analysis (/api/analyze): summaries are cached by content hash
+    ANALYSIS_MAX_CONCURRENCY: int = int(os.getenv('ANALYSIS_MAX_CONCURRENCY', '8'))  # parallel LLM summary calls
+    ANALYSIS_REDUCE_FANOUT: int = int(os.getenv('ANALYSIS_REDUCE_FANOUT', '8'))  # summaries merged per reduce call
+    ANALYSIS_MAX_DOCUMENTS: int = int(os.getenv('ANALYSIS_MAX_DOCUMENTS', '500'))  # most recent documents analyzed
+    SUMMARY_CACHE_SIZE: int = int(os.getenv('SUMMARY_CACHE_SIZE', '10000'))  # per-document summaries, 0 disables
+    SUMMARY_CACHE_TTL_SECONDS: float = float(os.getenv('SUMMARY_CACHE_TTL_SECONDS', '0'))  # 0 = no expiry
+    # Emerging-issue detection (/api/issues/predict): term/entity counts per date bucket
+    TREND_INDEX_ENABLED: bool = os.getenv('TREND_INDEX_ENABLED', 'true').lower() == 'true'
+    TREND_BUCKET_DAYS: int = int(os.getenv('TREND_BUCKET_DAYS', '7'))
+    TREND_RECENT_BUCKETS: int = int(os.getenv('TREND_RECENT_BUCKETS', '2'))  # window tested for growth
+    TREND_BASELINE_BUCKETS: int = int(os.getenv('TREND_BASELINE_BUCKETS', '12'))  # preceding window it is compared with
+    TREND_MIN_COUNT: int = int(os.getenv('TREND_MIN_COUNT', '3'))  # minimum recent mentions of a candidate
+    TREND_Z_THRESHOLD: float = float(os.getenv('TREND_Z_THRESHOLD', '2.0'))
+    TREND_MAX_TERMS: int = int(os.getenv('TREND_MAX_TERMS', '100000'))  # rare terms are evicted when full
+    TREND_NARRATIVE_CANDIDATES: int = int(os.getenv('TREND_NARRATIVE_CANDIDATES', '5'))  # top candidates described by the LLM
+    SUPABASE_TREND_TABLE: str = os.getenv('SUPABASE_TREND_TABLE', '')  # Supabase: table persisting trend counts ('' = rebuilt or empty)
+    # Supabase: page through the whole table at startup to build the trend / chunk position indexes
+    SUPABASE_PREBUILD_INDEXES: bool = os.getenv('SUPABASE_PREBUILD_INDEXES', 'false').lower() == 'true'
+    # Report generation (/api/report): sections run concurrently, workbook streamed to disk
+    REPORT_MAX_WORKERS: int = int(os.getenv('REPORT_MAX_WORKERS', '6'))
+    REPORT_TABLE_ROWS: int = int(os.getenv('REPORT_TABLE_ROWS', '200'))  # supporting documents per section
+    REPORT_DIR: str = os.getenv('REPORT_DIR', '')  # working directory for report files ('' = system temp)
     TEMPERATURE: float = float(os.getenv('TEMPERATURE', '0.7'))
     MAX_TOKENS: int = int(os.getenv('MAX_TOKENS', '2000'))
     
+    # Fake Provider Settings (LLM_PROVIDER / EMBEDDING_PROVIDER = 'fake')
+    FAKE_LLM_LATENCY_MS: float = float(os.getenv('FAKE_LLM_LATENCY_MS', '300'))
+    FAKE_LLM_TOKENS_PER_SECOND: float = float(os.getenv('FAKE_LLM_TOKENS_PER_SECOND', '50'))
+    FAKE_LLM_RESPONSE_TOKENS: int = int(os.getenv('FAKE_LLM_RESPONSE_TOKENS', '200'))
+    FAKE_EMBEDDING_LATENCY_MS: float = float(os.getenv('FAKE_EMBEDDING_LATENCY_MS', '50'))
+    FAKE_EMBEDDING_MS_PER_1K_TOKENS: float = float(os.getenv('FAKE_EMBEDDING_MS_PER_1K_TOKENS', '0'))
+    FAKE_EMBEDDING_TOKENS_PER_MINUTE: int = int(os.getenv('FAKE_EMBEDDING_TOKENS_PER_MINUTE', '0'))  # 0 = no rate limit
+    FAKE_EMBEDDING_DIMENSIONS: int = int(os.getenv('FAKE_EMBEDDING_DIMENSIONS', '1536'))
+    FAKE_ERROR_RATE: float = float(os.getenv('FAKE_ERROR_RATE', '0.0'))
+    FAKE_SEED: int = int(os.getenv('FAKE_SEED', '42'))
+    
+    # Tracing Settings
+    TRACING_ENABLED: bool = os.getenv('TRACING_ENABLED', 'false').lower() == 'true'
+    TRACE_EXPORTER: str = os.getenv('TRACE_EXPORTER', 'jsonl')  # 'jsonl' or 'otlp'
+    TRACE_FILE: str = os.getenv('TRACE_FILE', 'traces/strix_traces.jsonl')
+    OTLP_ENDPOINT: str = os.getenv('OTLP_ENDPOINT', 'http://localhost:4318')
+    TRACE_SLOW_THRESHOLD_MS: float = float(os.getenv('TRACE_SLOW_THRESHOLD_MS', '2000'))
+    TRACE_SAMPLE_RATE: float = float(os.getenv('TRACE_SAMPLE_RATE', '0.01'))
+    
     # Document Types
     INTERNAL_DOC_TYPES = ['report', 'analysis', 'memo', 'presentation']
     EXTERNAL_DOC_TYPES = ['news', 'research', 'competitor', 'policy']
@@ -52,9 +176,11 @@ class Config:
                 raise ValueError("OPENAI_API_KEY is required when MOCK_MODE is false")
             if cls.LLM_PROVIDER == 'google' and not cls.GOOGLE_API_KEY:
                 raise ValueError("GOOGLE_API_KEY is required when MOCK_MODE is false")
+            if cls.EMBEDDING_PROVIDER == 'openai' and not cls.OPENAI_API_KEY:
+                raise ValueError("OPENAI_API_KEY is required for OpenAI embeddings")
                 
             # Check Supabase settings
-            if not cls.SUPABASE_URL or not cls.SUPABASE_KEY:
+            if cls.VECTOR_BACKEND == 'supabase' and (not cls.SUPABASE_URL or not cls.SUPABASE_KEY):
                 raise ValueError("Supabase credentials are required when MOCK_MODE is false")
         
         return True
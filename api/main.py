@@ -2,19 +2,33 @@
 STRIX v2 FastAPI Server
 Modern async API server with LangChain RAG integration
 """
-from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Literal
 import uvicorn
 import logging
 from datetime import datetime
 import os
+import shutil
+import sys
 import tempfile
+import threading
+import time
 
-from config import config
-from rag import STRIXRAGChain, STRIXDocumentLoader, STRIXVectorStore
+# The rag package imports config relatively, so load both through the `api` package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.config import config
+from api.rag.registry import registry
+from api.rag.metrics import registry as metrics_registry, HTTP_REQUEST_SECONDS, PROMETHEUS_CONTENT_TYPE
+from api.rag.tracing import tracer, set_request_id, new_request_id, parse_traceparent, SPAN_KIND_SERVER
+from api.rag.metadata_index import build_metadata_filter
+from api.rag.tabular import wants_tsv, query_tsv, search_tsv, TSV_MEDIA_TYPE, CONTENT_PREVIEW_CHARS
+from api.rag.pagination import SearchPager, wants_ndjson, parse_fields, hit_record, NDJSON_MEDIA_TYPE
+from api.rag.report import ReportBuilder, DEFAULT_SECTIONS, XLSX_MEDIA_TYPE, report_filename, iter_file
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -34,12 +48,78 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Initialize RAG components
-rag_chain = STRIXRAGChain()
-document_loader = STRIXDocumentLoader()
-vector_store = STRIXVectorStore()
+# Compress large responses (JSON or TSV) for clients sending Accept-Encoding: gzip
+if config.GZIP_MIN_BYTES > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=config.GZIP_MIN_BYTES)
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """Record per-route latency and trace the request under a request ID"""
+    start = time.perf_counter()
+    status = 500
+    trace_id, parent_span_id = parse_traceparent(request.headers.get("traceparent"))
+    
+    with tracer.span(
+        f"{request.method} {request.url.path}",
+        kind=SPAN_KIND_SERVER,
+        trace_id=trace_id,
+        parent_span_id=parent_span_id,
+        **{"http.method": request.method, "http.target": request.url.path}
+    ) as span:
+        # A client's X-Request-ID is echoed as is; the trace ID goes in its own header
+        request_id = request.headers.get("x-request-id") or span.trace_id or new_request_id()
+        set_request_id(request_id)
+        span.set_attribute("request_id", request_id)
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["X-Request-ID"] = request_id
+            if span.trace_id:
+                response.headers["X-Trace-ID"] = span.trace_id
+            return response
+        finally:
+            span.set_attribute("http.status_code", status)
+            # Label by route template to keep cardinality bounded
+            route = request.scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=request.method,
+                path=path,
+                status=str(status)
+            )
+
+# RAG components are built on first use (or by warmup) and shared process-wide
+@app.on_event("startup")
+async def start_warmup():
+    """Build RAG components in the background so the server accepts connections at once"""
+    if config.WARMUP_ON_STARTUP:
+        threading.Thread(target=registry.warmup, name="strix-warmup", daemon=True).start()
+
+def start_watcher():
+    """Watch WATCH_DIRS in this process, unless another worker or a CLI watcher already does"""
+    from api.rag.watcher import create_watcher
+    try:
+        watcher = create_watcher(registry.vector_store(), registry.document_loader())
+        if watcher.start():
+            app.state.watcher = watcher
+    except Exception as e:
+        logger.error(f"Folder watcher failed to start: {e}")
+
+@app.on_event("startup")
+async def start_watch_service():
+    """Optional background folder watcher (see api/watch.py for the standalone CLI)"""
+    if config.WATCH_ON_STARTUP and config.WATCH_DIRS and not config.MOCK_MODE:
+        threading.Thread(target=start_watcher, name="strix-watch-start", daemon=True).start()
+
+@app.on_event("shutdown")
+async def stop_watch_service():
+    watcher = getattr(app.state, "watcher", None)
+    if watcher is not None:
+        watcher.stop()
 
 # Pydantic models for request/response
 class QueryRequest(BaseModel):
@@ -47,6 +127,10 @@ class QueryRequest(BaseModel):
     doc_type: Optional[str] = "both"
     max_results: Optional[int] = 10
     include_sources: Optional[bool] = True
+    filter: Optional[Dict[str, Any]] = None  # e.g. {"organization": [...], "date": {"gte": "2025-07-01"}}
+    search_type: Optional[Literal["similarity", "mmr"]] = None  # defaults to SEARCH_TYPE
+    mmr_lambda: Optional[float] = Field(None, ge=0.0, le=1.0)
+    recency_weight: Optional[float] = Field(None, ge=0.0, le=1.0)  # defaults to RECENCY_WEIGHT
 
 class QueryResponse(BaseModel):
     answer: str
@@ -55,6 +139,7 @@ class QueryResponse(BaseModel):
     external_docs: int
     sources: List[Dict[str, Any]]
     timestamp: str
+    request_id: Optional[str] = None
 
 class DocumentUploadResponse(BaseModel):
     status: str
@@ -67,6 +152,28 @@ class FeedbackRequest(BaseModel):
     question: Optional[str] = None
     answer: Optional[str] = None
     rating: Optional[int] = None
+    request_id: Optional[str] = None  # request_id of the /api/query response being rated
+
+class AnalyzeRequest(BaseModel):
+    filter: Optional[Dict[str, Any]] = None  # selects the documents to analyze
+    doc_type: Optional[str] = "both"
+    focus: Optional[str] = None  # topic the insights should address
+    max_documents: Optional[int] = Field(None, ge=1)  # defaults to ANALYSIS_MAX_DOCUMENTS
+
+class IssuePredictRequest(BaseModel):
+    as_of: Optional[str] = None  # end of the window (ISO date); defaults to the latest dated document
+    top_k: Optional[int] = Field(10, ge=1, le=100)
+    narrative: Optional[bool] = True  # describe the top candidates with the LLM
+
+class ReportSection(BaseModel):
+    title: str
+    question: str
+
+class ReportRequest(BaseModel):
+    title: Optional[str] = "월간 배터리 산업 동향 보고서"
+    sections: Optional[List[ReportSection]] = None  # defaults to the monthly report sections
+    doc_type: Optional[str] = "both"
+    filter: Optional[Dict[str, Any]] = None
 
 # API Endpoints
 @app.get("/")
@@ -81,33 +188,66 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check (liveness) endpoint; does not build components"""
+    status = registry.status()
     return {
         "status": "healthy",
         "mode": "mock" if config.MOCK_MODE else "production",
         "components": {
-            "rag_chain": "operational",
-            "vector_store": "operational",
-            "document_loader": "operational"
+            name: "operational" if component["initialized"] else "not_initialized"
+            for name, component in status["components"].items()
         },
+        "caches": registry.vector_store().cache_stats() if status["components"]["vector_store"]["initialized"] else None,
+        "watcher": getattr(getattr(app.state, "watcher", None), "stats", None),
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/api/ready")
+async def readiness_check():
+    """Readiness probe: 503 until all components are built"""
+    status = registry.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.post("/api/warmup")
+def warmup():
+    """Build all components now (idempotent)"""
+    status = registry.warmup()
+    if status["error"]:
+        raise HTTPException(status_code=500, detail=status["error"])
+    return status
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return Response(content=metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 @app.post("/api/query", response_model=QueryResponse)
-async def query_rag(request: QueryRequest):
+def query_rag(
+    request: QueryRequest,
+    http_request: Request,
+    format: Optional[Literal["json", "tsv"]] = None
+):
     """
     Main RAG query endpoint
     Process user questions using the RAG pipeline
+    format=tsv (or Accept: text/tab-separated-values) returns compact TSV tables
     """
     try:
         logger.info(f"Processing query: {request.question}")
         
         # Process through RAG chain
-        result = rag_chain.invoke(
+        result = registry.rag_chain().invoke(
             question=request.question,
-            doc_type=request.doc_type
+            doc_type=request.doc_type,
+            filter=request.filter,
+            search_type=request.search_type,
+            mmr_lambda=request.mmr_lambda,
+            recency_weight=request.recency_weight
         )
         
+        if wants_tsv(format, http_request.headers.get("accept")):
+            return Response(content=query_tsv(result, request.include_sources), media_type=TSV_MEDIA_TYPE)
+        
         # Format response
         response = QueryResponse(
             answer=result.get("answer", ""),
@@ -115,7 +255,8 @@ async def query_rag(request: QueryRequest):
             internal_docs=result.get("internal_docs", 0),
             external_docs=result.get("external_docs", 0),
             sources=result.get("sources", []) if request.include_sources else [],
-            timestamp=result.get("timestamp", datetime.now().isoformat())
+            timestamp=result.get("timestamp", datetime.now().isoformat()),
+            request_id=result.get("request_id")
         )
         
         return response
@@ -125,7 +266,7 @@ async def query_rag(request: QueryRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/documents/upload")
-async def upload_document(
+def upload_document(
     file: UploadFile = File(...),
     doc_type: str = "internal",
     organization: Optional[str] = None,
@@ -138,8 +279,7 @@ async def upload_document(
     try:
         # Save uploaded file temporarily
         with tempfile.NamedTemporaryFile(delete=False, suffix=file.filename) as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
+            shutil.copyfileobj(file.file, tmp_file)
             tmp_path = tmp_file.name
         
         # Process document
@@ -151,13 +291,13 @@ async def upload_document(
         }
         
         # Load and split document
-        documents = document_loader.load_document(tmp_path, metadata)
+        documents = registry.document_loader().load_document(tmp_path, metadata)
         
         if not documents:
             raise HTTPException(status_code=400, detail="Failed to process document")
         
         # Add to vector store (can be done in background)
-        background_tasks.add_task(vector_store.add_documents, documents)
+        background_tasks.add_task(registry.vector_store().add_documents, documents)
         
         # Clean up temp file
         background_tasks.add_task(os.unlink, tmp_path)
@@ -174,7 +314,7 @@ async def upload_document(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/documents/batch")
-async def batch_upload_documents(
+def batch_upload_documents(
     files: List[UploadFile] = File(...),
     doc_type: str = "internal",
     background_tasks: BackgroundTasks = BackgroundTasks()
@@ -188,8 +328,7 @@ async def batch_upload_documents(
         for file in files:
             # Save file temporarily
             with tempfile.NamedTemporaryFile(delete=False, suffix=file.filename) as tmp_file:
-                content = await file.read()
-                tmp_file.write(content)
+                shutil.copyfileobj(file.file, tmp_file)
                 tmp_path = tmp_file.name
             
             # Process document
@@ -199,11 +338,11 @@ async def batch_upload_documents(
                 "file_name": file.filename
             }
             
-            documents = document_loader.load_document(tmp_path, metadata)
+            documents = registry.document_loader().load_document(tmp_path, metadata)
             total_chunks += len(documents)
             
             # Add to vector store in background
-            background_tasks.add_task(vector_store.add_documents, documents)
+            background_tasks.add_task(registry.vector_store().add_documents, documents)
             background_tasks.add_task(os.unlink, tmp_path)
         
         return DocumentUploadResponse(
@@ -218,63 +357,211 @@ async def batch_upload_documents(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/feedback")
-async def submit_feedback(request: FeedbackRequest):
+def submit_feedback(request: FeedbackRequest):
     """
     Submit feedback for continuous improvement
+    
+    Stored in batches in the background; a low rating drops the cached
+    answers to the question so the next ask is answered afresh.
     """
     try:
-        # In production, save to database
-        feedback_data = {
-            "feedback": request.feedback,
-            "question": request.question,
-            "answer": request.answer,
-            "rating": request.rating,
-            "timestamp": datetime.now().isoformat(),
-            "feedback_id": f"FB_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        }
-        
-        logger.info(f"Feedback received: {feedback_data['feedback_id']}")
+        entry = registry.feedback_store().submit(
+            feedback=request.feedback,
+            question=request.question,
+            answer=request.answer,
+            rating=request.rating,
+            request_id=request.request_id
+        )
+        logger.info(f"Feedback received: {entry['feedback_id']}")
         
         return {
             "status": "success",
             "message": "피드백이 저장되었습니다",
-            "feedback_id": feedback_data["feedback_id"]
+            "feedback_id": entry["feedback_id"]
         }
         
     except Exception as e:
         logger.error(f"Feedback submission failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/feedback")
+def get_feedback(question: str, limit: int = Query(50, ge=1, le=1000)):
+    """Most recent feedback on a question, with its aggregate"""
+    store = registry.feedback_store()
+    return {"question": question, "summary": store.summary(question), "entries": store.by_question(question, limit)}
+
+@app.get("/api/feedback/questions")
+def feedback_questions(limit: int = Query(20, ge=1, le=1000), min_count: int = Query(1, ge=1)):
+    """Questions with feedback, most frequent first (count, average rating, negatives)"""
+    store = registry.feedback_store()
+    return {"questions": store.questions(limit, min_count=min_count), "store": store.stats()}
+
+@app.post("/api/analyze")
+def analyze_documents(request: AnalyzeRequest):
+    """
+    Summarize the documents matching a filter (map) and derive categorized insights (reduce)
+    
+    Per-document summaries are cached by content hash, so a refresh only
+    summarizes documents that are new or changed.
+    """
+    if config.MOCK_MODE:
+        raise HTTPException(status_code=400, detail="Analysis is not available in mock mode")
+    filter = dict(request.filter or {})
+    if request.doc_type in ("internal", "external"):
+        filter["doc_type"] = request.doc_type
+    try:
+        analysis = registry.insight_engine().analyze(
+            filter=filter or None,
+            focus=request.focus,
+            max_documents=request.max_documents or config.ANALYSIS_MAX_DOCUMENTS
+        )
+    except Exception as e:
+        logger.error(f"Analysis failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"status": "success", **analysis, "timestamp": datetime.now().isoformat()}
+
+@app.post("/api/issues/predict")
+def predict_issues(request: IssuePredictRequest):
+    """
+    Predict emerging issues from term/entity frequency bursts
+    
+    Statistics come from the incrementally maintained trend index; only
+    the top candidates are sent to the LLM for a narrative.
+    """
+    if config.MOCK_MODE:
+        raise HTTPException(status_code=400, detail="Issue prediction is not available in mock mode")
+    try:
+        prediction = registry.issue_predictor().predict(
+            as_of=request.as_of,
+            top_k=request.top_k,
+            narrative=request.narrative
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Issue prediction failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"status": "success", **prediction, "timestamp": datetime.now().isoformat()}
+
+@app.post("/api/report")
+def generate_report(request: ReportRequest):
+    """
+    Generate a report workbook (one sheet per section) and stream it as a download
+
+    Sections are answered concurrently; the .xlsx is written in streaming
+    mode to a temporary file that is removed once sent.
+    """
+    try:
+        builder = ReportBuilder(
+            registry.rag_chain(),
+            registry.vector_store(),
+            max_workers=config.REPORT_MAX_WORKERS,
+            table_rows=config.REPORT_TABLE_ROWS
+        )
+        sections = [section.model_dump() for section in request.sections] if request.sections else DEFAULT_SECTIONS
+        path = builder.build(
+            request.title,
+            sections,
+            doc_type=request.doc_type,
+            filter=request.filter,
+            directory=config.REPORT_DIR or None
+        )
+    except Exception as e:
+        logger.error(f"Report generation failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StreamingResponse(
+        iter_file(path),
+        media_type=XLSX_MEDIA_TYPE,
+        headers={
+            "Content-Disposition": f"attachment; filename={report_filename()}",
+            "Content-Length": str(os.path.getsize(path))
+        }
+    )
+
 @app.get("/api/documents/search")
-async def search_documents(
+def search_documents(
+    http_request: Request,
     query: str,
     doc_type: Optional[str] = None,
-    limit: int = 10
+    limit: int = Query(10, ge=1),
+    organization: Optional[List[str]] = Query(None),
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    days: Optional[int] = None,
+    search_type: Optional[Literal["similarity", "mmr"]] = None,
+    mmr_lambda: Optional[float] = Query(None, ge=0.0, le=1.0),
+    recency_weight: Optional[float] = Query(None, ge=0.0, le=1.0),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    content_chars: int = Query(CONTENT_PREVIEW_CHARS, ge=0),
+    format: Optional[Literal["json", "tsv", "ndjson"]] = None
 ):
     """
     Search documents directly without generating answer
+    Optional metadata pre-filters: organization (repeatable), date_from / date_to (YYYY-MM-DD), days (last N days)
+    search_type=mmr reranks a wider candidate pool for diversity
+    recency_weight blends similarity with document age (newer first)
+    Similarity results are paged: pass next_cursor (JSON) or the X-Next-Cursor header (TSV) as cursor
+    fields: comma-separated metadata keys to return (all by default); content_chars: content cut (0 = none)
+    format=tsv (or Accept: text/tab-separated-values) returns one TSV row per document
+    format=ndjson (or Accept: application/x-ndjson) streams one JSON line per document, up to limit
     """
+    accept = http_request.headers.get("accept")
+    ndjson = wants_ndjson(format, accept)
+    tsv = not ndjson and wants_tsv(format, accept)
+    paged = (search_type or config.SEARCH_TYPE) == "similarity" or cursor is not None or ndjson
     try:
-        filter = {"doc_type": doc_type} if doc_type else None
-        
-        results = vector_store.similarity_search_with_score(
-            query=query,
-            k=limit,
-            filter=filter
+        if paged and search_type == "mmr":
+            raise ValueError("cursor and format=ndjson page by similarity; MMR results are not paged")
+        max_limit = config.SEARCH_STREAM_MAX_RESULTS if ndjson else config.SEARCH_MAX_PAGE_SIZE
+        if limit > max_limit:
+            raise ValueError(f"limit must be at most {max_limit} (use cursor or format=ndjson for more)")
+        filter = build_metadata_filter(doc_type, organization, date_from, date_to, days)
+        metadata_fields = parse_fields(fields)
+        pager = SearchPager(registry.vector_store(), query, filter, recency_weight, cursor) if paged else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if ndjson:
+        # Hits are written batch by batch as the search produces them
+        return StreamingResponse(
+            pager.iter_ndjson(limit, metadata_fields, content_chars, config.SEARCH_STREAM_BATCH_SIZE),
+            media_type=NDJSON_MEDIA_TYPE
         )
+    
+    try:
+        next_cursor = None
+        if pager is not None:
+            results, next_cursor = pager.page(limit)
+            start = pager.rank + 1
+        else:
+            results = registry.vector_store().search_with_score(
+                query=query,
+                k=limit,
+                filter=filter,
+                search_type=search_type,
+                mmr_lambda=mmr_lambda,
+                recency_weight=recency_weight
+            )
+            start = 1
         
-        documents = []
-        for doc, score in results:
-            documents.append({
-                "content": doc.page_content[:500] + "..." if len(doc.page_content) > 500 else doc.page_content,
-                "metadata": doc.metadata,
-                "relevance_score": score
-            })
+        if tsv:
+            headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+            return Response(
+                content=search_tsv(results, start, content_chars), media_type=TSV_MEDIA_TYPE, headers=headers
+            )
+        
+        documents = [
+            hit_record(rank, doc, score, metadata_fields, content_chars)
+            for rank, (doc, score) in enumerate(results, start)
+        ]
         
         return {
             "query": query,
             "document_count": len(documents),
             "documents": documents,
+            "next_cursor": next_cursor,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -282,13 +569,35 @@ async def search_documents(
         logger.error(f"Document search failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/index/refit")
+def refit_index():
+    """
+    Re-fit the local index's projection / quantization on the current corpus (admin only)
+    """
+    try:
+        success = registry.vector_store().refit_index()
+        
+        if success:
+            return {
+                "status": "success",
+                "message": "Index re-fitted"
+            }
+        else:
+            raise HTTPException(status_code=400, detail="Index re-fit is not available for this backend")
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Index re-fit failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.delete("/api/documents/clear")
-async def clear_documents():
+def clear_documents():
     """
     Clear all documents from vector store (admin only)
     """
     try:
-        success = vector_store.clear()
+        success = registry.vector_store().clear()
         
         if success:
             return {
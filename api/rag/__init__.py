@@ -1,12 +1,25 @@
 """
 STRIX v2 RAG System
 """
-from .chain import STRIXRAGChain
-from .vector_store import STRIXVectorStore
-from .document_loader import STRIXDocumentLoader
-
-__all__ = [
-    'STRIXRAGChain',
-    'STRIXVectorStore', 
-    'STRIXDocumentLoader'
-]
\ No newline at end of file
+import importlib
+
+# Public classes are imported on first access, so importing a submodule
+# (e.g. in a shard worker) does not pull in LangGraph, LangChain
+# integrations and the Supabase client.
+_EXPORTS = {
+    'STRIXRAGChain': '.chain',
+    'STRIXVectorStore': '.vector_store',
+    'STRIXDocumentLoader': '.document_loader',
+    'ComponentRegistry': '.registry',
+    'registry': '.registry'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
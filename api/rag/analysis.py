@@ -0,0 +1,349 @@
+"""
+Analysis module for STRIX v2
+Map-reduce insight generation over a metadata-filtered document set
+"""
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import hashlib
+import logging
+import re
+import time
+from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate
+from .metrics import ANALYSIS_SECONDS, ERRORS
+from .retrieval_cache import RetrievalCache
+from .tracing import tracer
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+# Bump when the prompts change, so cached summaries are not reused
+PROMPT_VERSION = "1"
+
+CATEGORIES = ("전략", "기술", "시장", "리스크", "정책")
+DEFAULT_CONFIDENCE = 0.7
+
+MAP_TEMPLATE = """You are STRIX, an analyst for the battery industry.
+
+Summarize the following document in Korean in at most 5 bullet points.
+Keep concrete facts: figures, dates, companies, technologies and risks.
+
+Title: {title}
+Organization: {organization}
+Date: {date}
+
+{content}
+
+Summary:"""
+
+COMBINE_TEMPLATE = """You are STRIX, an analyst for the battery industry.
+
+Merge the following document summaries into one summary in Korean of at
+most 8 bullet points. Keep the most important facts and note where
+sources agree or conflict.
+
+{summaries}
+
+Merged summary:"""
+
+INSIGHT_TEMPLATE = """You are STRIX, an analyst for the battery industry.
+
+From the following summaries of {documents} documents, derive the key
+insights{focus}. Write one insight per line in Korean, in the form
+
+category | insight | confidence
+
+where category is one of: {categories}, and confidence is a number
+between 0 and 1 reflecting how well the summaries support the insight.
+
+{summaries}
+
+Insights:"""
+
+
+class InsightEngine:
+    """
+    Map-reduce analysis of a document set into categorized insights
+
+    Map: every document (its chunks joined in order) is summarized by the
+    LLM, up to `max_concurrency` at a time. Summaries are cached by a hash
+    of the document content, so unchanged documents are never summarized
+    twice; with a shared cache tier the cache is shared by the workers and
+    survives restarts (sqlite/redis).
+
+    Reduce: summaries are combined about `reduce_fanout` at a time, level
+    by level, until one prompt can hold them all, which then yields the
+    insights. Documents are ordered by date and a group ends where a
+    summary's hash says so (content-defined boundaries, see _groups), not
+    every `reduce_fanout` positions: a document added, removed or dropped
+    by `max_documents` only changes the groups around it, every other
+    combine step has unchanged inputs and is a cache hit too.
+    """
+
+    def __init__(
+        self,
+        rag_chain,
+        cache: Optional[RetrievalCache] = None,
+        max_concurrency: int = 8,
+        reduce_fanout: int = 8,
+        max_document_chars: int = 8000
+    ):
+        self.rag_chain = rag_chain
+        self.vector_store = rag_chain.vector_store
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.reduce_fanout = max(2, reduce_fanout)
+        self.max_document_chars = max_document_chars
+        self.map_prompt = ChatPromptTemplate.from_template(MAP_TEMPLATE)
+        self.combine_prompt = ChatPromptTemplate.from_template(COMBINE_TEMPLATE)
+        self.insight_prompt = ChatPromptTemplate.from_template(INSIGHT_TEMPLATE)
+
+    def analyze(
+        self,
+        filter: Optional[Dict[str, Any]] = None,
+        focus: Optional[str] = None,
+        max_documents: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze the documents matching a metadata filter
+
+        Args:
+            filter: Metadata filter selecting the chunks to analyze
+            focus: Optional topic the insights should address
+            max_documents: Keep only the most recent documents
+
+        Returns:
+            Dictionary with insights and map/reduce statistics
+        """
+        if self.rag_chain.llm is None:
+            raise ValueError("Analysis requires an LLM (not available in mock mode)")
+
+        start = time.perf_counter()
+        stats = {"summaries_generated": 0, "summaries_cached": 0, "reduce_calls": 0, "reduce_cached": 0}
+        with tracer.span("analysis.analyze", focus=focus or ""):
+            # Every matching chunk (Supabase is read page by page, past the PostgREST row cap)
+            chunks = self.vector_store.get_documents(filter=filter)
+            documents = group_documents(chunks)
+            if max_documents:
+                documents = documents[-max_documents:]
+            if not documents:
+                return {"insights": [], "documents": 0, "chunks": len(chunks), **stats, "seconds": 0.0}
+
+            map_start = time.perf_counter()
+            summaries = self._map(documents, stats)
+            ANALYSIS_SECONDS.observe(time.perf_counter() - map_start, stage="map")
+            if not summaries:
+                raise RuntimeError("Every document summary failed")
+
+            reduce_start = time.perf_counter()
+            insights = self._reduce(summaries, focus, stats)
+            ANALYSIS_SECONDS.observe(time.perf_counter() - reduce_start, stage="reduce")
+
+        seconds = time.perf_counter() - start
+        ANALYSIS_SECONDS.observe(seconds, stage="total")
+        logger.info(
+            f"Analyzed {len(documents)} documents: {stats['summaries_generated']} summarized, "
+            f"{stats['summaries_cached']} cached, {stats['reduce_calls']} reduce calls"
+        )
+        return {
+            "insights": insights,
+            "documents": len(documents),
+            "chunks": len(chunks),
+            **stats,
+            "seconds": round(seconds, 3)
+        }
+
+    def _cached(self, key: str) -> Tuple[Optional[Any], int]:
+        if self.cache is None:
+            return None, 0
+        return self.cache.get(key)
+
+    def _store(self, key: str, value: Any, version: int) -> None:
+        if self.cache is not None:
+            self.cache.put(key, value, version)
+
+    def _run_parallel(self, function, items: List[Any]) -> List[Any]:
+        """Apply a function to items on a bounded pool (results in order)"""
+        if len(items) <= 1 or self.max_concurrency <= 1:
+            return [function(item) for item in items]
+        workers = min(self.max_concurrency, len(items))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="strix-analysis") as executor:
+            # Each task runs in a copy of the request context (request ID, trace)
+            futures = [executor.submit(contextvars.copy_context().run, function, item) for item in items]
+            return [future.result() for future in futures]
+
+    def _map(self, documents: List["SourceDocument"], stats: Dict[str, int]) -> List[Tuple[str, str]]:
+        """(content hash, summary) per document; failed documents are skipped"""
+        pending = []
+        results: Dict[str, Optional[str]] = {}
+        for document in documents:
+            if document.digest in results:
+                continue
+            summary, version = self._cached(f"map:{document.digest}")
+            if summary is not None:
+                results[document.digest] = summary
+                stats["summaries_cached"] += 1
+            else:
+                results[document.digest] = None
+                pending.append((document, version))
+
+        def summarize(item: Tuple["SourceDocument", int]) -> Optional[str]:
+            document, version = item
+            try:
+                prompt = self.map_prompt.invoke({
+                    "title": document.metadata.get("title", "Unknown"),
+                    "organization": document.metadata.get("organization", "Unknown"),
+                    "date": document.metadata.get("date", "Unknown"),
+                    "content": document.content[:self.max_document_chars]
+                })
+                summary = self.rag_chain._call_llm("summarize", prompt).content
+            except Exception as e:
+                ERRORS.inc(component="analysis")
+                logger.error(f"Summary of '{document.key}' failed: {e}")
+                return None
+            self._store(f"map:{document.digest}", summary, version)
+            return summary
+
+        for (document, _), summary in zip(pending, self._run_parallel(summarize, pending)):
+            results[document.digest] = summary
+            stats["summaries_generated"] += summary is not None
+        return [(digest, summary) for digest, summary in results.items() if summary is not None]
+
+    def _reduce(self, summaries: List[Tuple[str, str]], focus: Optional[str], stats: Dict[str, int]) -> List[Dict[str, Any]]:
+        """Combine summaries level by level, then derive insights from the last level"""
+        level = summaries
+        while len(level) > self.reduce_fanout:
+            groups = self._groups(level)
+            merged = [group for group in groups if len(group) > 1]
+            combined = iter(self._run_parallel(self._combine, merged))
+            # Counted here: _combine runs on pool threads; a lone summary moves up unchanged
+            next_level = []
+            for group in groups:
+                if len(group) == 1:
+                    next_level.append(group[0])
+                    continue
+                digest, summary, cached = next(combined)
+                stats["reduce_cached"] += cached
+                stats["reduce_calls"] += not cached
+                next_level.append((digest, summary))
+            level = next_level
+
+        # Insights depend on the whole set; key them by the top level's inputs
+        key = "insights:" + _digest("\n".join(digest for digest, _ in level) + "\n" + (focus or ""))
+        cached, version = self._cached(key)
+        if cached is not None:
+            stats["reduce_cached"] += 1
+            return cached
+        prompt = self.insight_prompt.invoke({
+            "documents": len(summaries),
+            "focus": f" about: {focus}" if focus else "",
+            "categories": ", ".join(CATEGORIES),
+            "summaries": _numbered(level)
+        })
+        stats["reduce_calls"] += 1
+        insights = parse_insights(self.rag_chain._call_llm("insights", prompt).content)
+        self._store(key, insights, version)
+        return insights
+
+    def _groups(self, level: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        """
+        Split a level into reduce groups at content-defined boundaries
+
+        A group ends after a summary whose hash is divisible by
+        `reduce_fanout` (about `reduce_fanout` summaries per group), once it
+        holds two, or at twice `reduce_fanout`. Boundaries move with the
+        summaries rather than their positions, so groups away from a change
+        keep their inputs, and every level at least halves.
+        """
+        groups, group = [], []
+        for item in level:
+            group.append(item)
+            if len(group) >= 2 * self.reduce_fanout or (
+                len(group) >= 2 and int(item[0][:8], 16) % self.reduce_fanout == 0
+            ):
+                groups.append(group)
+                group = []
+        if group:
+            groups.append(group)
+        return groups
+
+    def _combine(self, group: List[Tuple[str, str]]) -> Tuple[str, str, bool]:
+        """One reduce step: a merged summary keyed by its inputs' hashes, and whether it was cached"""
+        digest = _digest("\n".join(digest for digest, _ in group))
+        key = f"combine:{digest}"
+        cached, version = self._cached(key)
+        if cached is not None:
+            return digest, cached, True
+        prompt = self.combine_prompt.invoke({"summaries": _numbered(group)})
+        summary = self.rag_chain._call_llm("combine", prompt).content
+        self._store(key, summary, version)
+        return digest, summary, False
+
+
+class SourceDocument:
+    """One source document reassembled from its stored chunks"""
+
+    def __init__(self, key: str, chunks: List[Document]):
+        self.key = key
+        self.metadata = chunks[0].metadata
+        self.content = "\n".join(chunk.page_content for chunk in chunks)
+        self.digest = _digest(self.content)
+
+
+def group_documents(chunks: List[Document]) -> List[SourceDocument]:
+    """Join chunks per source document (by `source`, else title), oldest document first"""
+    grouped: Dict[str, List[Document]] = {}
+    for chunk in chunks:
+        key = str(chunk.metadata.get("source") or chunk.metadata.get("title") or chunk.id)
+        grouped.setdefault(key, []).append(chunk)
+    documents = [
+        SourceDocument(key, sorted(group, key=lambda chunk: chunk.metadata.get("start_index") or 0))
+        for key, group in grouped.items()
+    ]
+    documents.sort(key=lambda document: (str(document.metadata.get("date", "")), document.key))
+    return documents
+
+
+_INSIGHT_LINE = re.compile(r"^\s*(?:[-*\d.)\s]+)?\[?([^|\]]+?)\]?\s*\|\s*(.+?)\s*\|\s*([01](?:\.\d+)?)\s*$")
+
+
+def parse_insights(text: str) -> List[Dict[str, Any]]:
+    """Parse 'category | insight | confidence' lines (the whole text as one insight otherwise)"""
+    insights = []
+    for line in text.splitlines():
+        match = _INSIGHT_LINE.match(line)
+        if match:
+            category, insight, confidence = match.groups()
+            insights.append({
+                "category": category.strip(),
+                "insight": insight,
+                "confidence": min(1.0, float(confidence))
+            })
+    if not insights and text.strip():
+        insights.append({"category": "종합", "insight": text.strip(), "confidence": DEFAULT_CONFIDENCE})
+    return insights
+
+
+def create_summary_cache(shared=None) -> Optional[RetrievalCache]:
+    """Content-addressed summary cache (independent of the corpus version)"""
+    if config.SUMMARY_CACHE_SIZE <= 0:
+        return None
+    name = f"{config.LLM_PROVIDER}:{PROMPT_VERSION}"
+    return RetrievalCache.for_collection(
+        name,
+        config.SUMMARY_CACHE_SIZE,
+        config.SUMMARY_CACHE_TTL_SECONDS,
+        kind="summary",
+        shared=shared,
+        version_poll_seconds=config.SHARED_CACHE_VERSION_POLL_SECONDS,
+        version_name=f"summary:{name}"
+    )
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _numbered(summaries: List[Tuple[str, str]]) -> str:
+    return "\n\n".join(f"[{i}]\n{summary}" for i, (_, summary) in enumerate(summaries, 1))
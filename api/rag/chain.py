@@ -2,25 +2,38 @@
 RAG Chain module for STRIX v2
 Implements the core RAG pipeline using LangGraph
 """
-from typing import List, Dict, Any, Optional, TypedDict
+from typing import List, Dict, Any, Optional, Tuple, TypedDict
 from langchain_core.documents import Document
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.graph import StateGraph, START
 import logging
 from datetime import datetime
 from .vector_store import STRIXVectorStore
+from .fakes import FakeChatModel
+from .metrics import GRAPH_NODE_SECONDS, LLM_SECONDS, ERRORS, record_tokens
+from .tracing import tracer, current_request_id, SPAN_KIND_CLIENT
+from .retrieval_cache import filter_key
+from .feedback import question_key
+from .registry import registry
+import time
 from ..config import config
 
 logger = logging.getLogger(__name__)
 
+# Answer cache entry fields kept for return_documents, not part of the response
+CACHED_RETRIEVAL = ("retrieved", "search_query")
+
 # State definition for LangGraph
 class RAGState(TypedDict):
     """State for RAG processing"""
     question: str
     doc_type: str
+    filter: Optional[Dict[str, Any]]
+    search_type: Optional[str]
+    mmr_lambda: Optional[float]
+    recency_weight: Optional[float]
     context: List[Document]
+    scored_docs: List[Tuple[Document, float]]
     internal_docs: List[Document]
     external_docs: List[Document]
     answer: str
@@ -30,9 +43,9 @@ class RAGState(TypedDict):
 class STRIXRAGChain:
     """Main RAG chain for STRIX system"""
     
-    def __init__(self):
-        """Initialize RAG chain components"""
-        self.vector_store = STRIXVectorStore()
+    def __init__(self, vector_store: Optional[STRIXVectorStore] = None):
+        """Initialize RAG chain components (optionally on a shared vector store)"""
+        self.vector_store = vector_store or STRIXVectorStore()
         self.llm = self._initialize_llm()
         self.graph = self._build_graph()
         
@@ -46,22 +59,56 @@ class STRIXRAGChain:
             return None
         
         if config.LLM_PROVIDER == 'openai':
+            from langchain_openai import ChatOpenAI
             return ChatOpenAI(
                 model="gpt-4-turbo-preview",
                 temperature=config.TEMPERATURE,
                 max_tokens=config.MAX_TOKENS,
-                api_key=config.OPENAI_API_KEY
+                api_key=config.OPENAI_API_KEY,
+                http_client=registry.http_client()
             )
         elif config.LLM_PROVIDER == 'google':
+            from langchain_google_genai import ChatGoogleGenerativeAI
             return ChatGoogleGenerativeAI(
                 model="gemini-2.0-flash",
                 temperature=config.TEMPERATURE,
                 max_tokens=config.MAX_TOKENS,
                 google_api_key=config.GOOGLE_API_KEY
             )
+        elif config.LLM_PROVIDER == 'fake':
+            return FakeChatModel(
+                latency_ms=config.FAKE_LLM_LATENCY_MS,
+                tokens_per_second=config.FAKE_LLM_TOKENS_PER_SECOND,
+                response_tokens=min(config.FAKE_LLM_RESPONSE_TOKENS, config.MAX_TOKENS),
+                error_rate=config.FAKE_ERROR_RATE,
+                seed=config.FAKE_SEED
+            )
         else:
             raise ValueError(f"Unsupported LLM provider: {config.LLM_PROVIDER}")
     
+    def _call_llm(self, purpose: str, prompt: Any) -> Any:
+        """Invoke the LLM with latency, token and span instrumentation"""
+        with LLM_SECONDS.time(purpose=purpose), \
+                tracer.span(f"llm.{purpose}", kind=SPAN_KIND_CLIENT, provider=config.LLM_PROVIDER) as span:
+            response = self.llm.invoke(prompt)
+            usage = getattr(response, "usage_metadata", None) or {}
+            span.set_attribute("input_tokens", usage.get("input_tokens"))
+            span.set_attribute("output_tokens", usage.get("output_tokens"))
+        record_tokens(purpose, response)
+        return response
+    
+    @staticmethod
+    def _instrument_node(name: str, node: Any) -> Any:
+        """Wrap a graph node with a latency histogram and a span"""
+        def wrapper(state: RAGState) -> Dict:
+            start = time.perf_counter()
+            try:
+                with tracer.span(f"graph.{name}"):
+                    return node(state)
+            finally:
+                GRAPH_NODE_SECONDS.observe(time.perf_counter() - start, node=name)
+        return wrapper
+    
     def _create_qa_prompt(self) -> ChatPromptTemplate:
         """Create Q&A prompt template"""
         template = """You are STRIX, an intelligent assistant for battery industry analysis.
@@ -114,40 +161,50 @@ Optimized Query:"""
                 prompt = self.query_analysis_prompt.invoke({
                     "question": state["question"]
                 })
-                response = self.llm.invoke(prompt)
+                response = self._call_llm("analyze_query", prompt)
                 optimized_query = response.content
                 
                 logger.info(f"Optimized query: {optimized_query}")
                 return {"question": optimized_query}
             except Exception as e:
+                ERRORS.inc(component="analyze_query")
                 logger.error(f"Query analysis failed: {e}")
                 return {"question": state["question"]}
         
         def retrieve_documents(state: RAGState) -> Dict:
             """Retrieve relevant documents"""
             doc_type = state.get("doc_type", "both")
+            base_filter = state.get("filter") or {}
             
-            # Prepare filters based on document type
-            internal_filter = {"doc_type": "internal"} if doc_type in ["internal", "both"] else None
-            external_filter = {"doc_type": "external"} if doc_type in ["external", "both"] else None
+            # Prepare filters based on document type (combined with any metadata filter)
+            internal_filter = {**base_filter, "doc_type": "internal"} if doc_type in ["internal", "both"] else None
+            external_filter = {**base_filter, "doc_type": "external"} if doc_type in ["external", "both"] else None
             
             # Search internal documents
             internal_docs = []
+            internal_results = []
             if internal_filter:
-                internal_results = self.vector_store.similarity_search_with_score(
+                internal_results = self.vector_store.search_with_score(
                     state["question"],
                     k=config.MAX_SEARCH_RESULTS // 2,
-                    filter=internal_filter
+                    filter=internal_filter,
+                    search_type=state.get("search_type"),
+                    mmr_lambda=state.get("mmr_lambda"),
+                    recency_weight=state.get("recency_weight")
                 )
                 internal_docs = [doc for doc, score in internal_results]
             
             # Search external documents  
             external_docs = []
+            external_results = []
             if external_filter:
-                external_results = self.vector_store.similarity_search_with_score(
+                external_results = self.vector_store.search_with_score(
                     state["question"],
                     k=config.MAX_SEARCH_RESULTS // 2,
-                    filter=external_filter
+                    filter=external_filter,
+                    search_type=state.get("search_type"),
+                    mmr_lambda=state.get("mmr_lambda"),
+                    recency_weight=state.get("recency_weight")
                 )
                 external_docs = [doc for doc, score in external_results]
             
@@ -158,6 +215,7 @@ Optimized Query:"""
             
             return {
                 "context": all_docs,
+                "scored_docs": internal_results + external_results,
                 "internal_docs": internal_docs,
                 "external_docs": external_docs
             }
@@ -168,15 +226,15 @@ Optimized Query:"""
                 return self._mock_generate_answer(state)
             
             try:
-                # Prepare context
+                # Prepare context (top hits widened with their neighbouring chunks)
                 internal_context = "\n\n".join([
                     f"[{doc.metadata.get('title', 'Document')}]\n{doc.page_content}"
-                    for doc in state["internal_docs"][:3]
+                    for doc in self.vector_store.expand_context(state["internal_docs"][:3])
                 ])
                 
                 external_context = "\n\n".join([
                     f"[{doc.metadata.get('title', 'Document')}]\n{doc.page_content}"
-                    for doc in state["external_docs"][:3]
+                    for doc in self.vector_store.expand_context(state["external_docs"][:3])
                 ])
                 
                 # Generate answer
@@ -186,7 +244,7 @@ Optimized Query:"""
                     "question": state["question"]
                 })
                 
-                response = self.llm.invoke(prompt)
+                response = self._call_llm("generate", prompt)
                 answer = response.content
                 
                 # Calculate confidence (simplified)
@@ -202,6 +260,7 @@ Optimized Query:"""
                 }
                 
             except Exception as e:
+                ERRORS.inc(component="generate")
                 logger.error(f"Answer generation failed: {e}")
                 return {
                     "answer": "죄송합니다. 답변 생성 중 오류가 발생했습니다.",
@@ -212,10 +271,10 @@ Optimized Query:"""
         # Build graph
         graph_builder = StateGraph(RAGState)
         
-        # Add nodes
-        graph_builder.add_node("analyze_query", analyze_query)
-        graph_builder.add_node("retrieve", retrieve_documents)
-        graph_builder.add_node("generate", generate_answer)
+        # Add nodes (each timed and traced)
+        graph_builder.add_node("analyze_query", self._instrument_node("analyze_query", analyze_query))
+        graph_builder.add_node("retrieve", self._instrument_node("retrieve", retrieve_documents))
+        graph_builder.add_node("generate", self._instrument_node("generate", generate_answer))
         
         # Add edges
         graph_builder.add_edge(START, "analyze_query")
@@ -264,23 +323,66 @@ Optimized Query:"""
         
         return sources
     
-    def invoke(self, question: str, doc_type: str = "both") -> Dict[str, Any]:
+    def invoke(
+        self,
+        question: str,
+        doc_type: str = "both",
+        filter: Optional[Dict[str, Any]] = None,
+        search_type: Optional[str] = None,
+        mmr_lambda: Optional[float] = None,
+        recency_weight: Optional[float] = None,
+        return_documents: bool = False
+    ) -> Dict[str, Any]:
         """
         Process a question through the RAG pipeline
         
         Args:
             question: User's question
             doc_type: Type of documents to search ("internal", "external", "both")
+            filter: Optional metadata filter, e.g. organization set or date range
+            search_type: "similarity" or "mmr" (diversity reranking)
+            mmr_lambda: MMR relevance/diversity trade-off
+            recency_weight: Share of the ranking score given to document recency
+            return_documents: Add the retrieved (document, score) pairs and the
+                search query as "documents" / "search_query" (re-read by ID on
+                cache hits)
             
         Returns:
             Dictionary with answer, confidence, sources, etc.
         """
+        # Identical requests get the cached answer until the corpus changes
+        answer_cache = self.vector_store.answer_cache
+        recency_on = bool(config.RECENCY_WEIGHT if recency_weight is None else recency_weight)
+        version = 0
+        if answer_cache is not None:
+            # Negative feedback bumps the question's generation, retiring its answers everywhere
+            cache_key = (
+                question, doc_type, filter_key(filter), search_type or config.SEARCH_TYPE, mmr_lambda,
+                recency_weight, datetime.now().date().isoformat() if recency_on else None, config.LLM_PROVIDER,
+                answer_cache.generation(f"q:{question_key(question)}")
+            )
+            cached, version = answer_cache.get(cache_key)
+            if cached is not None:
+                response = {key: value for key, value in cached.items() if key not in CACHED_RETRIEVAL}
+                response.update(request_id=current_request_id(), timestamp=datetime.now().isoformat())
+                if not return_documents:
+                    return response
+                documents = self._cached_documents(cached)
+                if documents is not None:
+                    return {**response, "documents": documents, "search_query": cached["search_query"]}
+                # Documents that cannot be restored: answer again
+        
         try:
             # Initialize state
             initial_state = {
                 "question": question,
                 "doc_type": doc_type,
+                "filter": filter,
+                "search_type": search_type,
+                "mmr_lambda": mmr_lambda,
+                "recency_weight": recency_weight,
                 "context": [],
+                "scored_docs": [],
                 "internal_docs": [],
                 "external_docs": [],
                 "answer": "",
@@ -289,7 +391,8 @@ Optimized Query:"""
             }
             
             # Run graph
-            result = self.graph.invoke(initial_state)
+            with tracer.span("rag.invoke", doc_type=doc_type, question_length=len(question)):
+                result = self.graph.invoke(initial_state)
             
             # Format response
             response = {
@@ -298,13 +401,28 @@ Optimized Query:"""
                 "internal_docs": len(result["internal_docs"]),
                 "external_docs": len(result["external_docs"]),
                 "sources": result["sources"],
+                "request_id": current_request_id(),
                 "timestamp": datetime.now().isoformat()
             }
             
+            # Failed generations come back with zero confidence and are not cached
+            if answer_cache is not None and response["confidence"] > 0:
+                entry = {key: value for key, value in response.items() if key not in ("request_id", "timestamp")}
+                if all(doc.id for doc, _ in result["scored_docs"]):
+                    # Scored document IDs, so callers asking for the documents can be served from the cache too
+                    entry["retrieved"] = [(doc.id, score) for doc, score in result["scored_docs"]]
+                    entry["search_query"] = result["question"]
+                answer_cache.put(cache_key, entry, version)
+            
+            if return_documents:
+                response["documents"] = result["scored_docs"]
+                response["search_query"] = result["question"]
+            
             logger.info(f"RAG query processed successfully")
             return response
             
         except Exception as e:
+            ERRORS.inc(component="rag_chain")
             logger.error(f"RAG processing failed: {e}")
             return {
                 "answer": "처리 중 오류가 발생했습니다.",
@@ -313,5 +431,16 @@ Optimized Query:"""
                 "external_docs": 0,
                 "sources": [],
                 "error": str(e),
+                "request_id": current_request_id(),
                 "timestamp": datetime.now().isoformat()
-            }
\ No newline at end of file
+            }
+    
+    def _cached_documents(self, cached: Dict[str, Any]) -> Optional[List[Tuple[Document, float]]]:
+        """(document, score) pairs of a cached answer, re-read by ID; None if any is gone"""
+        if "retrieved" not in cached:
+            return None
+        ids = [doc_id for doc_id, _ in cached["retrieved"]]
+        documents = {doc.id: doc for doc in self.vector_store.get_by_ids(ids)}
+        if any(doc_id not in documents for doc_id in ids):
+            return None
+        return [(documents[doc_id], score) for doc_id, score in cached["retrieved"]]
@@ -0,0 +1,238 @@
+"""
+Context module for STRIX v2
+Small-to-big context expansion from the stored position of every chunk
+"""
+from typing import List, Dict, Any, Optional, Tuple
+import bisect
+import logging
+import threading
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# Metadata naming the part of a source a chunk's start_index is relative to
+SECTION_FIELDS = ("page", "sheet_name")
+
+
+def section_key(metadata: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """(source, page or sheet) a chunk belongs to; None without a source"""
+    source = metadata.get("source")
+    if source is None:
+        return None
+    for field in SECTION_FIELDS:
+        if metadata.get(field) is not None:
+            return str(source), f"{field}={metadata[field]}"
+    return str(source), ""
+
+
+class _Section:
+    """Chunks of one section, ordered by start_index"""
+
+    __slots__ = ("starts", "texts", "ids", "position")
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.texts: List[str] = []
+        self.ids: List[Optional[str]] = []
+        self.position: Dict[int, int] = {}  # start_index -> list position
+
+    def add(self, start: int, text: str, doc_id: Optional[str]) -> None:
+        if start in self.position:
+            # Re-ingested chunk: keep the latest text
+            index = self.position[start]
+            self.texts[index], self.ids[index] = text, doc_id
+            return
+        if not self.starts or start > self.starts[-1]:
+            # Chunks of a file arrive in order: O(1) append
+            self.position[start] = len(self.starts)
+            self.starts.append(start)
+            self.texts.append(text)
+            self.ids.append(doc_id)
+            return
+        index = bisect.bisect_left(self.starts, start)
+        self.starts.insert(index, start)
+        self.texts.insert(index, text)
+        self.ids.insert(index, doc_id)
+        self._reposition(index)
+
+    def remove(self, start: int) -> None:
+        index = self.position.pop(start)
+        del self.starts[index], self.texts[index], self.ids[index]
+        self._reposition(index)
+
+    def _reposition(self, first: int) -> None:
+        for index in range(first, len(self.starts)):
+            self.position[self.starts[index]] = index
+
+
+class ChunkIndex:
+    """
+    Stored chunks by (source section, start_index)
+
+    The loader records where every chunk starts in its source text
+    (`start_index`, relative to the PDF page or Excel sheet when there is
+    one). Each section keeps its chunks in position order with a dict from
+    start_index to list position, so a retrieved chunk's neighbours are two
+    dictionary lookups away and context can be widened around search hits
+    without another vector query. Chunk texts are the strings the vector
+    store already holds (shared, not copied) for the local backend.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sections: Dict[Tuple[str, str], _Section] = {}
+            self._locations: Dict[str, Tuple[Tuple[str, str], int]] = {}  # id -> (section, start)
+            self.chunks = 0
+
+    def __len__(self) -> int:
+        return self.chunks
+
+    def add(self, documents: List[Document], ids: Optional[List[str]] = None) -> int:
+        """Index chunks that have a source and start_index; returns how many"""
+        added = 0
+        with self._lock:
+            for position, doc in enumerate(documents):
+                key = section_key(doc.metadata)
+                start = doc.metadata.get("start_index")
+                if key is None or start is None:
+                    continue
+                doc_id = ids[position] if ids else doc.id
+                section = self._sections.get(key)
+                if section is None:
+                    section = self._sections[key] = _Section()
+                known = int(start) in section.position
+                section.add(int(start), doc.page_content, doc_id)
+                if doc_id is not None:
+                    self._locations[doc_id] = (key, int(start))
+                if not known:
+                    self.chunks += 1
+                    added += 1
+        return added
+
+    def contains(self, metadata: Dict[str, Any]) -> bool:
+        """Whether the chunk at this metadata's section and start_index is indexed"""
+        key = section_key(metadata)
+        start = metadata.get("start_index")
+        with self._lock:
+            section = self._sections.get(key) if key is not None else None
+            return section is not None and start is not None and int(start) in section.position
+
+    def remove(self, ids: List[str]) -> int:
+        """Drop chunks by document ID; returns how many"""
+        removed = 0
+        with self._lock:
+            for doc_id in ids:
+                location = self._locations.pop(doc_id, None)
+                if location is None:
+                    continue
+                key, start = location
+                section = self._sections.get(key)
+                if section is None or start not in section.position or section.ids[section.position[start]] != doc_id:
+                    continue
+                section.remove(start)
+                if not section.starts:
+                    del self._sections[key]
+                self.chunks -= 1
+                removed += 1
+        return removed
+
+    def expand(
+        self,
+        documents: List[Document],
+        window: Optional[int] = 1,
+        max_chars: int = 3000
+    ) -> List[Document]:
+        """
+        Widen retrieved chunks with their neighbours, in retrieval order
+
+        Each hit takes up to `window` chunks on each side (None = the whole
+        section), nearest first and alternating sides, while the merged
+        text stays within max_chars. Overlapping chunk text (the splitter's
+        chunk_overlap) is written once, and hits whose spans touch in the
+        same section are merged into the first one's place, so the prompt
+        never repeats a passage. Chunks without a known position are kept
+        as they are.
+        """
+        spans: List[Any] = []  # [section key, first, last, hit document] or a document
+        with self._lock:
+            for doc in documents:
+                key = section_key(doc.metadata)
+                section = self._sections.get(key) if key is not None else None
+                start = doc.metadata.get("start_index")
+                index = section.position.get(int(start)) if section is not None and start is not None else None
+                if index is None:
+                    spans.append(doc)
+                    continue
+                first, last = self._grow(section, index, window, max_chars)
+                for span in spans:
+                    if isinstance(span, list) and span[0] == key and first <= span[2] + 1 and last >= span[1] - 1:
+                        span[1], span[2] = min(span[1], first), max(span[2], last)
+                        break
+                else:
+                    spans.append([key, first, last, doc])
+
+            expanded = []
+            for span in spans:
+                if isinstance(span, Document):
+                    expanded.append(span)
+                    continue
+                key, first, last, doc = span
+                section = self._sections[key]
+                metadata = dict(doc.metadata)
+                metadata["start_index"] = section.starts[first]
+                metadata["context_chunks"] = last - first + 1
+                expanded.append(Document(
+                    id=doc.id,
+                    page_content=_merge(section.starts[first:last + 1], section.texts[first:last + 1]),
+                    metadata=metadata
+                ))
+        return expanded
+
+    @staticmethod
+    def _grow(section: _Section, index: int, window: Optional[int], max_chars: int) -> Tuple[int, int]:
+        """Contiguous chunk range around index within window chunks per side and max_chars"""
+        starts, texts = section.starts, section.texts
+        first = last = index
+        end = starts[index] + len(texts[index])
+        budget = max_chars - len(texts[index])
+        left = right = True
+        for _ in range(len(starts) if window is None else window):
+            # New characters only: the overlap with the span is already counted
+            if left and first > 0 and min(len(texts[first - 1]), starts[first] - starts[first - 1]) <= budget:
+                budget -= min(len(texts[first - 1]), starts[first] - starts[first - 1])
+                first -= 1
+            else:
+                left = False
+            if right and last + 1 < len(starts) and max(0, starts[last + 1] + len(texts[last + 1]) - end) <= budget:
+                budget -= max(0, starts[last + 1] + len(texts[last + 1]) - end)
+                last += 1
+                end = max(end, starts[last] + len(texts[last]))
+            else:
+                right = False
+            if not (left or right):
+                break
+        return first, last
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"chunks": self.chunks, "sections": len(self._sections)}
+
+
+def _merge(starts: List[int], texts: List[str]) -> str:
+    """Join consecutive chunks, dropping the text each repeats from the previous one"""
+    merged = [texts[0]]
+    end = starts[0] + len(texts[0])
+    for start, text in zip(starts[1:], texts[1:]):
+        overlap = end - start
+        if overlap >= len(text):
+            continue
+        if overlap > 0:
+            merged.append(text[overlap:])
+        else:
+            merged.append("\n" + text)
+        end = max(end, start + len(text))
+    return "".join(merged)
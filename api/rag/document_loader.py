@@ -6,21 +6,17 @@ from typing import List, Dict, Any, Optional
 from pathlib import Path
 import logging
 from langchain_core.documents import Document
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    Docx2txtLoader,
-    UnstructuredExcelLoader,
-    TextLoader,
-    WebBaseLoader
-)
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from bs4 import BeautifulSoup
-import pandas as pd
 from datetime import datetime
+import time
 from ..config import config
+from .metrics import LOADER_SECONDS, ERRORS
 
 logger = logging.getLogger(__name__)
 
+# File loaders (and pandas) are imported by the _load_* method of their
+# file type, the first time a document of that type is loaded.
+
 class STRIXDocumentLoader:
     """Handles document loading and processing for STRIX RAG system"""
     
@@ -68,6 +64,7 @@ class STRIXDocumentLoader:
             logger.warning(f"Unsupported file type: {ext}")
             return []
         
+        start = time.perf_counter()
         try:
             # Load document based on type
             documents = self.supported_extensions[ext](str(path))
@@ -88,26 +85,31 @@ class STRIXDocumentLoader:
             
             # Split documents into chunks
             chunks = self.text_splitter.split_documents(documents)
+            LOADER_SECONDS.observe(time.perf_counter() - start, file_type=ext[1:])
             
             logger.info(f"Loaded {len(chunks)} chunks from {file_path}")
             return chunks
             
         except Exception as e:
+            ERRORS.inc(component="document_loader")
             logger.error(f"Failed to load document {file_path}: {e}")
             return []
     
     def _load_pdf(self, file_path: str) -> List[Document]:
         """Load PDF document"""
+        from langchain_community.document_loaders import PyPDFLoader
         loader = PyPDFLoader(file_path)
         return loader.load()
     
     def _load_docx(self, file_path: str) -> List[Document]:
         """Load Word document"""
+        from langchain_community.document_loaders import Docx2txtLoader
         loader = Docx2txtLoader(file_path)
         return loader.load()
     
     def _load_excel(self, file_path: str) -> List[Document]:
         """Load Excel document"""
+        import pandas as pd
         try:
             # Read Excel file
             df = pd.read_excel(file_path, sheet_name=None)
@@ -130,11 +132,13 @@ class STRIXDocumentLoader:
         except Exception as e:
             logger.error(f"Failed to load Excel file: {e}")
             # Fallback to unstructured loader
+            from langchain_community.document_loaders import UnstructuredExcelLoader
             loader = UnstructuredExcelLoader(file_path)
             return loader.load()
     
     def _load_text(self, file_path: str) -> List[Document]:
         """Load text file"""
+        from langchain_community.document_loaders import TextLoader
         loader = TextLoader(file_path, encoding='utf-8')
         return loader.load()
     
@@ -150,6 +154,7 @@ class STRIXDocumentLoader:
             List of document chunks
         """
         try:
+            from langchain_community.document_loaders import WebBaseLoader
             loader = WebBaseLoader(url)
             documents = loader.load()
             
@@ -0,0 +1,235 @@
+"""
+Fake providers for STRIX v2
+Deterministic embeddings and chat model for offline load tests and benchmarks
+"""
+from typing import List, Dict, Any, Optional, Tuple
+from functools import lru_cache
+import asyncio
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import deque
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from .ingest import estimate_tokens
+
+_TOKEN_PATTERN = re.compile(r"[0-9A-Za-z]+|[가-힣]+")
+_CONTENT_PATTERN = re.compile(r"[0-9]+|[가-힣]+")
+
+
+class FakeProviderError(RuntimeError):
+    """Error injected by a fake provider"""
+
+
+class FakeRateLimitError(FakeProviderError):
+    """HTTP 429 from a fake provider over its tokens-per-minute limit"""
+
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@lru_cache(maxsize=65536)
+def _hash_feature(feature: str, dimensions: int) -> Tuple[int, float]:
+    """Map a feature to a (bucket, sign) pair"""
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dimensions, 1.0 if (value >> 63) & 1 else -1.0
+
+
+def _features(text: str) -> List[str]:
+    """Words plus character bigrams (Korean words carry attached particles)"""
+    features = []
+    for word in _TOKEN_PATTERN.findall(text.lower()):
+        features.append(word)
+        if len(word) > 1:
+            features.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return features
+
+
+class _FaultInjector:
+    """Shared latency / error behaviour of fake providers"""
+
+    def __init__(self, error_rate: float, seed: int):
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def maybe_fail(self, what: str) -> None:
+        if self.error_rate <= 0:
+            return
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.error_rate:
+            raise FakeProviderError(f"Injected {what} failure")
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Hash-based deterministic embeddings
+
+    Texts sharing words map to nearby vectors, so retrieval over a synthetic
+    corpus behaves like (a crude version of) real semantic search.
+
+    Request latency is latency_ms plus ms_per_1k_tokens per thousand
+    (estimated) input tokens; with tokens_per_minute set, requests over a
+    sliding one-minute token budget fail with FakeRateLimitError (429).
+    """
+
+    def __init__(
+        self,
+        dimensions: int = 1536,
+        latency_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        ms_per_1k_tokens: float = 0.0,
+        tokens_per_minute: int = 0
+    ):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.tokens_per_minute = tokens_per_minute
+        self._faults = _FaultInjector(error_rate, seed)
+        self._usage: deque = deque()  # (time, tokens) of the last minute
+        self._usage_tokens = 0
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in _features(text):
+            index, sign = _hash_feature(feature, self.dimensions)
+            vector[index] += sign
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            # Empty text: fixed unit vector so cosine similarity stays defined
+            vector[0] = 1.0
+        else:
+            vector /= norm
+        return vector.tolist()
+
+    def _take_tokens(self, tokens: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            while self._usage and self._usage[0][0] <= now - 60:
+                self._usage_tokens -= self._usage.popleft()[1]
+            if self._usage_tokens + tokens > self.tokens_per_minute:
+                wait = self._usage[0][0] + 60 - now if self._usage else 60.0
+                raise FakeRateLimitError(
+                    f"Rate limit reached: {self._usage_tokens + tokens} of {self.tokens_per_minute} tokens per minute",
+                    retry_after=max(wait, 0.0)
+                )
+            self._usage.append((now, tokens))
+            self._usage_tokens += tokens
+
+    def _simulate_call(self, texts: List[str]) -> None:
+        if self.tokens_per_minute > 0 or self.ms_per_1k_tokens > 0:
+            tokens = sum(estimate_tokens(text) for text in texts)
+            if self.tokens_per_minute > 0:
+                self._take_tokens(tokens)
+            latency_ms = self.latency_ms + self.ms_per_1k_tokens * tokens / 1000
+        else:
+            latency_ms = self.latency_ms
+        if latency_ms > 0:
+            time.sleep(latency_ms / 1000)
+        self._faults.maybe_fail("embedding")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._simulate_call(texts)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._simulate_call([text])
+        return self._embed(text)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic chat model with a simple latency model
+
+    Latency = latency_ms (time to first token) + output tokens / tokens_per_second.
+    The reply is built from the prompt's content words (Korean text and numbers;
+    the prompt templates are English), seeded by the prompt hash, so the same
+    prompt always gives the same answer and rewritten queries stay on topic.
+    """
+
+    latency_ms: float = 0.0
+    tokens_per_second: float = 0.0
+    response_tokens: int = 200
+    error_rate: float = 0.0
+    seed: int = 0
+
+    _faults: Optional[_FaultInjector] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "strix-fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "latency_ms": self.latency_ms,
+            "tokens_per_second": self.tokens_per_second,
+            "response_tokens": self.response_tokens
+        }
+
+    def _injector(self) -> _FaultInjector:
+        if self._faults is None:
+            self._faults = _FaultInjector(self.error_rate, self.seed)
+        return self._faults
+
+    def _build_result(self, messages: List[BaseMessage]) -> Tuple[ChatResult, float]:
+        """Build the deterministic reply and its simulated latency"""
+        prompt = "\n".join(str(message.content) for message in messages)
+        words = _CONTENT_PATTERN.findall(prompt) or _TOKEN_PATTERN.findall(prompt) or ["STRIX"]
+        digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest()
+        rng = random.Random(int.from_bytes(digest, "little") ^ self.seed)
+        reply = " ".join(rng.choice(words) for _ in range(self.response_tokens))
+
+        input_tokens = max(1, len(prompt) // 4)
+        output_tokens = self.response_tokens
+        message = AIMessage(
+            content=reply,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens
+            }
+        )
+
+        delay = self.latency_ms / 1000
+        if self.tokens_per_second > 0:
+            delay += output_tokens / self.tokens_per_second
+        return ChatResult(generations=[ChatGeneration(message=message)]), delay
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        result, delay = self._build_result(messages)
+        if delay > 0:
+            time.sleep(delay)
+        self._injector().maybe_fail("chat completion")
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        result, delay = self._build_result(messages)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._injector().maybe_fail("chat completion")
+        return result
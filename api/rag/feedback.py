@@ -0,0 +1,362 @@
+"""
+Feedback module for STRIX v2
+Write-batched persistent feedback store (SQLite or append-only log) indexed by question
+"""
+from typing import List, Dict, Any, Optional, Callable
+from datetime import datetime
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from .metrics import FEEDBACK_FLUSH_SECONDS, ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Entries kept in memory while the backend is failing (oldest dropped beyond this)
+MAX_BUFFERED = 100000
+ERROR_BACKOFF_SECONDS = 5.0
+
+
+def question_key(question: Optional[str]) -> str:
+    """Normalized question used to index feedback (case and whitespace insensitive)"""
+    return " ".join((question or "").split()).lower()
+
+
+class FeedbackStore:
+    """
+    Feedback buffered in memory and written in batches by a background thread
+
+    `submit` only appends to the buffer and updates the per-question index,
+    so requests never wait on disk. The writer flushes when `batch_size`
+    entries are pending or every `flush_seconds`, in one transaction (or
+    one append) per batch; on a write error the batch stays buffered and is
+    retried after a backoff. Per-question aggregates (count, ratings,
+    negatives) are kept in memory, loaded from the backend on `start`.
+
+    `on_negative(question)` is called for every rating at or below
+    `negative_rating`, e.g. to drop cached answers to that question.
+    """
+
+    name = "none"
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        flush_seconds: float = 1.0,
+        negative_rating: int = 2,
+        on_negative: Optional[Callable[[str], None]] = None
+    ):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.negative_rating = negative_rating
+        self.on_negative = on_negative
+        self._buffer: List[Dict[str, Any]] = []
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._questions: Dict[str, Dict[str, Any]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.written = 0
+        self.flushes = 0
+        self.errors = 0
+
+    def start(self) -> "FeedbackStore":
+        """Load the question index and start the writer thread"""
+        for entry in self._load():
+            self._index(entry)
+        self._thread = threading.Thread(target=self._run, name=f"strix-feedback-{self.name}", daemon=True)
+        self._thread.start()
+        # Write what is still buffered when the process exits
+        atexit.register(self.close)
+        logger.info(f"Feedback store started ({self.name}, {len(self._questions)} questions)")
+        return self
+
+    def submit(
+        self,
+        feedback: str,
+        question: Optional[str] = None,
+        answer: Optional[str] = None,
+        rating: Optional[int] = None,
+        request_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Buffer one feedback entry (returns it with its ID)"""
+        now = datetime.now()
+        entry = {
+            "feedback_id": f"FB_{now.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}",
+            "timestamp": now.isoformat(),
+            "question": question,
+            "question_key": question_key(question),
+            "answer": answer,
+            "rating": rating,
+            "feedback": feedback,
+            "request_id": request_id
+        }
+        with self._condition:
+            self._buffer.append(entry)
+            self._index(entry)
+            if len(self._buffer) >= self.batch_size:
+                self._condition.notify()
+        if self.is_negative(rating) and question and self.on_negative is not None:
+            try:
+                self.on_negative(question)
+            except Exception as e:
+                ERRORS.inc(component="feedback")
+                logger.error(f"Negative feedback hook failed: {e}")
+        return entry
+
+    def is_negative(self, rating: Optional[int]) -> bool:
+        return rating is not None and rating <= self.negative_rating
+
+    def _index(self, entry: Dict[str, Any]) -> None:
+        key = entry["question_key"]
+        if not key:
+            return
+        stats = self._questions.get(key)
+        if stats is None:
+            stats = self._questions[key] = {
+                "question": entry["question"], "count": 0, "rated": 0, "rating_sum": 0, "negative": 0, "last_at": ""
+            }
+        stats["count"] += 1
+        if entry["rating"] is not None:
+            stats["rated"] += 1
+            stats["rating_sum"] += entry["rating"]
+            stats["negative"] += self.is_negative(entry["rating"])
+        stats["last_at"] = max(stats["last_at"], entry["timestamp"])
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed or len(self._buffer) >= self.batch_size,
+                                         timeout=self.flush_seconds)
+                closed = self._closed
+            if not self.flush() and not closed:
+                time.sleep(ERROR_BACKOFF_SECONDS)
+            if closed:
+                return
+
+    def flush(self) -> bool:
+        """Write every buffered entry now; False if the backend failed (entries kept)"""
+        with self._write_lock:
+            with self._condition:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return True
+            start = time.perf_counter()
+            try:
+                self._write(batch)
+            except Exception as e:
+                self.errors += 1
+                ERRORS.inc(component="feedback")
+                logger.error(f"Feedback flush of {len(batch)} entries failed ({self.name}): {e}")
+                with self._condition:
+                    self._buffer = (batch + self._buffer)[-MAX_BUFFERED:]
+                return False
+            FEEDBACK_FLUSH_SECONDS.observe(time.perf_counter() - start, backend=self.name)
+            self.written += len(batch)
+            self.flushes += 1
+            return True
+
+    def by_question(self, question: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent feedback on a question (newest first)"""
+        key = question_key(question)
+        # Under the write lock every entry is either buffered or stored, never both
+        with self._write_lock:
+            with self._condition:
+                pending = [entry for entry in self._buffer if entry["question_key"] == key]
+            stored = self._read(key, limit)
+        entries = sorted(pending + stored, key=lambda entry: entry["timestamp"], reverse=True)
+        return entries[:limit]
+
+    def questions(self, limit: int = 20, min_count: int = 1, exclude_negative: bool = False) -> List[Dict[str, Any]]:
+        """Per-question aggregates, most frequent first"""
+        with self._condition:
+            rows = [dict(stats) for stats in self._questions.values() if stats["count"] >= min_count]
+        if exclude_negative:
+            # Mostly negatively rated questions are not worth pre-warming
+            rows = [row for row in rows if row["negative"] * 2 <= row["rated"]]
+        rows.sort(key=lambda row: (row["count"], row["last_at"]), reverse=True)
+        return [_aggregate(row) for row in rows[:limit]]
+
+    def summary(self, question: str) -> Optional[Dict[str, Any]]:
+        """Aggregate of one question (None without feedback)"""
+        with self._condition:
+            stats = self._questions.get(question_key(question))
+            return _aggregate(dict(stats)) if stats is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            pending = len(self._buffer)
+            questions = len(self._questions)
+        return {
+            "backend": self.name,
+            "pending": pending,
+            "written": self.written,
+            "flushes": self.flushes,
+            "errors": self.errors,
+            "questions": questions
+        }
+
+    def close(self) -> None:
+        """Stop the writer after a final flush"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+
+    def _load(self) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def _read(self, key: str, limit: int) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+def _aggregate(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Public form of a question's stats (average instead of sum)"""
+    rated = stats.pop("rated")
+    rating_sum = stats.pop("rating_sum")
+    stats["average_rating"] = round(rating_sum / rated, 2) if rated else None
+    return stats
+
+
+_COLUMNS = ("feedback_id", "timestamp", "question", "question_key", "answer", "rating", "feedback", "request_id")
+
+
+class SQLiteFeedbackStore(FeedbackStore):
+    """Feedback in a SQLite table indexed by normalized question (WAL mode, one connection per thread)"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, **options):
+        super().__init__(**options)
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS feedback (feedback_id TEXT PRIMARY KEY, timestamp TEXT NOT NULL, "
+            "question TEXT, question_key TEXT NOT NULL, answer TEXT, rating INTEGER, feedback TEXT, request_id TEXT)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS feedback_question ON feedback (question_key, timestamp)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT question, question_key, rating, timestamp FROM feedback WHERE question_key != '' ORDER BY timestamp"
+        )
+        return [dict(row) for row in rows]
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO feedback ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                [tuple(entry[column] for column in _COLUMNS) for entry in batch]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _read(self, key: str, limit: int) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT * FROM feedback WHERE question_key = ? ORDER BY timestamp DESC LIMIT ?", (key, limit)
+        )
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        super().close()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class LogFeedbackStore(FeedbackStore):
+    """
+    Feedback appended to a JSON-lines log
+
+    Each batch is one append. The byte offsets of every question's entries
+    are indexed in memory (rebuilt by scanning the log on start), so
+    reading a question's feedback seeks straight to its lines.
+    """
+
+    name = "log"
+
+    def __init__(self, path: str, **options):
+        super().__init__(**options)
+        self.path = path
+        self._offsets: Dict[str, List[int]] = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _load(self) -> List[Dict[str, Any]]:
+        entries = []
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, "rb") as file:
+            offset = 0
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping unreadable feedback log line at byte {offset}")
+                else:
+                    self._offsets.setdefault(entry["question_key"], []).append(offset)
+                    entries.append(entry)
+                offset += len(line)
+        if offset < os.path.getsize(self.path):
+            # A torn final line from a crash mid-append; drop it so the next append starts clean
+            logger.warning(f"Truncating torn feedback log tail at byte {offset}")
+            os.truncate(self.path, offset)
+        return entries
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        lines = [(json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8") for entry in batch]
+        with open(self.path, "ab") as file:
+            offset = file.tell()
+            file.write(b"".join(lines))
+            file.flush()
+            os.fsync(file.fileno())
+        for entry, line in zip(batch, lines):
+            self._offsets.setdefault(entry["question_key"], []).append(offset)
+            offset += len(line)
+
+    def _read(self, key: str, limit: int) -> List[Dict[str, Any]]:
+        offsets = self._offsets.get(key, [])[-limit:]
+        if not offsets:
+            return []
+        entries = []
+        with open(self.path, "rb") as file:
+            for offset in reversed(offsets):
+                file.seek(offset)
+                entries.append(json.loads(file.readline()))
+        return entries
+
+
+def create_feedback_store(backend: str, path: str, **options) -> FeedbackStore:
+    """Feedback store for a FEEDBACK_BACKEND setting (started)"""
+    if backend == "sqlite":
+        return SQLiteFeedbackStore(path, **options).start()
+    if backend == "log":
+        return LogFeedbackStore(path, **options).start()
+    raise ValueError(f"Unsupported feedback backend: {backend}")
@@ -0,0 +1,289 @@
+"""
+Ingest module for STRIX v2
+Pipelined bulk ingestion: token-sized batches, concurrent embedding, overlapped writes
+"""
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from collections import deque
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from .metrics import INGEST_SECONDS, ERRORS
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Embedding APIs reject larger requests (OpenAI: 2048 inputs per request)
+MAX_BATCH_TEXTS = 2048
+# Pending (embedded, not yet stored) batches per allowed embedding request
+WRITE_QUEUE_FACTOR = 2
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate BPE token count without a tokenizer
+
+    About 4 characters per token for ASCII text and one token per other
+    character (Hangul syllables mostly encode to one or more tokens), which
+    errs on the high side for Korean, so batches stay under request limits.
+    """
+    ascii_chars = sum(1 for char in text if char < "\x80")
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def is_rate_limit(error: Exception) -> bool:
+    """Whether a provider error is an HTTP 429 / rate-limit response"""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ == "RateLimitError" or "rate limit" in str(error).lower()
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds a rate-limit response asks to wait (Retry-After header), if any"""
+    if getattr(error, "retry_after", None) is not None:
+        return float(error.retry_after)
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveBatchSizer:
+    """
+    Additive-increase / multiplicative-decrease control of batch tokens and concurrency
+
+    A request faster than target_seconds grows the token budget by 25%, a
+    slower one shrinks it by 20%. A rate-limit response halves both the
+    budget and the number of concurrent requests; every `recovery`
+    successes in a row give one request slot back. The pipeline therefore
+    settles just below the provider's token and request limits instead of
+    hammering them or idling.
+    """
+
+    def __init__(
+        self,
+        batch_tokens: int = 8000,
+        min_tokens: int = 500,
+        max_tokens: int = 100000,
+        max_concurrency: int = 4,
+        target_seconds: float = 2.0,
+        recovery: int = 4
+    ):
+        self.min_tokens = min_tokens
+        self.max_tokens = max(min_tokens, max_tokens)
+        self.batch_tokens = min(self.max_tokens, max(min_tokens, batch_tokens))
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency = self.max_concurrency
+        self.target_seconds = target_seconds
+        self.recovery = recovery
+        self._successes = 0
+        self._lock = threading.Lock()
+        self.rate_limits = 0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            if seconds < self.target_seconds * 0.5:
+                self.batch_tokens = min(self.max_tokens, int(self.batch_tokens * 1.25))
+            elif seconds > self.target_seconds:
+                self.batch_tokens = max(self.min_tokens, int(self.batch_tokens * 0.8))
+            self._successes += 1
+            if self._successes >= self.recovery and self.concurrency < self.max_concurrency:
+                self.concurrency += 1
+                self._successes = 0
+
+    def rate_limited(self) -> None:
+        with self._lock:
+            self.rate_limits += 1
+            self.batch_tokens = max(self.min_tokens, self.batch_tokens // 2)
+            self.concurrency = max(1, self.concurrency // 2)
+            self._successes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"batch_tokens": self.batch_tokens, "concurrency": self.concurrency, "rate_limits": self.rate_limits}
+
+
+class IngestPipeline:
+    """
+    Embeds and stores a large document list in overlapping stages
+
+    Chunks are grouped into batches of about `sizer.batch_tokens`
+    estimated tokens (read when each batch is formed, so the size follows
+    the sizer). Up to `sizer.concurrency` embedding requests run at once,
+    and a single writer thread stores each embedded batch (in completion
+    order) while later batches are still being embedded. Rate-limited
+    batches are retried after the Retry-After delay (or an exponential
+    backoff), other failures up to `max_retries` times.
+
+    IDs are assigned up front, so the result is in input order whatever the
+    order batches finish in. A failure stops the pipeline; batches already
+    stored stay stored.
+
+    Concurrent `run` calls (e.g. several uploads) share one embedding
+    thread pool and one count of requests in flight, so together they stay
+    within `sizer.concurrency`.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        write: Callable[[List[List[float]], List[Document], List[str]], Any],
+        sizer: Optional[AdaptiveBatchSizer] = None,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0
+    ):
+        self.embeddings = embeddings
+        self.write = write
+        self.sizer = sizer or AdaptiveBatchSizer()
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._embedders = ThreadPoolExecutor(max_workers=self.sizer.max_concurrency, thread_name_prefix="strix-embed")
+        self._slots = threading.Condition()
+        self._in_flight = 0  # embedding requests of all runs
+
+    def _take_slot(self) -> bool:
+        """Reserve one of the sizer's concurrent request slots; False if all are in use"""
+        with self._slots:
+            if self._in_flight >= self.sizer.concurrency:
+                return False
+            self._in_flight += 1
+            return True
+
+    def _release_slot(self, _future: Optional[Future] = None) -> None:
+        with self._slots:
+            self._in_flight -= 1
+            self._slots.notify_all()
+
+    def _batches(self, documents: List[Document], tokens: List[int]) -> Iterator[List[int]]:
+        batch: List[int] = []
+        batch_tokens = 0
+        for index, count in enumerate(tokens):
+            if batch and (batch_tokens + count > self.sizer.batch_tokens or len(batch) >= MAX_BATCH_TEXTS):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(index)
+            batch_tokens += count
+        if batch:
+            yield batch
+
+    def _embed(self, texts: List[str]) -> Tuple[List[List[float]], float]:
+        start = time.perf_counter()
+        vectors = self.embeddings.embed_documents(texts)
+        return vectors, time.perf_counter() - start
+
+    def run(self, documents: List[Document], ids: Optional[List[str]] = None) -> List[str]:
+        """Embed and store documents; returns their IDs in input order"""
+        if not documents:
+            return []
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in documents]
+        texts = [doc.page_content for doc in documents]
+        tokens = [estimate_tokens(text) for text in texts]
+        start = time.perf_counter()
+        stats = {"batches": 0, "retries": 0}
+
+        with tracer.span("ingest.run", documents=len(documents), tokens=sum(tokens)) as span, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix="strix-write") as writer:
+            pending = self._batches(documents, tokens)
+            exhausted = False
+            retry: deque = deque()  # (batch, attempt, not before)
+            embedding: Dict[Future, Tuple[List[int], int]] = {}
+            writes: deque = deque()
+            write_slots = WRITE_QUEUE_FACTOR * self.sizer.max_concurrency
+            paused_until = 0.0  # no new requests before this after a rate limit
+            try:
+                while True:
+                    while writes and writes[0].done():
+                        writes.popleft().result()
+                    now = time.monotonic()
+                    # Fill the free embedding slots (due retries first) while the writer keeps up
+                    slots_full = False
+                    while now >= paused_until and len(writes) < write_slots:
+                        due = bool(retry) and retry[0][2] <= now
+                        if not due and exhausted:
+                            break
+                        if not self._take_slot():
+                            slots_full = True
+                            break
+                        if due:
+                            batch, attempt, _ = retry.popleft()
+                        else:
+                            batch = next(pending, None)
+                            if batch is None:
+                                exhausted = True
+                                self._release_slot()
+                                break
+                            attempt = 0
+                        future = self._embedders.submit(
+                            contextvars.copy_context().run, self._embed, [texts[i] for i in batch]
+                        )
+                        future.add_done_callback(self._release_slot)
+                        embedding[future] = (batch, attempt)
+
+                    if not embedding:
+                        if exhausted and not retry:
+                            break
+                        if len(writes) >= write_slots:
+                            wait([writes[0]])
+                        elif slots_full:
+                            # Other runs hold every slot
+                            with self._slots:
+                                self._slots.wait(0.5)
+                        else:
+                            wake = paused_until if now < paused_until else (retry[0][2] if retry else now)
+                            time.sleep(max(0.0, wake - time.monotonic()))
+                        continue
+
+                    done, _ = wait(list(embedding), timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        batch, attempt = embedding.pop(future)
+                        try:
+                            vectors, seconds = future.result()
+                        except Exception as e:
+                            if is_rate_limit(e):
+                                # Rate limits are expected under full load: allow more attempts
+                                if attempt >= self.max_retries * 4:
+                                    raise
+                                self.sizer.rate_limited()
+                                delay = retry_after(e) or self.backoff_seconds * 2 ** min(attempt, 5)
+                                paused_until = max(paused_until, time.monotonic() + delay)
+                            else:
+                                if attempt >= self.max_retries:
+                                    raise
+                                delay = self.backoff_seconds * 2 ** attempt
+                            stats["retries"] += 1
+                            logger.warning(f"Embedding batch of {len(batch)} failed ({e}), retrying in {delay:.1f}s")
+                            retry.append((batch, attempt + 1, time.monotonic() + delay))
+                            continue
+                        self.sizer.observe(seconds)
+                        INGEST_SECONDS.observe(seconds, stage="embed")
+                        stats["batches"] += 1
+                        writes.append(writer.submit(
+                            contextvars.copy_context().run, self._write,
+                            vectors, [documents[i] for i in batch], [ids[i] for i in batch]
+                        ))
+                for future in writes:
+                    future.result()
+            except Exception as e:
+                ERRORS.inc(component="ingest")
+                logger.error(f"Ingest failed after {stats['batches']} batches: {e}")
+                for future in list(embedding) + list(writes):
+                    future.cancel()
+                raise
+            seconds = time.perf_counter() - start
+            span.set_attribute("batches", stats["batches"])
+
+        INGEST_SECONDS.observe(seconds, stage="total")
+        logger.info(
+            f"Ingested {len(documents)} chunks ({sum(tokens)} est. tokens) in {stats['batches']} batches, "
+            f"{seconds:.2f}s, {stats['retries']} retries, {self.sizer.stats()}"
+        )
+        return ids
+
+    def _write(self, vectors: List[List[float]], documents: List[Document], ids: List[str]) -> None:
+        start = time.perf_counter()
+        self.write(vectors, documents, ids)
+        INGEST_SECONDS.observe(time.perf_counter() - start, stage="write")
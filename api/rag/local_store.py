@@ -0,0 +1,837 @@
+"""
+Local Vector Store module for STRIX v2
+In-process NumPy vector index used for offline runs, load tests and benchmarks
+"""
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterator
+from datetime import date
+import logging
+import os
+import tempfile
+import threading
+import uuid
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from .metadata_index import MetadataIndex, MISSING_DATE
+from .recency import RecencyScorer, metadata_ordinals
+from .quantization import VectorCodec, create_codec
+from .projection import ProjectedCodec, create_projection
+from .snapshot import (
+    Snapshot, SegmentedMatrix, SegmentedList, WriteAheadLog, current_snapshot, write_snapshot,
+    directory_lock, encode_vectors, decode_vectors, document_record
+)
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+# Below this fraction of matching rows, gather the subset instead of scoring everything
+SUBSET_SCORING_RATIO = 0.5
+# Vectors sampled to fit a quantization codec
+TRAIN_SAMPLE_SIZE = 8192
+# Rows copied per block when moving vectors (bounds memory for on-disk matrices)
+COPY_BLOCK_ROWS = 65536
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.size:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.size)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class LocalVectorStore:
+    """
+    Brute-force cosine similarity index held in memory
+
+    Vectors are L2-normalized on insert and kept in one contiguous float32
+    matrix, so a query is a single matrix-vector product. Metadata filters
+    are resolved by a MetadataIndex first and only matching rows are scored.
+    Deletions are tombstoned and reclaimed by `compact()`.
+
+    With a compressed vector storage ('int8' or 'pq') only the codes are held
+    in memory. The full-precision matrix lives in a memory-mapped file; the
+    codes are scanned first and the best k * rescore_multiplier candidates
+    are re-scored exactly from disk. Until enough vectors exist to fit the
+    codec, queries are scored exactly.
+
+    A vector projection ('truncate' or 'pca') works the same way: the scan
+    runs over projected (optionally also quantized) vectors, and the best
+    candidates are re-scored at full dimension unless projection_rescore is
+    off, in which case the projected scores are returned as they are.
+
+    A store opened on a directory (`LocalVectorStore.open`) memory-maps the
+    latest on-disk snapshot as a read-only base segment, logs every write to
+    a write-ahead log before applying it to a private in-memory tail, and
+    folds the log into a new snapshot once it grows past
+    WAL_CHECKPOINT_BYTES (see snapshot.py).
+    """
+
+    # Stores are shared per collection within a process, like a database table
+    _collections: Dict[str, "LocalVectorStore"] = {}
+    _collections_lock = threading.Lock()
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        initial_capacity: int = 1024,
+        keyword_fields: Optional[List[str]] = None,
+        date_fields: Optional[List[str]] = None,
+        vector_storage: Optional[str] = None,
+        rescore_multiplier: Optional[int] = None,
+        pq_subvector_dimensions: Optional[int] = None,
+        projection: Optional[str] = None,
+        projection_dimensions: Optional[int] = None,
+        projection_rescore: Optional[bool] = None
+    ):
+        self.embedding = embedding
+        self._lock = threading.RLock()
+        self._initial_capacity = initial_capacity
+        self._metadata_index = MetadataIndex(
+            keyword_fields if keyword_fields is not None else config.METADATA_INDEX_FIELDS,
+            date_fields if date_fields is not None else config.METADATA_DATE_FIELDS
+        )
+        self.vector_storage = vector_storage or config.VECTOR_STORAGE
+        self.rescore_multiplier = rescore_multiplier or config.RESCORE_MULTIPLIER
+        self._pq_subvector_dimensions = pq_subvector_dimensions or config.PQ_SUBVECTOR_DIMENSIONS
+        self.projection = projection or config.VECTOR_PROJECTION
+        self._projection_dimensions = projection_dimensions or config.PROJECTION_DIMENSIONS
+        self._projection_rescore = (
+            projection_rescore if projection_rescore is not None else config.PROJECTION_RESCORE
+        )
+        # Validate early; the codec itself is created per reset
+        self._new_codec()
+        self._directory: Optional[str] = None
+        self._wal: Optional[WriteAheadLog] = None
+        self._fitting = False
+        self._epoch = 0  # bumped when rows are renumbered or dropped; a codec fit spanning it is discarded
+        self._reset()
+
+    @classmethod
+    def for_collection(cls, name: str, embedding: Embeddings) -> "LocalVectorStore":
+        """Get (or create) the shared store for a collection"""
+        with cls._collections_lock:
+            store = cls._collections.get(name)
+            if store is None:
+                if config.LOCAL_INDEX_PERSIST:
+                    store = cls.open(os.path.join(config.LOCAL_INDEX_DIR, name), embedding)
+                else:
+                    store = cls(embedding)
+                cls._collections[name] = store
+            return store
+
+    @classmethod
+    def open(cls, directory: str, embedding: Embeddings, **options) -> "LocalVectorStore":
+        """Open (or create) a persistent store backed by a snapshot directory"""
+        store = cls(embedding, **options)
+        with store._lock:
+            store._directory = directory
+            store._load_locked()
+            store._wal = WriteAheadLog(directory)
+        return store
+
+    def _reset(self) -> None:
+        self._epoch += 1
+        self._vectors: Optional[np.ndarray] = None
+        self._base_rows = 0
+        self._vector_file = None
+        self._codec: Optional[VectorCodec] = self._new_codec()
+        self._codes: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        self._ids: List[str] = []
+        self._documents: List[Document] = []
+        self._id_to_row: Optional[Dict[str, int]] = {}
+        self._live_count = 0
+        self._metadata_index.clear()
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    def _new_codec(self) -> Optional[VectorCodec]:
+        """Untrained codec for the configured storage and projection (None = exact float32 scan)"""
+        codec = create_codec(self.vector_storage, self._pq_subvector_dimensions)
+        projection = create_projection(self.projection, self._projection_dimensions)
+        if projection is None:
+            return codec
+        return ProjectedCodec(projection, codec, rescore=self._projection_rescore)
+
+    def _row_map(self) -> Dict[str, int]:
+        """ID -> row map, built on first write after opening a snapshot"""
+        if self._id_to_row is None:
+            self._id_to_row = {
+                self._ids[row]: int(row) for row in np.flatnonzero(self._alive[:self._size])
+            }
+        return self._id_to_row
+
+    def _load_locked(self) -> None:
+        """Map the current snapshot as the base segment and replay the write-ahead log"""
+        self._reset()
+        path = current_snapshot(self._directory)
+        if path is not None:
+            snapshot = Snapshot(path)
+            rows = len(snapshot)
+            if rows:
+                empty_tail = np.zeros((0, snapshot.vectors.shape[1]), dtype=np.float32)
+                self._vectors = SegmentedMatrix(snapshot.vectors, empty_tail)
+                self._base_rows = self._size = self._live_count = rows
+                self._alive = np.ones(rows, dtype=bool)
+                self._ids = SegmentedList(snapshot.ids)
+                self._documents = SegmentedList(snapshot.documents)
+                self._id_to_row = None
+                self._metadata_index.load(*snapshot.metadata_index)
+                if (snapshot.codes is not None and self._codec is not None
+                        and self._codec.load_state(snapshot.codec_arrays)):
+                    empty_codes = np.zeros((0, snapshot.codes.shape[1]), dtype=snapshot.codes.dtype)
+                    self._codes = SegmentedMatrix(snapshot.codes, empty_codes)
+                    self._trained_size = rows
+        replayed = 0
+        for record in WriteAheadLog(self._directory).records():
+            self._apply_locked(record)
+            replayed += 1
+        if self._fit_due_locked():
+            # Snapshot without codes (or a log past the re-fit size): fit now, before the store is read
+            self._fit_codec()
+        logger.info(f"Opened local index {self._directory}: {self._base_rows} snapshot rows, {replayed} log records")
+
+    def _apply_locked(self, record: Dict[str, Any]) -> None:
+        """Apply one write-ahead log record"""
+        if record["op"] == "add":
+            documents = [Document(**doc) for doc in record["documents"]]
+            vectors = decode_vectors(record["vectors"], record["dimensions"])
+            self._add_locked(vectors, documents, record["ids"])
+        elif record["op"] == "delete":
+            self._delete_locked(record["ids"])
+        elif record["op"] == "clear":
+            self._reset()
+
+    def _log(self, record: Dict[str, Any]) -> None:
+        """Write-ahead: persist a write before applying it"""
+        if self._wal is not None:
+            self._wal.append(record)
+
+    def _maybe_checkpoint_locked(self) -> None:
+        if self._wal is not None and self._wal.size() > config.WAL_CHECKPOINT_BYTES:
+            self._checkpoint_locked()
+
+    def checkpoint(self) -> None:
+        """Fold the write-ahead log into a new snapshot (persistent stores only)"""
+        with self._lock:
+            if self._directory is not None:
+                self._checkpoint_locked()
+
+    def _checkpoint_locked(self) -> None:
+        with directory_lock(self._directory):
+            # Rebuild from disk, not from this process, so writes logged by other workers survive
+            source = LocalVectorStore(
+                self.embedding,
+                keyword_fields=self._metadata_index.keyword_fields,
+                date_fields=self._metadata_index.date_fields,
+                vector_storage=self.vector_storage,
+                rescore_multiplier=self.rescore_multiplier,
+                pq_subvector_dimensions=self._pq_subvector_dimensions,
+                projection=self.projection,
+                projection_dimensions=self._projection_dimensions,
+                projection_rescore=self._projection_rescore
+            )
+            source._directory = self._directory
+            source._load_locked()
+            source._write_snapshot_locked(self._directory)
+            WriteAheadLog(self._directory).truncate()
+        self._load_locked()
+
+    def save(self, directory: str) -> str:
+        """Write the current contents as a new snapshot of `directory` (e.g. to seed workers)"""
+        with self._lock:
+            with directory_lock(directory):
+                path = self._write_snapshot_locked(directory)
+                WriteAheadLog(directory).truncate()
+            return path
+
+    def _write_snapshot_locked(self, directory: str) -> str:
+        """Write live rows as a new snapshot of `directory`"""
+        rows = np.flatnonzero(self._alive[:self._size])
+        index = MetadataIndex(self._metadata_index.keyword_fields, self._metadata_index.date_fields)
+        for start in range(0, len(rows), COPY_BLOCK_ROWS):
+            block = rows[start:start + COPY_BLOCK_ROWS]
+            index.add(start, [self._documents[row] for row in block])
+
+        codes, codec_arrays = None, None
+        if self._codes is not None and self._codec is not None and self._codec.trained:
+            codes = self._codes[rows]
+            codec_arrays = self._codec.state()
+        vectors = self._vectors if self._vectors is not None else np.zeros((0, 0), dtype=np.float32)
+        return write_snapshot(
+            directory,
+            vectors,
+            rows,
+            [self._ids[row] for row in rows],
+            (self._documents[row] for row in rows),
+            index.export(),
+            codes=codes,
+            codec_arrays=codec_arrays,
+            block_rows=COPY_BLOCK_ROWS
+        )
+
+    @property
+    def dimensions(self) -> Optional[int]:
+        return None if self._vectors is None else self._vectors.shape[1]
+    
+    def memory_bytes(self) -> int:
+        """Bytes held in memory by vectors (or their codes) and the tombstone mask"""
+        if self._vectors is None:
+            return 0
+        held = self._alive.nbytes
+        if self._codec is None:
+            held += self._vectors.nbytes
+        if self._codes is not None:
+            held += self._codes.nbytes
+        return held
+
+    def disk_bytes(self) -> int:
+        """Bytes of memory-mapped vectors (snapshot base and, for compressed storage, the tail file)"""
+        if self._vectors is None:
+            return 0
+        total = 0
+        if isinstance(self._vectors, SegmentedMatrix):
+            total += self._vectors.base.nbytes
+        if self._codec is not None:
+            total += self._vectors.nbytes
+        return total
+
+    def _grow_rows(self, array: np.ndarray, capacity: int) -> np.ndarray:
+        """Re-allocate the private (non-snapshot) rows of an array to `capacity` total rows"""
+        if isinstance(array, SegmentedMatrix):
+            base, tail = array.base, array.tail
+        else:
+            base, tail = None, array
+        grown = np.zeros((capacity - self._base_rows,) + tail.shape[1:], dtype=tail.dtype)
+        used = self._size - self._base_rows
+        grown[:used] = tail[:used]
+        return grown if base is None else SegmentedMatrix(base, grown)
+
+    def _allocate_vectors(self, capacity: int, dimensions: int) -> np.ndarray:
+        """Full-precision matrix: in memory, or a growable memory-mapped file for compressed storage"""
+        if self._codec is None:
+            if self._vectors is None:
+                return np.zeros((capacity, dimensions), dtype=np.float32)
+            return self._grow_rows(self._vectors, capacity)
+        if self._vector_file is None:
+            os.makedirs(config.LOCAL_INDEX_DIR, exist_ok=True)
+            self._vector_file = tempfile.NamedTemporaryFile(
+                prefix="vectors-", suffix=".f32", dir=config.LOCAL_INDEX_DIR
+            )
+        else:
+            self._vectors.flush()
+        # Extending the file keeps existing pages (and older read views) valid
+        tail_rows = capacity - self._base_rows
+        self._vector_file.truncate(tail_rows * dimensions * 4)
+        tail = np.memmap(self._vector_file, dtype=np.float32, mode="r+", shape=(tail_rows, dimensions))
+        if isinstance(self._vectors, SegmentedMatrix):
+            return SegmentedMatrix(self._vectors.base, tail)
+        return tail
+
+    def _ensure_capacity(self, extra: int, dimensions: int) -> None:
+        """Grow the private rows of the vector matrix (and codes) geometrically"""
+        needed = self._size + extra
+        if self._vectors is None:
+            capacity = max(self._initial_capacity, needed)
+            self._vectors = self._allocate_vectors(capacity, dimensions)
+            self._alive = np.zeros(capacity, dtype=bool)
+            return
+        if self._vectors.shape[1] != dimensions:
+            raise ValueError(
+                f"Embedding dimension mismatch: index has {self._vectors.shape[1]}, got {dimensions}"
+            )
+        if needed <= self._vectors.shape[0]:
+            return
+        # Growth is relative to the private tail; snapshot rows are never copied
+        tail_capacity = max(self._vectors.shape[0] - self._base_rows, self._initial_capacity, 1)
+        while self._base_rows + tail_capacity < needed:
+            tail_capacity *= 2
+        capacity = self._base_rows + tail_capacity
+        self._vectors = self._allocate_vectors(capacity, dimensions)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._alive = alive
+        if self._codes is not None:
+            self._codes = self._grow_rows(self._codes, capacity)
+
+    def _fit_due_locked(self) -> bool:
+        """Whether to fit the codec: first fit, or re-fit while the corpus outgrows the training sample"""
+        if self._codec is None or self._fitting:
+            return False
+        if not self._codec.trained:
+            return self._live_count >= self._codec.min_train_size
+        return self._trained_size < TRAIN_SAMPLE_SIZE and self._size >= 2 * self._trained_size
+
+    def _fit_codec(self, force: bool = False) -> None:
+        """
+        Fit a fresh codec on a sample of live rows, encode every row and swap it in
+
+        The lock is held only to copy the sample and, at the end, to encode
+        the rows added during the fit and swap codec and codes together.
+        Fitting and encoding the existing rows (immutable until a reset or
+        compaction, which discards the fit) run outside it, so searches and
+        writes continue on the previous codec (or the exact scan).
+        """
+        with self._lock:
+            if self._codec is None or self._fitting or self._live_count < self._codec.min_train_size:
+                return
+            if not force and not self._fit_due_locked():
+                return
+            self._fitting = True
+            epoch = self._epoch
+            size = self._size
+            vectors = self._vectors
+            rows = np.flatnonzero(self._alive[:size])
+            if rows.size > TRAIN_SAMPLE_SIZE:
+                rows = np.sort(np.random.default_rng(0).choice(rows, TRAIN_SAMPLE_SIZE, replace=False))
+            sample = np.array(vectors[rows], dtype=np.float32)
+        try:
+            codec = self._new_codec()
+            codec.fit(sample)
+            codes = np.zeros((vectors.shape[0], codec.code_size(vectors.shape[1])), dtype=codec.code_dtype)
+            for start in range(0, size, COPY_BLOCK_ROWS):
+                end = min(start + COPY_BLOCK_ROWS, size)
+                codes[start:end] = codec.encode(np.asarray(vectors[start:end]))
+            with self._lock:
+                if epoch != self._epoch:
+                    logger.info(f"Discarded {codec.name} codec fit: the index was rewritten meanwhile")
+                    return
+                if self._vectors.shape[0] > codes.shape[0]:
+                    grown = np.zeros((self._vectors.shape[0], codes.shape[1]), dtype=codes.dtype)
+                    grown[:size] = codes[:size]
+                    codes = grown
+                if self._size > size:
+                    codes[size:self._size] = codec.encode(np.asarray(self._vectors[size:self._size]))
+                # Swap both at once so readers never pair codes with the wrong codec
+                self._codec, self._codes = codec, codes
+                self._trained_size = size
+                added = self._size - size
+        finally:
+            with self._lock:
+                self._fitting = False
+        logger.info(f"Fitted {codec.name} codec on {rows.size} vectors ({size} rows encoded, {added} added meanwhile)")
+
+    def _update_codes_locked(self, start: int, end: int) -> None:
+        """Encode new rows with the current codec (scanned exactly until it is first fitted)"""
+        if self._codec is not None and self._codec.trained:
+            self._codes[start:end] = self._codec.encode(np.asarray(self._vectors[start:end]))
+
+    def retrain(self) -> None:
+        """Re-fit the quantization codec / projection on the current corpus"""
+        self._fit_codec(force=True)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None) -> List[str]:
+        """Embed and add documents"""
+        if not documents:
+            return []
+        vectors = self.embedding.embed_documents([doc.page_content for doc in documents])
+        return self.add_vectors(np.asarray(vectors, dtype=np.float32), documents, ids)
+
+    def add_vectors(
+        self,
+        vectors: np.ndarray,
+        documents: List[Document],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add pre-computed embeddings (replaces documents with existing IDs)"""
+        if len(vectors) != len(documents):
+            raise ValueError("vectors and documents must have the same length")
+        if not documents:
+            return []
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in documents]
+        vectors = self._normalize(np.asarray(vectors, dtype=np.float32))
+
+        with self._lock:
+            self._log({
+                "op": "add",
+                "ids": ids,
+                "dimensions": vectors.shape[1],
+                "vectors": encode_vectors(vectors),
+                "documents": [document_record(doc) for doc in documents]
+            })
+            self._add_locked(vectors, documents, ids)
+            self._maybe_checkpoint_locked()
+            fit = self._fit_due_locked()
+        if fit:
+            self._fit_codec()
+        return ids
+
+    def _add_locked(self, vectors: np.ndarray, documents: List[Document], ids: List[str]) -> None:
+        row_map = self._row_map()
+        self._delete_locked([doc_id for doc_id in ids if doc_id in row_map])
+        self._ensure_capacity(len(documents), vectors.shape[1])
+        start = self._size
+        end = start + len(documents)
+        self._vectors[start:end] = vectors
+        self._alive[start:end] = True
+        for offset, doc_id in enumerate(ids):
+            row_map[doc_id] = start + offset
+        self._ids.extend(ids)
+        self._documents.extend(documents)
+        self._metadata_index.add(start, documents)
+        self._size = end
+        self._live_count += len(ids)
+        self._update_codes_locked(start, end)
+
+    def _snapshot(
+        self,
+        filter: Optional[Dict[str, Any]] = None,
+        recency: Optional[RecencyScorer] = None
+    ) -> Tuple[np.ndarray, np.ndarray, List[str], List[Document], Optional[Tuple[VectorCodec, np.ndarray]]]:
+        """
+        Consistent read view: (vectors, candidate mask, ids, documents, (codec, codes) or None)
+
+        Writers never mutate rows below _size in place except tombstones,
+        so the views stay valid after the lock is released.
+        """
+        with self._lock:
+            if self._vectors is None:
+                return np.zeros((0, 0), dtype=np.float32), self._alive[:0], [], [], None
+            size = self._size
+            alive = self._alive[:size]
+            if filter:
+                mask = self._metadata_index.mask(filter, size, self._documents, base=alive)
+            else:
+                mask = alive
+            if recency is not None and recency.cutoff is not None:
+                window = self._recency_window_locked(recency, size)
+                if window is not None:
+                    mask = mask & window
+            quantized = None
+            if self._codec is not None and self._codec.trained:
+                quantized = (self._codec, self._codes[:size])
+            return self._vectors[:size], mask, self._ids, self._documents, quantized
+
+    def _recency_window_locked(self, recency: RecencyScorer, size: int) -> Optional[np.ndarray]:
+        """
+        Rows dated at or after the recency cutoff, from the date-sorted index
+
+        Each field's range is two binary searches; a fallback field only
+        counts for rows the earlier fields leave undated. None if a field is
+        not indexed (the cutoff is then applied per candidate while scoring).
+        """
+        window = np.zeros(size, dtype=bool)
+        undated = np.ones(size, dtype=bool)
+        for field in recency.fields:
+            column = self._metadata_index.date_column(field)
+            if column is None:
+                return None
+            recent = np.zeros(size, dtype=bool)
+            rows = column.rows_in_range(recency.cutoff, date.max.toordinal())
+            recent[rows[rows < size]] = True
+            window |= undated & recent
+            ordinals = column.ordinals[:size]
+            undated[:ordinals.shape[0]] &= ordinals == MISSING_DATE
+        return window
+
+    def _row_ordinals(self, rows: np.ndarray, recency: RecencyScorer, documents: List[Document]) -> np.ndarray:
+        """Day ordinals of rows for recency scoring (first dated field wins)"""
+        result = np.full(rows.shape[0], MISSING_DATE, dtype=np.int32)
+        for field in recency.fields:
+            missing = result == MISSING_DATE
+            if not missing.any():
+                break
+            column = self._metadata_index.date_column(field)
+            if column is None:
+                # Unindexed field: read the candidates' metadata
+                pending = rows[missing]
+                result[missing] = metadata_ordinals([documents[row].metadata for row in pending], (field,))
+                continue
+            ordinals = column.ordinals
+            values = np.full(rows.shape[0], MISSING_DATE, dtype=np.int32)
+            inside = rows < ordinals.shape[0]
+            values[inside] = ordinals[rows[inside]]
+            result[missing] = values[missing]
+        return result
+
+    @staticmethod
+    def _score_rows(matrix: np.ndarray, mask: np.ndarray, score) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores of the rows selected by mask
+
+        Returns:
+            (rows, scores) for the rows selected by mask
+        """
+        rows = np.flatnonzero(mask)
+        if rows.size == 0:
+            return rows, np.empty(0, dtype=np.float32)
+        if rows.size < mask.size * SUBSET_SCORING_RATIO:
+            # Selective filter: gather and score only the matching subset
+            return rows, score(matrix[rows])
+        return rows, score(matrix)[rows]
+
+    def _top_candidates(
+        self,
+        vectors: np.ndarray,
+        mask: np.ndarray,
+        quantized: Optional[Tuple[VectorCodec, np.ndarray]],
+        query: np.ndarray,
+        k: int,
+        rerank: Optional[Callable[[np.ndarray, np.ndarray], np.ndarray]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k rows and exact cosine scores, best first
+
+        rerank(rows, scores) -> scores adjusts candidate scores (e.g. recency)
+        before each top-k selection.
+
+        With codes, the scan uses asymmetric code scores and only the best
+        k * rescore_multiplier rows are read back at full precision (unless
+        the codec is a projection without re-scoring).
+        """
+        if quantized is None:
+            rows, scores = self._score_rows(vectors, mask, lambda matrix: matrix @ query)
+            if rerank is not None:
+                scores = rerank(rows, scores)
+            top = top_k_indices(scores, k)
+            return rows[top], scores[top]
+
+        codec, codes = quantized
+        rows, approximate = self._score_rows(codes, mask, lambda matrix: codec.score(matrix, query))
+        if rerank is not None:
+            approximate = rerank(rows, approximate)
+        if not getattr(codec, "exact_rescore", True):
+            top = top_k_indices(approximate, k)
+            return rows[top], approximate[top]
+        pool = np.sort(rows[top_k_indices(approximate, k * self.rescore_multiplier)])
+        # Sorted rows turn the re-score into mostly sequential page reads
+        exact = np.asarray(vectors[pool]) @ query
+        if rerank is not None:
+            exact = rerank(pool, exact)
+        top = top_k_indices(exact, k)
+        return pool[top], exact[top]
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        recency: Optional[RecencyScorer] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Top-k documents by cosine similarity to a query vector
+
+        Args:
+            score_threshold: Drop results with a lower similarity
+            recency: Rank by similarity blended with document age (scores returned are blended)
+        """
+        vectors, mask, ids, documents, quantized = self._snapshot(filter, recency)
+        if vectors.shape[0] == 0:
+            return []
+
+        query = self._normalize(np.asarray(embedding, dtype=np.float32))
+        if recency is not None:
+            def rerank(rows: np.ndarray, scores: np.ndarray) -> np.ndarray:
+                return recency.blend(scores, self._row_ordinals(rows, recency, documents), score_threshold)
+
+            rows, scores = self._top_candidates(vectors, mask, quantized, query, k, rerank)
+            keep = np.isfinite(scores)
+            rows, scores = rows[keep], scores[keep]
+        else:
+            rows, scores = self._top_candidates(vectors, mask, quantized, query, k)
+        if score_threshold is not None and recency is None:
+            # Best first, so the cut-off is a prefix
+            keep = int(np.count_nonzero(scores >= score_threshold))
+            rows, scores = rows[:keep], scores[:keep]
+
+        return [
+            (self._result_document(ids[row], documents[row]), float(score))
+            for row, score in zip(rows, scores)
+        ]
+
+    def iter_similarity_by_vector_with_score(
+        self,
+        embedding: List[float],
+        filter: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        recency: Optional[RecencyScorer] = None,
+        after: Optional[Tuple[float, str]] = None,
+        batch_size: int = 500
+    ) -> Iterator[List[Tuple[Document, float]]]:
+        """
+        Every matching document, best first, in batches
+
+        Results are ordered by (score desc, ID asc), so the (score, ID) of
+        the last result seen resumes exactly after it (`after`), whatever
+        was added in between. Scores are computed once at full precision;
+        documents are copied batch by batch, so beyond one score and one
+        index per candidate row memory is bounded by batch_size.
+        """
+        vectors, mask, ids, documents, _ = self._snapshot(filter, recency)
+        if vectors.shape[0] == 0:
+            return
+
+        query = self._normalize(np.asarray(embedding, dtype=np.float32))
+        rows, scores = self._score_rows(vectors, mask, lambda matrix: np.asarray(matrix @ query))
+        if recency is not None:
+            scores = recency.blend(scores, self._row_ordinals(rows, recency, documents), score_threshold)
+            keep = np.isfinite(scores)
+        elif score_threshold is not None:
+            keep = scores >= score_threshold
+        else:
+            keep = None
+        if after is not None:
+            after_score, after_id = after
+            resume = scores < after_score
+            # Ties with the last result: only IDs after it
+            for position in np.flatnonzero(scores == after_score):
+                resume[position] = ids[rows[position]] > after_id
+            keep = resume if keep is None else keep & resume
+        if keep is not None:
+            rows, scores = rows[keep], scores[keep]
+
+        order = np.argsort(-scores, kind="stable")
+        ranked = scores[order]
+        start = 0
+        while start < order.shape[0]:
+            end = min(start + batch_size, order.shape[0])
+            # Extend over a run of equal scores, so ties are ordered by ID across batches
+            while end < order.shape[0] and ranked[end] == ranked[end - 1]:
+                end += 1
+            batch = sorted(
+                ((float(ranked[position]), ids[rows[order[position]]], rows[order[position]])
+                 for position in range(start, end)),
+                key=lambda item: (-item[0], item[1])
+            )
+            yield [(self._result_document(doc_id, documents[row]), score) for score, doc_id, row in batch]
+            start = end
+
+    def similarity_search_by_vector_returning_embeddings(
+        self,
+        query: List[float],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float, np.ndarray]]:
+        """Top-k (document, score, stored vector), as SupabaseVectorStore returns for MMR"""
+        vectors, mask, ids, documents, quantized = self._snapshot(filter)
+        if vectors.shape[0] == 0:
+            return []
+
+        query = self._normalize(np.asarray(query, dtype=np.float32))
+        rows, scores = self._top_candidates(vectors, mask, quantized, query, k)
+
+        return [
+            (self._result_document(ids[row], documents[row]), float(score), np.array(vectors[row]))
+            for row, score in zip(rows, scores)
+        ]
+
+    @staticmethod
+    def _result_document(doc_id: str, doc: Document) -> Document:
+        """Copy a stored document so callers cannot mutate the index"""
+        return Document(id=doc_id, page_content=doc.page_content, metadata=dict(doc.metadata))
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        recency: Optional[RecencyScorer] = None
+    ) -> List[Tuple[Document, float]]:
+        """Top-k documents with cosine similarity (or recency-blended) scores"""
+        return self.similarity_search_by_vector_with_score(
+            self.embedding.embed_query(query), k=k, filter=filter,
+            score_threshold=score_threshold, recency=recency
+        )
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """Top-k documents"""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def get_documents(self, filter: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> List[Document]:
+        """Live documents matching a filter, in insertion order (no scoring)"""
+        _, mask, ids, documents, _ = self._snapshot(filter)
+        rows = np.flatnonzero(mask)
+        if limit is not None:
+            rows = rows[:limit]
+        return [self._result_document(ids[row], documents[row]) for row in rows]
+
+    def get_by_ids(self, ids: List[str]) -> List[Document]:
+        """Live documents with the given IDs, in that order (unknown IDs are skipped)"""
+        with self._lock:
+            row_map = self._row_map()
+            rows = [(doc_id, row_map.get(doc_id)) for doc_id in ids]
+            return [self._result_document(doc_id, self._documents[row]) for doc_id, row in rows if row is not None]
+
+    def _delete_locked(self, ids: List[str]) -> int:
+        row_map = self._row_map()
+        deleted = 0
+        for doc_id in ids:
+            row = row_map.pop(doc_id, None)
+            if row is not None:
+                self._alive[row] = False
+                deleted += 1
+        self._live_count -= deleted
+        return deleted
+
+    def delete(self, ids: List[str]) -> int:
+        """Tombstone documents by ID"""
+        with self._lock:
+            self._log({"op": "delete", "ids": list(ids)})
+            deleted = self._delete_locked(ids)
+            if self._size and self._live_count < self._size // 2:
+                self._compact_locked()
+            else:
+                self._maybe_checkpoint_locked()
+            return deleted
+
+    def _compact_locked(self) -> None:
+        """Drop tombstoned rows (new arrays, so existing read views stay valid)"""
+        if self._directory is not None:
+            # Persistent stores compact by writing a snapshot of the live rows
+            self._checkpoint_locked()
+            return
+        rows = np.flatnonzero(self._alive[:self._size])
+        old_vectors, old_codes = self._vectors, self._codes
+        codec, trained_size = self._codec, self._trained_size
+        ids = [self._ids[row] for row in rows]
+        documents = [self._documents[row] for row in rows]
+        dimensions = old_vectors.shape[1]
+        self._reset()
+        self._ensure_capacity(len(rows), dimensions)
+        for start in range(0, len(rows), COPY_BLOCK_ROWS):
+            block = rows[start:start + COPY_BLOCK_ROWS]
+            self._vectors[start:start + len(block)] = old_vectors[block]
+        self._alive[:len(rows)] = True
+        if codec is not None and codec.trained:
+            # Keep the fitted codec; codes move with their rows
+            self._codec, self._trained_size = codec, trained_size
+            self._codes = np.zeros((self._vectors.shape[0], old_codes.shape[1]), dtype=old_codes.dtype)
+            self._codes[:len(rows)] = old_codes[rows]
+        self._ids, self._documents, self._size = ids, documents, len(rows)
+        self._id_to_row = {doc_id: row for row, doc_id in enumerate(ids)}
+        self._live_count = len(rows)
+        self._metadata_index.rebuild(documents)
+
+    def compact(self) -> None:
+        """Reclaim space of deleted documents"""
+        with self._lock:
+            if self._vectors is not None:
+                self._compact_locked()
+
+    def clear(self) -> None:
+        """Remove all documents"""
+        with self._lock:
+            self._log({"op": "clear"})
+            self._reset()
+            if self._directory is not None:
+                self._checkpoint_locked()
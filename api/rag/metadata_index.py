@@ -0,0 +1,323 @@
+"""
+Metadata Index module for STRIX v2
+Posting lists per field value and sorted date arrays for pre-filtering vector search
+
+Filter syntax (all conditions are ANDed):
+    {"doc_type": "internal"}                                  exact match
+    {"organization": ["전략기획팀", "R&D센터"]}                  any of a set
+    {"date": {"gte": "2025-07-01", "lt": "2025-08-01"}}       range (gt/gte/lt/lte)
+"""
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from datetime import date, datetime, timedelta
+import numpy as np
+from langchain_core.documents import Document
+
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+MISSING_DATE = -1
+
+
+def to_ordinal(value: Any) -> int:
+    """Day ordinal of a date / ISO string (MISSING_DATE if unparseable)"""
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str) and len(value) >= 10:
+        try:
+            return date.fromisoformat(value[:10]).toordinal()
+        except ValueError:
+            return MISSING_DATE
+    return MISSING_DATE
+
+
+def _is_range(condition: Any) -> bool:
+    return isinstance(condition, dict) and any(op in condition for op in RANGE_OPERATORS)
+
+
+def _ordinal_bounds(condition: Dict[str, Any]) -> Tuple[int, int]:
+    """Inclusive [low, high] ordinal bounds of a range condition"""
+    low, high = 0, date.max.toordinal()
+    if "gte" in condition:
+        low = max(low, to_ordinal(condition["gte"]))
+    if "gt" in condition:
+        low = max(low, to_ordinal(condition["gt"]) + 1)
+    if "lte" in condition:
+        high = min(high, to_ordinal(condition["lte"]))
+    if "lt" in condition:
+        high = min(high, to_ordinal(condition["lt"]) - 1)
+    return low, high
+
+
+def _matches_condition(value: Any, condition: Any) -> bool:
+    if _is_range(condition):
+        ordinal = to_ordinal(value)
+        if ordinal == MISSING_DATE:
+            return False
+        low, high = _ordinal_bounds(condition)
+        return low <= ordinal <= high
+    if isinstance(condition, (list, tuple, set)):
+        return value in condition
+    return value == condition
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a filter against one document's metadata"""
+    if not filter:
+        return True
+    return all(_matches_condition(metadata.get(key), condition) for key, condition in filter.items())
+
+
+def split_filter(filter: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Split a filter into (exact-match part, set/range part)
+
+    The exact-match part can be pushed down to Supabase (`metadata @> filter`).
+    """
+    exact, rest = {}, {}
+    for key, condition in (filter or {}).items():
+        if _is_range(condition) or isinstance(condition, (list, tuple, set)):
+            rest[key] = condition
+        else:
+            exact[key] = condition
+    return exact, rest
+
+
+def build_metadata_filter(
+    doc_type: Optional[str] = None,
+    organizations: Optional[List[str]] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    days: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """Build a filter from API query parameters"""
+    filter: Dict[str, Any] = {}
+    if doc_type:
+        filter["doc_type"] = doc_type
+    if organizations:
+        filter["organization"] = organizations[0] if len(organizations) == 1 else list(organizations)
+    date_range: Dict[str, str] = {}
+    if days:
+        date_range["gte"] = (date.today() - timedelta(days=days)).isoformat()
+    if date_from:
+        date_range["gte"] = max(date_range.get("gte", date_from), date_from)
+    if date_to:
+        date_range["lte"] = date_to
+    if date_range:
+        filter["date"] = date_range
+    return filter or None
+
+
+class _RowList:
+    """Append-only int32 array with amortized growth"""
+
+    __slots__ = ("_data", "_size")
+
+    def __init__(self):
+        self._data = np.empty(8, dtype=np.int32)
+        self._size = 0
+
+    def append(self, row: int) -> None:
+        if self._size == self._data.shape[0]:
+            self._data = np.resize(self._data, self._size * 2)
+        self._data[self._size] = row
+        self._size += 1
+
+    def view(self) -> np.ndarray:
+        return self._data[:self._size]
+
+    @classmethod
+    def wrap(cls, rows: np.ndarray) -> "_RowList":
+        """Row list over an existing (possibly read-only, memory-mapped) array"""
+        row_list = cls.__new__(cls)
+        row_list._data = rows
+        row_list._size = rows.shape[0]
+        return row_list
+
+
+class _DateColumn:
+    """Per-row ordinals plus a lazily merged (ordinal, row) sort order"""
+
+    def __init__(self):
+        self.ordinals = np.empty(0, dtype=np.int32)
+        self._sorted_ordinals = np.empty(0, dtype=np.int32)
+        self._sorted_rows = np.empty(0, dtype=np.int32)
+        self._pending: List[Tuple[int, int]] = []
+
+    def set(self, row: int, ordinal: int, capacity: int) -> None:
+        if self.ordinals.shape[0] < capacity:
+            grown = np.full(max(capacity, 2 * self.ordinals.shape[0]), MISSING_DATE, dtype=np.int32)
+            grown[:self.ordinals.shape[0]] = self.ordinals
+            self.ordinals = grown
+        self.ordinals[row] = ordinal
+        if ordinal != MISSING_DATE:
+            self._pending.append((ordinal, row))
+
+    def sorted(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(ordinals ascending, rows) including pending appends"""
+        if self._pending:
+            pending = np.asarray(self._pending, dtype=np.int32)
+            ordinals = np.concatenate([self._sorted_ordinals, pending[:, 0]])
+            rows = np.concatenate([self._sorted_rows, pending[:, 1]])
+            order = np.argsort(ordinals, kind="stable")
+            self._sorted_ordinals, self._sorted_rows = ordinals[order], rows[order]
+            self._pending = []
+        return self._sorted_ordinals, self._sorted_rows
+
+    def rows_in_range(self, low: int, high: int) -> np.ndarray:
+        """Rows with low <= ordinal <= high via binary search"""
+        ordinals, rows = self.sorted()
+        start = np.searchsorted(ordinals, low, side="left")
+        end = np.searchsorted(ordinals, high, side="right")
+        return rows[start:end]
+
+
+class MetadataIndex:
+    """
+    Inverted index over document metadata for pre-filtering
+
+    Keyword fields keep one posting list (row IDs) per value; date fields keep
+    a sorted ordinal array so ranges resolve with two binary searches. A filter
+    resolves to a boolean row mask, so vector scoring only touches the matching
+    subset. Conditions on fields that are not indexed are checked per row on
+    the already narrowed candidate set.
+    """
+
+    def __init__(self, keyword_fields: Iterable[str], date_fields: Iterable[str]):
+        self.keyword_fields = tuple(keyword_fields)
+        self.date_fields = tuple(date_fields)
+        self.clear()
+
+    def clear(self) -> None:
+        self._postings: Dict[str, Dict[Any, _RowList]] = {field: {} for field in self.keyword_fields}
+        self._dates: Dict[str, _DateColumn] = {field: _DateColumn() for field in self.date_fields}
+        self._size = 0
+
+    def add(self, start_row: int, documents: List[Document]) -> None:
+        """Index documents stored at rows start_row, start_row + 1, ..."""
+        capacity = start_row + len(documents)
+        for offset, doc in enumerate(documents):
+            row = start_row + offset
+            metadata = doc.metadata
+            for field, by_value in self._postings.items():
+                value = metadata.get(field)
+                if value is None or isinstance(value, (dict, list)):
+                    continue
+                postings = by_value.get(value)
+                if postings is None:
+                    postings = by_value[value] = _RowList()
+                postings.append(row)
+            for field, column in self._dates.items():
+                column.set(row, to_ordinal(metadata.get(field)), capacity)
+        self._size = max(self._size, capacity)
+
+    def rebuild(self, documents: List[Document]) -> None:
+        """Re-index from scratch (after row renumbering)"""
+        self.clear()
+        self.add(0, documents)
+
+    def export(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """Descriptor and arrays for an on-disk snapshot (see MetadataIndex.load)"""
+        directory, chunks, position = [], [], 0
+        for field, postings in self._postings.items():
+            for value, row_list in postings.items():
+                rows = row_list.view()
+                directory.append([field, value, position, position + rows.shape[0]])
+                chunks.append(rows)
+                position += rows.shape[0]
+        arrays = {"postings": np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)}
+        for field, column in self._dates.items():
+            ordinals, rows = column.sorted()
+            arrays[f"{field}.ordinals"] = column.ordinals[:self._size]
+            arrays[f"{field}.sorted_ordinals"] = ordinals
+            arrays[f"{field}.sorted_rows"] = rows
+        descriptor = {
+            "keyword_fields": list(self.keyword_fields),
+            "date_fields": list(self.date_fields),
+            "postings": directory,
+            "size": self._size
+        }
+        return descriptor, arrays
+
+    def load(self, descriptor: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> None:
+        """
+        Adopt exported arrays without copying (they may be memory-mapped)
+
+        Fields configured now but missing from the snapshot are dropped and
+        filtered by per-row checks until the next rebuild.
+        """
+        self.clear()
+        postings = arrays["postings"]
+        for field, value, start, end in descriptor["postings"]:
+            if field in self._postings:
+                self._postings[field][value] = _RowList.wrap(postings[start:end])
+        for field, column in self._dates.items():
+            if f"{field}.ordinals" in arrays:
+                column.ordinals = arrays[f"{field}.ordinals"]
+                column._sorted_ordinals = arrays[f"{field}.sorted_ordinals"]
+                column._sorted_rows = arrays[f"{field}.sorted_rows"]
+        self._size = descriptor["size"]
+        missing = (set(self.keyword_fields) - set(descriptor["keyword_fields"])) | \
+            (set(self.date_fields) - set(descriptor["date_fields"]))
+        for field in missing:
+            self._postings.pop(field, None)
+            self._dates.pop(field, None)
+
+    def values(self, field: str) -> List[Any]:
+        """Distinct indexed values of a keyword field"""
+        return list(self._postings.get(field, {}))
+
+    def date_column(self, field: str) -> Optional[_DateColumn]:
+        """Date column of an indexed date field"""
+        return self._dates.get(field)
+
+    def _keyword_mask(self, field: str, condition: Any, size: int) -> np.ndarray:
+        values = condition if isinstance(condition, (list, tuple, set)) else [condition]
+        mask = np.zeros(size, dtype=bool)
+        for value in values:
+            postings = self._postings[field].get(value)
+            if postings is not None:
+                rows = postings.view()
+                mask[rows[rows < size]] = True
+        return mask
+
+    def _date_mask(self, field: str, condition: Dict[str, Any], size: int) -> np.ndarray:
+        low, high = _ordinal_bounds(condition)
+        mask = np.zeros(size, dtype=bool)
+        if low <= high:
+            rows = self._dates[field].rows_in_range(low, high)
+            mask[rows[rows < size]] = True
+        return mask
+
+    def mask(
+        self,
+        filter: Optional[Dict[str, Any]],
+        size: int,
+        documents: List[Document],
+        base: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Boolean mask of rows [0, size) matching the filter
+
+        Args:
+            filter: Metadata filter
+            size: Number of rows
+            documents: Row-aligned documents (for unindexed conditions)
+            base: Optional mask to intersect with (e.g. live rows)
+        """
+        mask = base.copy() if base is not None else np.ones(size, dtype=bool)
+        residual = {}
+        for field, condition in (filter or {}).items():
+            if _is_range(condition) and field in self._dates:
+                mask &= self._date_mask(field, condition, size)
+            elif not _is_range(condition) and field in self._postings:
+                mask &= self._keyword_mask(field, condition, size)
+            else:
+                residual[field] = condition
+            if not mask.any():
+                return mask
+
+        if residual:
+            for row in np.flatnonzero(mask):
+                if not matches_filter(documents[row].metadata, residual):
+                    mask[row] = False
+        return mask
@@ -0,0 +1,313 @@
+"""
+Metrics module for STRIX v2
+Lightweight in-process counters and histograms exposed in Prometheus text format
+"""
+from typing import Dict, List, Optional, Tuple, Callable, Any
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+import threading
+import time
+
+# Default latency buckets (seconds) - tuned for LLM / vector search latencies
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """Render a Prometheus label set"""
+    pairs = [
+        f'{name}="{_escape(value)}"'
+        for name, value in zip(labelnames, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    """Escape a label value"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class for labelled metrics"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        """Build the series key from keyword labels"""
+        if not self.labelnames:
+            return ()
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        """Render metric in Prometheus text format"""
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}"
+        ] + self._render_samples()
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Increment the counter"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        """Current value of one series"""
+        return self._values.get(self._key(labels), 0.0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation"""
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0.0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Time a block of code"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        """Number of observations of one series"""
+        series = self._series.get(self._key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+
+        lines = []
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together at /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        """Create or fetch a counter"""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Create or fetch a histogram"""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry
+registry = MetricsRegistry()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Stage latencies
+GRAPH_NODE_SECONDS = registry.histogram(
+    "strix_graph_node_seconds",
+    "Latency of each LangGraph node",
+    ("node",)
+)
+EMBEDDING_SECONDS = registry.histogram(
+    "strix_embedding_seconds",
+    "Latency of embedding calls",
+    ("operation",)
+)
+VECTOR_SEARCH_SECONDS = registry.histogram(
+    "strix_vector_search_seconds",
+    "Latency of vector store operations",
+    ("operation",)
+)
+LLM_SECONDS = registry.histogram(
+    "strix_llm_seconds",
+    "Latency of LLM calls",
+    ("purpose",)
+)
+LOADER_SECONDS = registry.histogram(
+    "strix_loader_seconds",
+    "Latency of document loading and splitting",
+    ("file_type",)
+)
+REPORT_SECONDS = registry.histogram(
+    "strix_report_seconds",
+    "Latency of report building by stage (section generation, workbook write)",
+    ("stage",)
+)
+ANALYSIS_SECONDS = registry.histogram(
+    "strix_analysis_seconds",
+    "Latency of map-reduce analysis by stage (map, reduce, total)",
+    ("stage",)
+)
+TREND_SECONDS = registry.histogram(
+    "strix_trend_seconds",
+    "Latency of trend index updates and emerging-issue detection",
+    ("stage",)
+)
+FEEDBACK_FLUSH_SECONDS = registry.histogram(
+    "strix_feedback_flush_seconds",
+    "Latency of feedback batch writes",
+    ("backend",)
+)
+WATCH_LAG_SECONDS = registry.histogram(
+    "strix_watch_lag_seconds",
+    "Time from a watched file's first change event until it is indexed or removed",
+    ("action",)
+)
+INGEST_SECONDS = registry.histogram(
+    "strix_ingest_seconds",
+    "Bulk ingestion stages: embedding requests, store writes and whole runs",
+    ("stage",)
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "strix_http_request_seconds",
+    "Latency of HTTP requests",
+    ("method", "path", "status")
+)
+
+# Counters
+CACHE_REQUESTS = registry.counter(
+    "strix_cache_requests_total",
+    "Cache lookups by cache, result (hit/miss) and layer hit (l1 = worker, l2 = shared)",
+    ("cache", "result", "layer")
+)
+ERRORS = registry.counter(
+    "strix_errors_total",
+    "Errors by component",
+    ("component",)
+)
+LLM_TOKENS = registry.counter(
+    "strix_llm_tokens_total",
+    "LLM tokens used by purpose and kind (input/output)",
+    ("purpose", "kind")
+)
+
+
+def timed(histogram: Histogram, **labels) -> Callable:
+    """Decorator recording the wrapped function's latency"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+
+def record_cache(cache: str, layer: Optional[str]) -> None:
+    """Count a cache lookup by the layer that answered it (None = miss)"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if layer else "miss", layer=layer or "")
+
+
+def record_tokens(purpose: str, response: Any) -> None:
+    """Count tokens from a LangChain chat model response"""
+    usage: Optional[Dict[str, Any]] = getattr(response, "usage_metadata", None)
+    if not usage:
+        return
+    input_tokens = usage.get("input_tokens", 0)
+    output_tokens = usage.get("output_tokens", 0)
+    if input_tokens:
+        LLM_TOKENS.inc(input_tokens, purpose=purpose, kind="input")
+    if output_tokens:
+        LLM_TOKENS.inc(output_tokens, purpose=purpose, kind="output")
@@ -0,0 +1,61 @@
+"""
+MMR module for STRIX v2
+Maximal Marginal Relevance reranking of a retrieved candidate pool
+"""
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def mmr_select(
+    query: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5
+) -> np.ndarray:
+    """
+    Pick k candidates balancing relevance against redundancy
+
+    Each step takes argmax of
+        lambda * sim(query, c) - (1 - lambda) * max(sim(c, s) for s in selected)
+    The candidate-candidate similarity matrix is computed once with a single
+    matrix product; the per-step "max similarity to selected" is kept as a
+    running vector, so each step is O(pool) NumPy work.
+
+    Args:
+        query: Query vector (d,)
+        candidates: Candidate vectors (n, d)
+        k: Number of candidates to select
+        lambda_mult: 1.0 = pure relevance, 0.0 = pure diversity
+
+    Returns:
+        Indices into candidates, in selection order
+    """
+    n = candidates.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    candidates = _normalize(np.asarray(candidates, dtype=np.float32))
+    query = _normalize(np.asarray(query, dtype=np.float32).reshape(-1))
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+
+    selected = np.empty(k, dtype=np.int64)
+    redundancy = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    for step in range(k):
+        if step == 0:
+            scores = relevance.copy()
+        else:
+            scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        chosen = int(np.argmax(scores))
+        selected[step] = chosen
+        available[chosen] = False
+        np.maximum(redundancy, similarity[chosen], out=redundancy)
+    return selected
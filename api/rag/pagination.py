@@ -0,0 +1,187 @@
+"""
+Pagination module for STRIX v2
+Cursor pagination, metadata projection and NDJSON streaming of document search results
+"""
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+import base64
+import binascii
+import hashlib
+import json
+import logging
+from langchain_core.documents import Document
+from .metrics import ERRORS
+from .retrieval_cache import filter_key
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(format: Optional[str], accept: Optional[str]) -> bool:
+    """Whether a request asked for NDJSON (format= wins over the Accept header)"""
+    if format:
+        return format == "ndjson"
+    return NDJSON_MEDIA_TYPE in (accept or "")
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Metadata keys from a comma-separated list (None = all keys, '' = none)"""
+    if fields is None:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+def hit_record(
+    rank: int,
+    doc: Document,
+    score: float,
+    fields: Optional[List[str]] = None,
+    content_chars: int = 500
+) -> Dict[str, Any]:
+    """
+    One search hit
+
+    Only the requested metadata keys are copied; content is cut to
+    content_chars (omitted with 0).
+    """
+    record: Dict[str, Any] = {"rank": rank, "id": doc.id}
+    if content_chars:
+        content = doc.page_content
+        record["content"] = content[:content_chars] + "..." if len(content) > content_chars else content
+    metadata = doc.metadata
+    record["metadata"] = metadata if fields is None else {key: metadata[key] for key in fields if key in metadata}
+    record["relevance_score"] = score
+    return record
+
+
+class SearchPager:
+    """
+    Keyset pagination over a similarity search
+
+    Results are ordered by (score desc, document ID asc). A cursor holds
+    the (score, ID) of the last result returned, its rank and a fingerprint
+    of the search, so the next page starts exactly after it (documents
+    added in between do not shift or repeat results), and a cursor cannot
+    be replayed against a different query or filter.
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        query: str,
+        filter: Optional[Dict[str, Any]] = None,
+        recency_weight: Optional[float] = None,
+        cursor: Optional[str] = None
+    ):
+        self.vector_store = vector_store
+        self.query = query
+        self.filter = filter
+        self.recency_weight = recency_weight
+        digest = hashlib.sha256(f"{query}\n{filter_key(filter)}\n{recency_weight}".encode("utf-8"))
+        self.fingerprint = digest.hexdigest()[:16]
+        self.after: Optional[Tuple[float, str]] = None
+        self.rank = 0
+        if cursor:
+            self.after, self.rank = self._decode(cursor)
+
+    def _decode(self, cursor: str) -> Tuple[Tuple[float, str], int]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            fingerprint, score, doc_id, rank = payload["f"], float(payload["s"]), str(payload["i"]), int(payload["r"])
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise ValueError("Invalid cursor")
+        if fingerprint != self.fingerprint:
+            raise ValueError("Cursor belongs to a different query or filter")
+        return (score, doc_id), rank
+
+    def _encode(self, doc: Document, score: float, rank: int) -> str:
+        payload = json.dumps(
+            {"f": self.fingerprint, "s": score, "i": doc.id or "", "r": rank},
+            separators=(",", ":"), ensure_ascii=False
+        )
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def _batches(self, batch_size: int) -> Iterator[List[Tuple[Document, float]]]:
+        return self.vector_store.iter_search(
+            self.query,
+            filter=self.filter,
+            recency_weight=self.recency_weight,
+            after=self.after,
+            batch_size=batch_size
+        )
+
+    def page(self, limit: int) -> Tuple[List[Tuple[Document, float]], Optional[str]]:
+        """
+        Up to limit results after the cursor, and the cursor of the next page
+
+        The first page is the cached top-k search (one extra result tells
+        whether there is a next page), unless the page ends inside a run of
+        equal scores, whose order by ID top-k does not guarantee; other
+        pages resume from the cursor.
+        """
+        results = None
+        if self.after is None:
+            top = self.vector_store.similarity_search_with_score(
+                self.query, k=limit + 1, filter=self.filter, recency_weight=self.recency_weight
+            )
+            top = sorted(top, key=lambda item: (-item[1], item[0].id or ""))
+            if len(top) <= limit or top[limit - 1][1] != top[limit][1]:
+                results = top
+        if results is None:
+            results = []
+            for batch in self._batches(limit + 1):
+                results.extend(batch)
+                if len(results) > limit:
+                    break
+        if len(results) <= limit:
+            return results, None
+        doc, score = results[limit - 1]
+        return results[:limit], self._encode(doc, score, self.rank + limit)
+
+    def iter_ndjson(
+        self,
+        limit: int,
+        fields: Optional[List[str]] = None,
+        content_chars: int = 500,
+        batch_size: int = 500
+    ) -> Iterator[bytes]:
+        """
+        Stream up to limit hits as NDJSON, one write per batch
+
+        Each line is one hit (see hit_record); the last line is
+        {"next_cursor": ..., "document_count": ...}, with next_cursor null
+        when every result was sent. An error after the response started is
+        reported as a last {"error": ...} line.
+        """
+        count = 0
+        last = None
+        more = False
+        try:
+            batches = self._batches(batch_size)
+            for batch in batches:
+                if count + len(batch) > limit:
+                    batch = batch[:limit - count]
+                    more = True
+                lines = [
+                    json.dumps(
+                        hit_record(self.rank + count + offset, doc, score, fields, content_chars),
+                        ensure_ascii=False, default=str
+                    )
+                    for offset, (doc, score) in enumerate(batch, 1)
+                ]
+                count += len(batch)
+                if batch:
+                    last = batch[-1]
+                    yield ("\n".join(lines) + "\n").encode("utf-8")
+                if count >= limit:
+                    # Exactly at a batch boundary: peek whether anything follows
+                    more = more or bool(next(batches, None))
+                    break
+        except Exception as e:
+            ERRORS.inc(component="search")
+            logger.error(f"Search stream failed after {count} documents: {e}")
+            yield (json.dumps({"error": str(e), "document_count": count}) + "\n").encode("utf-8")
+            return
+        next_cursor = self._encode(last[0], last[1], self.rank + count) if more and last else None
+        logger.info(f"Streamed {count} documents")
+        yield (json.dumps({"next_cursor": next_cursor, "document_count": count}) + "\n").encode("utf-8")
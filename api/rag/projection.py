@@ -0,0 +1,164 @@
+"""
+Projection module for STRIX v2
+Dimensionality reduction of embeddings (Matryoshka truncation, PCA) for the local index
+"""
+from typing import Dict, Optional
+import numpy as np
+from .quantization import VectorCodec
+
+
+class VectorProjection:
+    """Linear map of normalized embeddings to fewer dimensions"""
+
+    name = "none"
+    # Vectors needed before the projection can be fitted
+    min_train_size = 1
+
+    def __init__(self, dimensions: int):
+        self.target_dimensions = dimensions
+        self.output_dimensions: Optional[int] = None
+
+    def fit(self, sample: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def parameters(self) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+    def set_parameters(self, arrays: Dict[str, np.ndarray]) -> None:
+        raise NotImplementedError
+
+
+class TruncationProjection(VectorProjection):
+    """
+    Matryoshka truncation: keep the leading dimensions and re-normalize
+
+    text-embedding-3-* models are trained so that a prefix of the embedding
+    is itself a usable embedding; other models lose more recall.
+    """
+
+    name = "truncate"
+
+    def fit(self, sample: np.ndarray) -> None:
+        self.output_dimensions = min(self.target_dimensions, sample.shape[1])
+
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        prefix = np.asarray(vectors, dtype=np.float32)[..., :self.output_dimensions]
+        norms = np.linalg.norm(prefix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return prefix / norms
+
+    def parameters(self) -> Dict[str, np.ndarray]:
+        return {"output_dimensions": np.array(self.output_dimensions)}
+
+    def set_parameters(self, arrays: Dict[str, np.ndarray]) -> None:
+        self.output_dimensions = int(arrays["output_dimensions"])
+
+
+class PCAProjection(VectorProjection):
+    """
+    Projection onto the top principal directions of a corpus sample
+
+    The basis is taken from the uncentered second moment (SVD of the raw
+    sample), so inner products are approximated directly:
+    q . x ~= (q W) . (x W). Projected vectors are not re-normalized.
+    """
+
+    name = "pca"
+
+    @property
+    def min_train_size(self) -> int:
+        return self.target_dimensions
+
+    def fit(self, sample: np.ndarray) -> None:
+        sample = np.asarray(sample, dtype=np.float32)
+        dimensions = min(self.target_dimensions, sample.shape[1], sample.shape[0])
+        _, _, components = np.linalg.svd(sample, full_matrices=False)
+        self.basis = np.ascontiguousarray(components[:dimensions].T, dtype=np.float32)
+        self.output_dimensions = dimensions
+
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        return np.asarray(vectors, dtype=np.float32) @ self.basis
+
+    def parameters(self) -> Dict[str, np.ndarray]:
+        return {"basis": self.basis}
+
+    def set_parameters(self, arrays: Dict[str, np.ndarray]) -> None:
+        self.basis = np.asarray(arrays["basis"], dtype=np.float32)
+        self.output_dimensions = self.basis.shape[1]
+
+
+def create_projection(name: str, dimensions: int) -> Optional[VectorProjection]:
+    """Projection for a VECTOR_PROJECTION setting (None = full dimensions)"""
+    if name == "none":
+        return None
+    if name == "truncate":
+        return TruncationProjection(dimensions)
+    if name == "pca":
+        return PCAProjection(dimensions)
+    raise ValueError(f"Unsupported vector projection: {name}")
+
+
+class ProjectedCodec(VectorCodec):
+    """
+    Codec scanning projected vectors, optionally compressed by an inner codec
+
+    Codes are the projected vectors themselves (float32), or the inner
+    codec's codes of them; a query is projected once and scored against
+    the codes. `exact_rescore` tells the index whether the best candidates
+    must be re-scored with the full-dimension vectors.
+    """
+
+    def __init__(self, projection: VectorProjection, inner: Optional[VectorCodec] = None, rescore: bool = True):
+        super().__init__()
+        self.projection = projection
+        self.inner = inner
+        self.name = f"{projection.name}{projection.target_dimensions}+{inner.name if inner else 'float32'}"
+        self.code_dtype = inner.code_dtype if inner else np.float32
+        self.min_train_size = max(projection.min_train_size, inner.min_train_size if inner else 1)
+        # Compressed codes are too coarse to rank without the full vectors
+        self.exact_rescore = rescore or inner is not None
+
+    def code_size(self, dimensions: int) -> int:
+        projected = self.projection.output_dimensions or min(self.projection.target_dimensions, dimensions)
+        return self.inner.code_size(projected) if self.inner else projected
+
+    def fit(self, sample: np.ndarray) -> None:
+        self.projection.fit(sample)
+        if self.inner is not None:
+            self.inner.fit(self.projection.project(sample))
+        self.dimensions = sample.shape[1]
+        self.trained = True
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        projected = self.projection.project(vectors)
+        return self.inner.encode(projected) if self.inner else projected
+
+    def _prepare(self, query: np.ndarray):
+        projected = self.projection.project(query)
+        return projected, self.inner._prepare(projected) if self.inner else None
+
+    def _score_block(self, codes: np.ndarray, query: np.ndarray, state) -> np.ndarray:
+        projected, inner_state = state
+        if self.inner is None:
+            return codes @ projected
+        return self.inner._score_block(codes, projected, inner_state)
+
+    def parameters(self) -> Dict[str, np.ndarray]:
+        arrays = {f"projection.{key}": value for key, value in self.projection.parameters().items()}
+        if self.inner is not None:
+            arrays.update({f"inner.{key}": value for key, value in self.inner.parameters().items()})
+        return arrays
+
+    def set_parameters(self, arrays: Dict[str, np.ndarray]) -> bool:
+        self.projection.set_parameters(
+            {key[len("projection."):]: value for key, value in arrays.items() if key.startswith("projection.")}
+        )
+        if self.inner is not None:
+            inner = {key[len("inner."):]: value for key, value in arrays.items() if key.startswith("inner.")}
+            if not self.inner.set_parameters(inner):
+                return False
+            self.inner.trained = True
+        return True
@@ -0,0 +1,229 @@
+"""
+Quantization module for STRIX v2
+Compressed vector codes (scalar int8, product quantization) for the local index
+"""
+from typing import Dict, Optional
+import numpy as np
+
+# Rows scored per block, bounding the float32 temporaries of a scan
+SCORE_BLOCK_ROWS = 16384
+
+
+class VectorCodec:
+    """
+    Lossy vector compression with asymmetric scoring
+
+    Stored vectors are encoded once; queries stay full precision and are
+    scored directly against the codes (no decoding of the corpus).
+    """
+
+    name = "float32"
+    code_dtype = np.float32
+    # Vectors needed before the codec can be fitted
+    min_train_size = 1
+
+    def __init__(self):
+        self.trained = False
+        self.dimensions: Optional[int] = None
+
+    def code_size(self, dimensions: int) -> int:
+        """Code entries per vector"""
+        raise NotImplementedError
+
+    def fit(self, sample: np.ndarray) -> None:
+        """Learn codec parameters from a sample of (normalized) vectors"""
+        raise NotImplementedError
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Encode vectors into codes"""
+        raise NotImplementedError
+
+    def _score_block(self, codes: np.ndarray, query: np.ndarray, state) -> np.ndarray:
+        raise NotImplementedError
+
+    def parameters(self) -> Dict[str, np.ndarray]:
+        """Fitted parameter arrays"""
+        raise NotImplementedError
+
+    def set_parameters(self, arrays: Dict[str, np.ndarray]) -> bool:
+        """Adopt fitted parameter arrays (False if incompatible)"""
+        raise NotImplementedError
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Fitted parameters for an on-disk snapshot"""
+        return {"codec": np.array(self.name), **self.parameters()}
+
+    def load_state(self, arrays: Optional[Dict[str, np.ndarray]]) -> bool:
+        """Adopt parameters from a snapshot; False if they belong to a different codec"""
+        if not arrays or str(arrays.get("codec")) != self.name:
+            return False
+        if not self.set_parameters(arrays):
+            return False
+        self.trained = True
+        return True
+
+    def _prepare(self, query: np.ndarray):
+        """Per-query state (e.g. a lookup table) shared by all blocks"""
+        return None
+
+    def score(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Approximate inner products of the query with every code row"""
+        state = self._prepare(query)
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], SCORE_BLOCK_ROWS):
+            end = start + SCORE_BLOCK_ROWS
+            scores[start:end] = self._score_block(np.asarray(codes[start:end]), query, state)
+        return scores
+
+
+class ScalarInt8Codec(VectorCodec):
+    """
+    Per-dimension affine int8 quantization (4x smaller than float32)
+
+    x[d] ~= offset[d] + scale[d] * (code[d] + 128), so
+    q . x ~= q . offset + 128 * (q * scale).sum() + (q * scale) . code
+    """
+
+    name = "int8"
+    code_dtype = np.int8
+
+    def code_size(self, dimensions: int) -> int:
+        return dimensions
+
+    def fit(self, sample: np.ndarray) -> None:
+        low = sample.min(axis=0)
+        high = sample.max(axis=0)
+        self.offset = low.astype(np.float32)
+        self.scale = np.maximum((high - low) / 255.0, 1e-12).astype(np.float32)
+        self.dimensions = sample.shape[1]
+        self.trained = True
+
+    def parameters(self) -> Dict[str, np.ndarray]:
+        return {"offset": self.offset, "scale": self.scale}
+
+    def set_parameters(self, arrays: Dict[str, np.ndarray]) -> bool:
+        self.offset = np.asarray(arrays["offset"], dtype=np.float32)
+        self.scale = np.asarray(arrays["scale"], dtype=np.float32)
+        self.dimensions = self.offset.shape[0]
+        return True
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        levels = np.rint((vectors - self.offset) / self.scale)
+        return (np.clip(levels, 0, 255) - 128).astype(np.int8)
+
+    def _prepare(self, query: np.ndarray):
+        weights = query * self.scale
+        bias = float(query @ self.offset + 128.0 * weights.sum())
+        return weights, bias
+
+    def _score_block(self, codes: np.ndarray, query: np.ndarray, state) -> np.ndarray:
+        weights, bias = state
+        return codes.astype(np.float32) @ weights + bias
+
+
+class ProductQuantizerCodec(VectorCodec):
+    """
+    Product quantization with asymmetric distance computation (ADC)
+
+    Vectors are split into subvectors of `subvector_dimensions`; each is
+    replaced by the index of its nearest of 256 k-means centroids (one byte).
+    A query builds a (subspaces x 256) table of partial inner products once,
+    and a code row's score is the sum of its table entries.
+    """
+
+    name = "pq"
+    code_dtype = np.uint8
+    centroids_per_subspace = 256
+    min_train_size = 256
+
+    def __init__(self, subvector_dimensions: int = 8, iterations: int = 12, seed: int = 42):
+        super().__init__()
+        self.subvector_dimensions = subvector_dimensions
+        self.iterations = iterations
+        self.seed = seed
+
+    def code_size(self, dimensions: int) -> int:
+        if dimensions % self.subvector_dimensions:
+            raise ValueError(
+                f"Dimensions {dimensions} not divisible by PQ subvector size {self.subvector_dimensions}"
+            )
+        return dimensions // self.subvector_dimensions
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, d) -> (subspaces, n, subvector_dimensions)"""
+        n = vectors.shape[0]
+        return vectors.reshape(n, -1, self.subvector_dimensions).transpose(1, 0, 2)
+
+    def fit(self, sample: np.ndarray) -> None:
+        rng = np.random.default_rng(self.seed)
+        subspaces = self._split(sample.astype(np.float32))
+        count = min(self.centroids_per_subspace, sample.shape[0])
+        codebooks = np.zeros(
+            (subspaces.shape[0], self.centroids_per_subspace, self.subvector_dimensions),
+            dtype=np.float32
+        )
+        for j, points in enumerate(subspaces):
+            codebooks[j, :count] = self._kmeans(points, count, rng)
+        self.codebooks = codebooks
+        self.dimensions = sample.shape[1]
+        self.trained = True
+
+    def parameters(self) -> Dict[str, np.ndarray]:
+        return {"codebooks": self.codebooks}
+
+    def set_parameters(self, arrays: Dict[str, np.ndarray]) -> bool:
+        codebooks = np.asarray(arrays["codebooks"], dtype=np.float32)
+        if codebooks.shape[2] != self.subvector_dimensions:
+            return False
+        self.codebooks = codebooks
+        self.dimensions = codebooks.shape[0] * codebooks.shape[2]
+        return True
+
+    def _kmeans(self, points: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+        centroids = points[rng.choice(points.shape[0], count, replace=False)].copy()
+        point_norms = (points ** 2).sum(axis=1, keepdims=True)
+        for _ in range(self.iterations):
+            distances = point_norms - 2.0 * points @ centroids.T + (centroids ** 2).sum(axis=1)
+            assignment = distances.argmin(axis=1)
+            counts = np.bincount(assignment, minlength=count)
+            sums = np.stack([
+                np.bincount(assignment, weights=points[:, d], minlength=count)
+                for d in range(points.shape[1])
+            ], axis=1)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+            # Re-seed empty clusters from random points
+            empty = np.flatnonzero(~filled)
+            if empty.size:
+                centroids[empty] = points[rng.choice(points.shape[0], empty.size)]
+        return centroids
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        subspaces = self._split(vectors.astype(np.float32))
+        codes = np.empty((vectors.shape[0], subspaces.shape[0]), dtype=np.uint8)
+        centroid_norms = (self.codebooks ** 2).sum(axis=2)
+        for j, points in enumerate(subspaces):
+            distances = centroid_norms[j] - 2.0 * points @ self.codebooks[j].T
+            codes[:, j] = distances.argmin(axis=1)
+        return codes
+
+    def _prepare(self, query: np.ndarray):
+        # Partial inner products of each query subvector with every centroid, flattened
+        table = np.einsum("mcd,md->mc", self.codebooks, query.reshape(-1, self.subvector_dimensions))
+        offsets = np.arange(table.shape[0], dtype=np.int32) * self.centroids_per_subspace
+        return table.reshape(-1).astype(np.float32), offsets
+
+    def _score_block(self, codes: np.ndarray, query: np.ndarray, state) -> np.ndarray:
+        table, offsets = state
+        return table[codes.astype(np.int32) + offsets].sum(axis=1)
+
+
+def create_codec(name: str, pq_subvector_dimensions: int = 8) -> Optional[VectorCodec]:
+    """Codec for a VECTOR_STORAGE setting (None = plain float32 in memory)"""
+    if name == "float32":
+        return None
+    if name == "int8":
+        return ScalarInt8Codec()
+    if name == "pq":
+        return ProductQuantizerCodec(pq_subvector_dimensions)
+    raise ValueError(f"Unsupported vector storage: {name}")
@@ -0,0 +1,118 @@
+"""
+Recency module for STRIX v2
+Time-decayed re-ranking of search results by document date
+"""
+from typing import List, Dict, Any, Optional, Tuple, Sequence
+from datetime import date
+import numpy as np
+from langchain_core.documents import Document
+from .metadata_index import to_ordinal, MISSING_DATE
+from ..config import config
+
+
+def metadata_ordinals(metadatas: Sequence[Dict[str, Any]], fields: Sequence[str]) -> np.ndarray:
+    """Day ordinals of documents from their metadata (first dated field wins)"""
+    result = np.full(len(metadatas), MISSING_DATE, dtype=np.int32)
+    for i, metadata in enumerate(metadatas):
+        for field in fields:
+            ordinal = to_ordinal(metadata.get(field))
+            if ordinal != MISSING_DATE:
+                result[i] = ordinal
+                break
+    return result
+
+
+class RecencyScorer:
+    """
+    Blend of vector similarity and document age
+
+        score = (1 - weight) * similarity + weight * 0.5 ** (age_days / half_life_days)
+
+    Age comes from the first of `fields` present on a document (by default
+    `date`, falling back to `loaded_at`); undated documents get no recency
+    credit. With `max_age_days` (0 = no limit), older and undated documents
+    are excluded before scoring. Scores are computed for a whole candidate
+    array at once.
+    """
+
+    def __init__(
+        self,
+        weight: float,
+        half_life_days: float,
+        fields: Sequence[str] = ("date", "loaded_at"),
+        max_age_days: int = 0,
+        today: Optional[date] = None
+    ):
+        if not 0.0 <= weight <= 1.0:
+            raise ValueError("Recency weight must be between 0 and 1")
+        if half_life_days <= 0:
+            raise ValueError("Recency half-life must be positive")
+        self.weight = weight
+        self.half_life_days = half_life_days
+        self.fields = tuple(fields)
+        self.max_age_days = max_age_days
+        self.today = (today or date.today()).toordinal()
+
+    @classmethod
+    def create(cls, weight: Optional[float] = None) -> Optional["RecencyScorer"]:
+        """Scorer for a request (None = pure similarity)"""
+        weight = config.RECENCY_WEIGHT if weight is None else weight
+        if not weight:
+            return None
+        return cls(
+            weight,
+            config.RECENCY_HALF_LIFE_DAYS,
+            config.RECENCY_FIELDS,
+            config.RECENCY_MAX_AGE_DAYS
+        )
+
+    def cache_key(self) -> Tuple:
+        """Hashable identity (includes the day, so cached rankings age out daily)"""
+        return (self.weight, self.half_life_days, self.fields, self.max_age_days, self.today)
+
+    @property
+    def cutoff(self) -> Optional[int]:
+        """Oldest admitted day ordinal (None = no limit)"""
+        return self.today - self.max_age_days if self.max_age_days else None
+
+    def decay(self, ordinals: np.ndarray) -> np.ndarray:
+        """0.5 ** (age / half-life) per ordinal; 0 for missing dates, 1 for future dates"""
+        ordinals = np.asarray(ordinals)
+        age = np.maximum(self.today - ordinals, 0).astype(np.float32)
+        decay = np.exp2(-age / np.float32(self.half_life_days))
+        decay[ordinals == MISSING_DATE] = 0.0
+        return decay
+
+    def blend(
+        self,
+        similarity: np.ndarray,
+        ordinals: np.ndarray,
+        score_threshold: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Blended scores for candidates
+
+        Candidates below score_threshold in raw similarity, or older than
+        the cutoff, get -inf so they never rank.
+        """
+        scores = (1.0 - self.weight) * similarity + self.weight * self.decay(ordinals)
+        if score_threshold is not None:
+            scores[similarity < score_threshold] = -np.inf
+        cutoff = self.cutoff
+        if cutoff is not None:
+            scores[ordinals < cutoff] = -np.inf
+        return scores.astype(np.float32, copy=False)
+
+    def rerank(
+        self,
+        results: List[Tuple[Document, float]],
+        k: int,
+        score_threshold: Optional[float] = None
+    ) -> List[Tuple[Document, float]]:
+        """Re-rank (document, similarity) results by blended score"""
+        if not results:
+            return []
+        similarity = np.array([score for _, score in results], dtype=np.float32)
+        scores = self.blend(similarity, metadata_ordinals([doc.metadata for doc, _ in results], self.fields), score_threshold)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(results[i][0], float(scores[i])) for i in order if np.isfinite(scores[i])]
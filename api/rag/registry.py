@@ -0,0 +1,227 @@
+"""
+Registry module for STRIX v2
+Lazily built, process-wide shared RAG components
+"""
+from typing import Dict, Any, Optional, Callable
+import fcntl
+import logging
+import os
+import threading
+import time
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+
+class ComponentRegistry:
+    """
+    One instance of each heavy component per process, built on first use
+
+    Importing the API no longer constructs anything: the vector store (and
+    with it the embedding and Supabase clients), the RAG chain and the
+    document loader are created on first access, once, under a lock, and
+    shared by every caller. `warmup()` builds them ahead of traffic;
+    `status()` reports whether the process is ready to serve.
+    """
+
+    COMPONENTS = ("vector_store", "rag_chain", "document_loader", "feedback_store")
+
+    def __init__(self):
+        self._components: Dict[str, Any] = {}
+        self._build_seconds: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._http_client = None
+        self._shared_cache = None
+        self._warmup_error: Optional[str] = None
+        self._prewarm_lock = None
+        self.started_at = time.time()
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        component = self._components.get(name)
+        if component is not None:
+            return component
+        with self._lock:
+            component = self._components.get(name)
+            if component is None:
+                start = time.perf_counter()
+                component = factory()
+                self._build_seconds[name] = round(time.perf_counter() - start, 3)
+                self._components[name] = component
+                logger.info(f"Initialized {name} in {self._build_seconds[name]}s")
+            return component
+
+    def http_client(self):
+        """Shared keep-alive HTTP connection pool for the OpenAI clients"""
+        if self._http_client is None:
+            with self._lock:
+                if self._http_client is None:
+                    import httpx
+                    self._http_client = httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=config.HTTP_POOL_SIZE,
+                            max_keepalive_connections=config.HTTP_POOL_SIZE
+                        ),
+                        timeout=config.HTTP_TIMEOUT_SECONDS
+                    )
+        return self._http_client
+
+    def shared_cache(self):
+        """Cross-worker cache tier (None when SHARED_CACHE_BACKEND is 'none')"""
+        if self._shared_cache is None and config.SHARED_CACHE_BACKEND != 'none':
+            with self._lock:
+                if self._shared_cache is None:
+                    from .shared_cache import create_shared_cache
+                    self._shared_cache = create_shared_cache(
+                        config.SHARED_CACHE_BACKEND,
+                        path=config.SHARED_CACHE_PATH,
+                        url=config.REDIS_URL,
+                        max_entries=config.SHARED_CACHE_MAX_ENTRIES
+                    )
+                    logger.info(f"Shared cache initialized ({config.SHARED_CACHE_BACKEND})")
+        return self._shared_cache
+
+    def vector_store(self):
+        """The process's STRIXVectorStore"""
+        def build():
+            from .vector_store import STRIXVectorStore
+            return STRIXVectorStore()
+        return self._get("vector_store", build)
+
+    def rag_chain(self):
+        """The process's STRIXRAGChain (sharing the vector store)"""
+        def build():
+            from .chain import STRIXRAGChain
+            return STRIXRAGChain(vector_store=self.vector_store())
+        return self._get("rag_chain", build)
+
+    def document_loader(self):
+        """The process's STRIXDocumentLoader"""
+        def build():
+            from .document_loader import STRIXDocumentLoader
+            return STRIXDocumentLoader()
+        return self._get("document_loader", build)
+
+    def feedback_store(self):
+        """The process's FeedbackStore (negative ratings drop cached answers to the question)"""
+        def build():
+            from .feedback import create_feedback_store
+            extension = "sqlite" if config.FEEDBACK_BACKEND == "sqlite" else "jsonl"
+            return create_feedback_store(
+                config.FEEDBACK_BACKEND,
+                config.FEEDBACK_PATH or f"feedback/strix_feedback.{extension}",
+                batch_size=config.FEEDBACK_BATCH_SIZE,
+                flush_seconds=config.FEEDBACK_FLUSH_SECONDS,
+                negative_rating=config.FEEDBACK_NEGATIVE_RATING,
+                on_negative=self._discard_answers
+            )
+        return self._get("feedback_store", build)
+
+    def _discard_answers(self, question: str) -> None:
+        """Retire cached answers to a question (all parameter variants, in every worker)"""
+        vector_store = self._components.get("vector_store")
+        if vector_store is None or vector_store.answer_cache is None:
+            return
+        from .feedback import question_key
+        generation = vector_store.answer_cache.bump_generation(f"q:{question_key(question)}")
+        logger.info(f"Negative feedback: cached answers retired (generation {generation})")
+
+    def _acquire_prewarm_lock(self) -> bool:
+        """Take the prewarm lock for the life of this process; False if another worker holds it"""
+        if self._prewarm_lock is not None:
+            return True
+        directory = os.path.dirname(config.FAQ_PREWARM_LOCK_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handle = open(config.FAQ_PREWARM_LOCK_PATH, "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._prewarm_lock = handle
+        return True
+
+    def prewarm(self, count: int, min_count: int = 2) -> int:
+        """
+        Answer the most frequent questions in the feedback store to fill the caches
+
+        Only one worker per host pre-warms (the holder of the prewarm lock),
+        so a deploy costs at most `count` LLM answers instead of `count` per
+        worker; with a shared cache tier the other workers read the answers
+        from it. Questions already in the answer cache (L1 or shared tier)
+        are returned by the chain's cache lookup without an LLM call.
+        """
+        if not self._acquire_prewarm_lock():
+            logger.info("Skipping cache pre-warm: another worker holds the prewarm lock")
+            return 0
+        questions = self.feedback_store().questions(count, min_count=min_count, exclude_negative=True)
+        rag_chain = self.rag_chain()
+        warmed = 0
+        for row in questions:
+            result = rag_chain.invoke(question=row["question"])
+            warmed += result.get("confidence", 0) > 0
+        logger.info(f"Pre-warmed caches with {warmed}/{len(questions)} frequent questions")
+        return warmed
+
+    def insight_engine(self):
+        """The process's InsightEngine for /api/analyze (built on demand, not warmed up)"""
+        def build():
+            from .analysis import InsightEngine, create_summary_cache
+            return InsightEngine(
+                self.rag_chain(),
+                cache=create_summary_cache(self.shared_cache()),
+                max_concurrency=config.ANALYSIS_MAX_CONCURRENCY,
+                reduce_fanout=config.ANALYSIS_REDUCE_FANOUT
+            )
+        return self._get("insight_engine", build)
+
+    def issue_predictor(self):
+        """The process's IssuePredictor over the vector store's trend index"""
+        def build():
+            from .trends import IssuePredictor
+            rag_chain = self.rag_chain()
+            if rag_chain.vector_store.trends is None:
+                raise ValueError("Trend index is disabled (TREND_INDEX_ENABLED=false)")
+            return IssuePredictor(
+                rag_chain,
+                rag_chain.vector_store.trends,
+                recent_buckets=config.TREND_RECENT_BUCKETS,
+                baseline_buckets=config.TREND_BASELINE_BUCKETS,
+                min_count=config.TREND_MIN_COUNT,
+                z_threshold=config.TREND_Z_THRESHOLD,
+                narrative_candidates=config.TREND_NARRATIVE_CANDIDATES
+            )
+        return self._get("issue_predictor", build)
+
+    def warmup(self) -> Dict[str, Any]:
+        """Build every component now (idempotent); returns status()"""
+        try:
+            for name in self.COMPONENTS:
+                getattr(self, name)()
+            self._warmup_error = None
+            if config.FAQ_PREWARM_COUNT > 0 and not config.MOCK_MODE:
+                self.prewarm(config.FAQ_PREWARM_COUNT, config.FAQ_MIN_COUNT)
+        except Exception as e:
+            self._warmup_error = str(e)
+            logger.error(f"Warmup failed: {e}")
+        return self.status()
+
+    @property
+    def ready(self) -> bool:
+        return all(name in self._components for name in self.COMPONENTS)
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness and per-component build times"""
+        return {
+            "ready": self.ready,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "components": {
+                name: {"initialized": name in self._components, "build_seconds": self._build_seconds.get(name)}
+                for name in self.COMPONENTS
+            },
+            "error": self._warmup_error
+        }
+
+
+# Process-wide registry
+registry = ComponentRegistry()
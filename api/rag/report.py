@@ -0,0 +1,266 @@
+"""
+Report module for STRIX v2
+Concurrent section generation and streaming (write-only) XLSX report output
+"""
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import contextvars
+import logging
+import os
+import tempfile
+import time
+from langchain_core.documents import Document
+from .metrics import REPORT_SECONDS, ERRORS
+from .tracing import tracer
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Default monthly report: section title -> question asked to the RAG chain
+DEFAULT_SECTIONS = [
+    {"title": "Executive Summary", "question": "이번 달 배터리 산업의 가장 중요한 변화와 시사점을 요약해 주세요."},
+    {"title": "시장 동향", "question": "최근 배터리 시장 동향(수요, 가격, 점유율)은 어떻습니까?"},
+    {"title": "경쟁사 분석", "question": "주요 경쟁사(CATL, BYD, LG에너지솔루션 등)의 최근 동향과 전략은?"},
+    {"title": "기술 개발 현황", "question": "전고체, 급속충전 등 배터리 기술 개발 현황은?"},
+    {"title": "리스크 평가", "question": "정책, 원자재, 공급망 관련 주요 리스크는 무엇입니까?"},
+    {"title": "전략 제언", "question": "위 동향을 고려한 전략적 대응 방안을 제시해 주세요."}
+]
+
+TABLE_COLUMNS = ("순위", "제목", "조직", "날짜", "유형", "관련도", "출처", "발췌")
+EXCERPT_CHARS = 200
+
+
+class SectionResult:
+    """Answer and supporting documents of one report section"""
+
+    def __init__(self, title: str, question: str):
+        self.title = title
+        self.question = question
+        self.answer = ""
+        self.confidence = 0.0
+        self.rows: List[Tuple] = []
+        self.seconds = 0.0
+        self.error: Optional[str] = None
+
+
+class ReportBuilder:
+    """
+    Builds a report workbook from RAG answers, one section per sheet
+
+    Sections are generated concurrently (a RAG answer plus a table of up to
+    `table_rows` supporting documents each: the documents the answer used,
+    then further matches), so the build takes about as
+    long as the slowest section. The workbook is written with openpyxl's
+    write-only mode: rows are streamed to the file as they are appended and
+    never held as cell objects, so memory stays bounded by the documents
+    retrieved, whatever the number of rows and charts.
+    """
+
+    def __init__(self, rag_chain, vector_store, max_workers: int = 6, table_rows: int = 200):
+        self.rag_chain = rag_chain
+        self.vector_store = vector_store
+        self.max_workers = max_workers
+        self.table_rows = table_rows
+
+    def generate_sections(
+        self,
+        sections: List[Dict[str, str]],
+        doc_type: str = "both",
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[SectionResult]:
+        """Run every section concurrently (results in section order)"""
+        workers = max(1, min(self.max_workers, len(sections)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="strix-report") as executor:
+            # Each task runs in a copy of the request context (request ID, trace)
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._generate_section, section, doc_type, filter)
+                for section in sections
+            ]
+            return [future.result() for future in futures]
+
+    def _generate_section(
+        self,
+        section: Dict[str, str],
+        doc_type: str,
+        filter: Optional[Dict[str, Any]]
+    ) -> SectionResult:
+        result = SectionResult(section["title"], section["question"])
+        start = time.perf_counter()
+        with tracer.span("report.section", section=result.title):
+            try:
+                answer = self.rag_chain.invoke(
+                    question=result.question, doc_type=doc_type, filter=filter, return_documents=True
+                )
+                result.answer = answer.get("answer", "")
+                result.confidence = answer.get("confidence", 0.0)
+                # The documents the answer was generated from come first
+                documents = list(answer.get("documents", []))[:self.table_rows]
+                if len(documents) < self.table_rows:
+                    # Widen with one query (same query text: its embedding is cached)
+                    search_filter = dict(filter or {})
+                    if doc_type in ("internal", "external"):
+                        search_filter["doc_type"] = doc_type
+                    seen = {doc.id for doc, _ in documents}
+                    more = self.vector_store.search_with_score(
+                        query=answer.get("search_query") or result.question,
+                        k=self.table_rows,
+                        filter=search_filter or None
+                    )
+                    documents += [(doc, score) for doc, score in more if doc.id is None or doc.id not in seen]
+                    documents = documents[:self.table_rows]
+                result.rows = [self._row(rank, doc, score) for rank, (doc, score) in enumerate(documents, 1)]
+            except Exception as e:
+                ERRORS.inc(component="report")
+                logger.error(f"Report section '{result.title}' failed: {e}")
+                result.error = str(e)
+        result.seconds = time.perf_counter() - start
+        REPORT_SECONDS.observe(result.seconds, stage="section")
+        return result
+
+    @staticmethod
+    def _row(rank: int, doc: Document, score: float) -> Tuple:
+        metadata = doc.metadata
+        excerpt = " ".join(doc.page_content[:EXCERPT_CHARS].split())
+        return (
+            rank,
+            str(metadata.get("title", "")),
+            str(metadata.get("organization", "")),
+            str(metadata.get("date", "")),
+            str(metadata.get("doc_type", "")),
+            round(float(score), 4),
+            str(metadata.get("source", "")),
+            excerpt
+        )
+
+    def write_workbook(self, path: str, title: str, sections: List[SectionResult]) -> None:
+        """Stream the report to an .xlsx file"""
+        from openpyxl import Workbook
+        from openpyxl.chart import BarChart, Reference
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+
+        start = time.perf_counter()
+        workbook = Workbook(write_only=True)
+        bold = Font(bold=True)
+
+        def text(sheet, value):
+            # openpyxl stores strings starting with '=' as formulas
+            if isinstance(value, str) and value.startswith("="):
+                cell = WriteOnlyCell(sheet, value=value)
+                cell.data_type = "s"
+                return cell
+            return value
+
+        def header(sheet, values):
+            cells = []
+            for value in values:
+                cell = WriteOnlyCell(sheet, value=value)
+                cell.data_type = "s" if isinstance(value, str) else cell.data_type
+                cell.font = bold
+                cells.append(cell)
+            return cells
+
+        # Summary sheet: one row per section
+        summary = workbook.create_sheet("Summary")
+        summary.column_dimensions["A"].width = 24
+        summary.column_dimensions["B"].width = 100
+        summary.append(header(summary, [title]))
+        summary.append(["작성일", datetime.now().strftime("%Y-%m-%d %H:%M")])
+        summary.append([])
+        summary.append(header(summary, ["섹션", "요약", "신뢰도", "참조 문서", "생성 시간(초)"]))
+        for section in sections:
+            summary.append([
+                text(summary, section.title),
+                f"오류: {section.error}" if section.error else text(summary, section.answer),
+                round(section.confidence, 2),
+                len(section.rows),
+                round(section.seconds, 2)
+            ])
+
+        for index, section in enumerate(sections, 1):
+            sheet = workbook.create_sheet(_sheet_title(index, section.title))
+            for column, width in zip("ABCDEFGH", (6, 40, 16, 12, 10, 8, 30, 60)):
+                sheet.column_dimensions[column].width = width
+            sheet.append(header(sheet, [section.title]))
+            sheet.append(["질문", text(sheet, section.question)])
+            sheet.append(["답변", text(sheet, section.answer)])
+            sheet.append([])
+
+            # Supporting documents table, streamed row by row
+            table_start = 5
+            sheet.append(header(sheet, TABLE_COLUMNS))
+            for row in section.rows:
+                sheet.append([text(sheet, value) for value in row])
+            table_end = table_start + len(section.rows)
+
+            # Documents per organization, with a bar chart on the counts
+            counts = Counter(row[2] or "Unknown" for row in section.rows).most_common(10)
+            if counts:
+                sheet.append([])
+                chart_start = table_end + 2
+                sheet.append(header(sheet, ["조직", "문서 수"]))
+                for organization, count in counts:
+                    sheet.append([text(sheet, organization), count])
+                chart = BarChart()
+                chart.title = "조직별 참조 문서"
+                chart.legend = None
+                chart.add_data(Reference(sheet, min_col=2, min_row=chart_start, max_row=chart_start + len(counts)),
+                               titles_from_data=True)
+                chart.set_categories(Reference(sheet, min_col=1, min_row=chart_start + 1,
+                                               max_row=chart_start + len(counts)))
+                sheet.add_chart(chart, "J2")
+
+        workbook.save(path)
+        REPORT_SECONDS.observe(time.perf_counter() - start, stage="write")
+
+    def build(
+        self,
+        title: str,
+        sections: Optional[List[Dict[str, str]]] = None,
+        doc_type: str = "both",
+        filter: Optional[Dict[str, Any]] = None,
+        directory: Optional[str] = None
+    ) -> str:
+        """Generate all sections and write the workbook; returns its path"""
+        with tracer.span("report.build", sections=len(sections or DEFAULT_SECTIONS)):
+            results = self.generate_sections(sections or DEFAULT_SECTIONS, doc_type, filter)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handle, path = tempfile.mkstemp(prefix="STRIX_Report_", suffix=".xlsx", dir=directory)
+            os.close(handle)
+            try:
+                self.write_workbook(path, title, results)
+            except Exception:
+                os.remove(path)
+                raise
+            logger.info(f"Report written: {path} ({len(results)} sections)")
+            return path
+
+
+def report_filename() -> str:
+    """Download name for a report built now"""
+    return f"STRIX_Report_{datetime.now().strftime('%Y%m%d')}.xlsx"
+
+
+def _sheet_title(index: int, title: str) -> str:
+    """Excel sheet names: at most 31 characters, no []:*?/\\"""
+    cleaned = "".join(" " if char in "[]:*?/\\" else char for char in title)
+    return f"{index}. {cleaned}"[:31]
+
+
+def iter_file(path: str, chunk_size: int = 64 * 1024, remove: bool = True) -> Iterator[bytes]:
+    """Yield a file in chunks, deleting it afterwards"""
+    try:
+        with open(path, "rb") as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        if remove:
+            os.remove(path)
@@ -0,0 +1,217 @@
+"""
+Retrieval Cache module for STRIX v2
+Two-tier (per-worker LRU + shared) cache of search results, embeddings and answers
+"""
+from typing import Dict, Any, Optional, Tuple, Hashable
+from collections import OrderedDict
+import hashlib
+import json
+import pickle
+import threading
+import time
+from .metrics import record_cache
+from .shared_cache import SharedCache
+
+
+def filter_key(filter: Optional[Dict[str, Any]]) -> str:
+    """Canonical, hashable form of a metadata filter"""
+    if not filter:
+        return ""
+    return json.dumps(filter, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class RetrievalCache:
+    """
+    Thread-safe LRU cache (L1) over an optional cross-worker cache (L2)
+
+    Every write to the corpus bumps `version` and drops all entries. A lookup
+    returns the version it saw; `put` ignores results computed against an
+    older version, so a search racing an upload never caches stale hits.
+
+    Without a shared tier, writes made by other processes (e.g. other
+    workers on the same Supabase table) are not seen, so entries also expire
+    after `ttl_seconds`. With one, L1 misses fall through to it (values are
+    pickled under a key containing the version) and the version itself lives
+    there: `invalidate` bumps it for every worker, and each worker re-reads
+    it at most every `version_poll_seconds`, dropping its L1 when it moved.
+    `version_name` is the shared counter; caches of the same collection use
+    the same one. Cached values are shared between callers and must not be
+    mutated.
+    """
+
+    # One cache per (kind, collection), shared like the collection itself
+    _collections: Dict[Tuple[str, str], "RetrievalCache"] = {}
+    _collections_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 0,
+        kind: str = "retrieval",
+        shared: Optional[SharedCache] = None,
+        version_name: str = "",
+        version_poll_seconds: float = 1.0
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.kind = kind
+        self.shared = shared
+        self.version_name = version_name or kind
+        self.version_poll_seconds = version_poll_seconds
+        self.version = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._version_checked_at = float("-inf")
+
+    @classmethod
+    def for_collection(
+        cls,
+        name: str,
+        max_entries: int,
+        ttl_seconds: float = 0,
+        kind: str = "retrieval",
+        shared: Optional[SharedCache] = None,
+        version_poll_seconds: float = 1.0,
+        version_name: str = ""
+    ) -> "RetrievalCache":
+        """Get (or create) the shared cache of a kind for a collection (versioned by its corpus by default)"""
+        with cls._collections_lock:
+            cache = cls._collections.get((kind, name))
+            if cache is None:
+                cache = cls(
+                    max_entries, ttl_seconds, kind, shared,
+                    version_name or f"corpus:{name}", version_poll_seconds
+                )
+                cls._collections[(kind, name)] = cache
+            return cache
+
+    def _shared_key(self, key: Hashable, version: int) -> str:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return f"{self.kind}:{self.version_name}:{version}:{digest}"
+
+    def _sync_version(self) -> None:
+        """Adopt the shared version (at most every version_poll_seconds)"""
+        now = time.monotonic()
+        if self.shared is None or now - self._version_checked_at < self.version_poll_seconds:
+            return
+        self._version_checked_at = now
+        version = self.shared.version(self.version_name)
+        if version is None:
+            return
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._entries.clear()
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], int]:
+        """
+        Look up a key (L1, then the shared tier)
+
+        Returns:
+            (cached value or None, corpus version at lookup)
+        """
+        self._sync_version()
+        value = None
+        layer = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, cached = entry
+                if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    value = cached
+                    layer = "l1"
+            version = self.version
+        
+        if value is None and self.shared is not None:
+            data = self.shared.get(self._shared_key(key, version))
+            if data is not None:
+                value = pickle.loads(data)
+                layer = "l2"
+                with self._lock:
+                    if version == self.version:
+                        self._store(key, value)
+        
+        with self._lock:
+            if layer == "l1":
+                self.hits += 1
+            elif layer == "l2":
+                self.shared_hits += 1
+            else:
+                self.misses += 1
+        record_cache(self.kind, layer)
+        return value, version
+
+    def put(self, key: Hashable, value: Any, version: int) -> None:
+        """Store a result computed at `version` (dropped if the corpus changed since)"""
+        with self._lock:
+            if version != self.version:
+                return
+            self._store(key, value)
+        if self.shared is not None:
+            self.shared.set(
+                self._shared_key(key, version),
+                pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                self.ttl_seconds
+            )
+
+    def generation(self, name: str) -> int:
+        """
+        Current generation of a group of entries (e.g. the answers to one question)
+
+        Callers include it in their keys; `bump_generation` then retires the
+        whole group in every worker without touching the corpus version.
+        """
+        if self.shared is not None:
+            generation = self.shared.version(f"{self.version_name}:{name}")
+            if generation is not None:
+                return generation
+        with self._lock:
+            return self._generations.get(name, 0)
+
+    def bump_generation(self, name: str) -> int:
+        """Retire the entries keyed with the current generation of `name` (for all workers, with a shared tier)"""
+        generation = self.shared.bump_version(f"{self.version_name}:{name}") if self.shared is not None else None
+        with self._lock:
+            if generation is None:
+                generation = self._generations.get(name, 0) + 1
+            self._generations[name] = generation
+            return generation
+
+    def invalidate(self) -> int:
+        """Bump the corpus version (for all workers, with a shared tier) and drop all entries"""
+        version = self.shared.bump_version(self.version_name) if self.shared is not None else None
+        with self._lock:
+            self.version = version if version is not None else self.version + 1
+            self._entries.clear()
+            self._version_checked_at = time.monotonic()
+            return self.version
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-layer hit/miss counters and occupancy"""
+        with self._lock:
+            hits = self.hits + self.shared_hits
+            lookups = hits + self.misses
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": hits,
+                "l1_hits": self.hits,
+                "l2_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "shared": self.shared.name if self.shared is not None else None
+            }
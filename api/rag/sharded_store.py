@@ -0,0 +1,393 @@
+"""
+Sharded Vector Store module for STRIX v2
+Local index partitioned across worker processes with scatter-gather search
+"""
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from concurrent.futures import Future
+import atexit
+import heapq
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+import zlib
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from .local_store import LocalVectorStore
+from .recency import RecencyScorer
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+SHARD_KEYS = ("hash", "doc_type", "organization")
+
+# LocalVectorStore methods a shard worker serves
+SHARD_METHODS = frozenset({
+    "__len__", "add_vectors", "delete", "clear", "compact", "checkpoint", "retrain", "get_documents",
+    "get_by_ids", "memory_bytes", "disk_bytes", "similarity_search_by_vector_with_score",
+    "similarity_search_by_vector_returning_embeddings"
+})
+
+
+def _serve_shard(conn, directory: Optional[str], options: Dict[str, Any]) -> None:
+    """Shard worker process: one LocalVectorStore serving requests from the coordinator in order"""
+    if directory:
+        store = LocalVectorStore.open(directory, None, **options)
+    else:
+        store = LocalVectorStore(None, **options)
+    while True:
+        try:
+            request_id, method, args, kwargs = conn.recv()
+        except (EOFError, OSError):
+            break
+        if method == "close":
+            conn.send((request_id, True, None))
+            break
+        try:
+            if method not in SHARD_METHODS:
+                raise ValueError(f"Unsupported shard method: {method}")
+            conn.send((request_id, True, getattr(store, method)(*args, **kwargs)))
+        except Exception as e:
+            conn.send((request_id, False, e))
+
+
+class _ShardClient:
+    """
+    Coordinator-side handle of one shard worker
+
+    Requests from any number of threads are written to one pipe and matched
+    to their replies by a reader thread, so concurrent queries pipeline
+    instead of queueing on a lock for the whole round trip.
+    """
+
+    def __init__(self, context, shard_id: int, directory: Optional[str], options: Dict[str, Any]):
+        self.shard_id = shard_id
+        self._conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_serve_shard,
+            args=(child, directory, options),
+            name=f"strix-shard-{shard_id}",
+            daemon=True
+        )
+        self.process.start()
+        child.close()
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._request_ids = itertools.count()
+        self._reader = threading.Thread(target=self._read_replies, name=f"strix-shard-{shard_id}-reader", daemon=True)
+        self._reader.start()
+
+    def submit(self, method: str, *args, **kwargs) -> Future:
+        future: Future = Future()
+        with self._send_lock:
+            request_id = next(self._request_ids)
+            self._pending[request_id] = future
+            try:
+                self._conn.send((request_id, method, args, kwargs))
+            except (BrokenPipeError, OSError) as e:
+                self._pending.pop(request_id, None)
+                future.set_exception(RuntimeError(f"Shard {self.shard_id} is not running: {e}"))
+        return future
+
+    def _read_replies(self) -> None:
+        while True:
+            try:
+                request_id, ok, value = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        # Worker exited: fail whatever is still waiting
+        error = RuntimeError(f"Shard {self.shard_id} worker exited")
+        for request_id in list(self._pending):
+            future = self._pending.pop(request_id, None)
+            if future is not None:
+                future.set_exception(error)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self.process.is_alive():
+            try:
+                self.submit("close").result(timeout)
+            except Exception:
+                pass
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+        self._conn.close()
+
+
+class ShardedVectorStore:
+    """
+    Local vector index split into shards, each owned by a worker process
+
+    Documents are routed by a stable hash of their ID or of a metadata field
+    (doc_type, organization). A query is scattered to every shard that can
+    hold matches, which only rules shards out when the filter pins the
+    shard key; shards search in parallel on their own cores and return
+    their top k, which are merged best-first with a heap. Adds are split by
+    shard and applied in parallel, so embedding-free work (normalization,
+    codec training, encoding, snapshot writes) scales with the shard count.
+
+    Exposes the same methods as LocalVectorStore; query texts are embedded
+    once in the coordinator and only vectors cross process boundaries.
+    """
+
+    # Shard sets are shared per collection within a process, like LocalVectorStore
+    _collections: Dict[str, "ShardedVectorStore"] = {}
+    _collections_lock = threading.Lock()
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        shards: int,
+        shard_key: str = "hash",
+        directory: Optional[str] = None,
+        **options
+    ):
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        if shard_key not in SHARD_KEYS:
+            raise ValueError(f"Unsupported shard key: {shard_key}")
+        self.embedding = embedding
+        self.shard_key = shard_key
+        # Spawn: workers must not inherit the coordinator's threads and locks
+        context = multiprocessing.get_context("spawn")
+        self._shards = [
+            _ShardClient(
+                context,
+                shard_id,
+                os.path.join(directory, f"shard-{shard_id}") if directory else None,
+                options
+            )
+            for shard_id in range(shards)
+        ]
+        self._closed = False
+        # Surface worker start-up errors here rather than on the first query
+        sizes = self._gather(self._broadcast("__len__"))
+        logger.info(f"Started {shards} index shards by {shard_key} ({sum(sizes)} documents)")
+        atexit.register(self.close)
+
+    @classmethod
+    def for_collection(cls, name: str, embedding: Embeddings) -> "ShardedVectorStore":
+        """Get (or create) the shared shard set for a collection"""
+        with cls._collections_lock:
+            store = cls._collections.get(name)
+            if store is None:
+                directory = os.path.join(config.LOCAL_INDEX_DIR, name) if config.LOCAL_INDEX_PERSIST else None
+                store = cls(embedding, config.LOCAL_INDEX_SHARDS, config.SHARD_KEY, directory)
+                cls._collections[name] = store
+            return store
+
+    @property
+    def num_shards(self) -> int:
+        return len(self._shards)
+
+    def shard_for(self, doc_id: str, metadata: Dict[str, Any]) -> int:
+        """Shard owning a document"""
+        value = doc_id if self.shard_key == "hash" else metadata.get(self.shard_key, "")
+        return zlib.crc32(str(value).encode("utf-8")) % len(self._shards)
+
+    def _target_shards(self, filter: Optional[Dict[str, Any]]) -> List[int]:
+        """Shards that can hold documents matching the filter"""
+        if self.shard_key == "hash" or not filter or self.shard_key not in filter:
+            return list(range(len(self._shards)))
+        condition = filter[self.shard_key]
+        if isinstance(condition, (list, tuple, set)):
+            values = condition
+        elif isinstance(condition, dict):  # Range on the shard key: no pruning
+            return list(range(len(self._shards)))
+        else:
+            values = [condition]
+        return sorted({self.shard_for("", {self.shard_key: value}) for value in values})
+
+    def _broadcast(self, method: str, *args, shards: Optional[Iterable[int]] = None, **kwargs) -> List[Future]:
+        targets = range(len(self._shards)) if shards is None else shards
+        return [self._shards[shard].submit(method, *args, **kwargs) for shard in targets]
+
+    @staticmethod
+    def _gather(futures: List[Future]) -> List[Any]:
+        # Wait for every shard before raising, so no request is left in flight
+        errors = [future.exception() for future in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+        return [future.result() for future in futures]
+
+    def __len__(self) -> int:
+        return sum(self._gather(self._broadcast("__len__")))
+
+    def memory_bytes(self) -> int:
+        return sum(self._gather(self._broadcast("memory_bytes")))
+
+    def disk_bytes(self) -> int:
+        return sum(self._gather(self._broadcast("disk_bytes")))
+
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None) -> List[str]:
+        """Embed and add documents"""
+        if not documents:
+            return []
+        vectors = self.embedding.embed_documents([doc.page_content for doc in documents])
+        return self.add_vectors(np.asarray(vectors, dtype=np.float32), documents, ids)
+
+    def add_vectors(
+        self,
+        vectors: np.ndarray,
+        documents: List[Document],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Route pre-computed embeddings to their shards and add them in parallel"""
+        if len(vectors) != len(documents):
+            raise ValueError("vectors and documents must have the same length")
+        if not documents:
+            return []
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in documents]
+        vectors = np.asarray(vectors, dtype=np.float32)
+        assignment = np.array([self.shard_for(doc_id, doc.metadata) for doc_id, doc in zip(ids, documents)])
+
+        futures = []
+        for shard in range(len(self._shards)):
+            rows = np.flatnonzero(assignment == shard)
+            if self.shard_key != "hash":
+                # A changed shard field moves the document: drop copies held elsewhere
+                moved = [ids[row] for row in np.flatnonzero(assignment != shard)]
+                if moved:
+                    futures.append(self._shards[shard].submit("delete", moved))
+            if rows.size:
+                futures.append(self._shards[shard].submit(
+                    "add_vectors", vectors[rows], [documents[row] for row in rows], [ids[row] for row in rows]
+                ))
+        self._gather(futures)
+        return ids
+
+    def _scatter_search(
+        self,
+        method: str,
+        embedding: List[float],
+        k: int,
+        filter: Optional[Dict[str, Any]],
+        score_threshold: Optional[float],
+        recency: Optional[RecencyScorer] = None
+    ) -> List[tuple]:
+        """Search the relevant shards in parallel and merge their best-first lists"""
+        query = np.asarray(embedding, dtype=np.float32)
+        kwargs = {"k": k, "filter": filter}
+        if score_threshold is not None:
+            kwargs["score_threshold"] = score_threshold
+        if recency is not None:
+            kwargs["recency"] = recency
+        results = self._gather(self._broadcast(method, query, shards=self._target_shards(filter), **kwargs))
+        merged = heapq.merge(*results, key=lambda result: result[1], reverse=True)
+        # Blended recency scores are not similarities; shards applied the threshold already
+        if score_threshold is not None and recency is None:
+            merged = itertools.takewhile(lambda result: result[1] >= score_threshold, merged)
+        return list(itertools.islice(merged, k))
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        recency: Optional[RecencyScorer] = None
+    ) -> List[Tuple[Document, float]]:
+        """Top-k documents by cosine similarity (or recency-blended score) across shards"""
+        return self._scatter_search(
+            "similarity_search_by_vector_with_score", embedding, k, filter, score_threshold, recency
+        )
+
+    def similarity_search_by_vector_returning_embeddings(
+        self,
+        query: List[float],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float, np.ndarray]]:
+        """Top-k (document, score, stored vector) across shards"""
+        return self._scatter_search(
+            "similarity_search_by_vector_returning_embeddings", query, k, filter, None
+        )
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        score_threshold: Optional[float] = None,
+        recency: Optional[RecencyScorer] = None
+    ) -> List[Tuple[Document, float]]:
+        """Top-k documents with cosine similarity (or recency-blended) scores"""
+        return self.similarity_search_by_vector_with_score(
+            self.embedding.embed_query(query), k=k, filter=filter,
+            score_threshold=score_threshold, recency=recency
+        )
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """Top-k documents"""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def get_documents(self, filter: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> List[Document]:
+        """Live documents matching a filter, shard by shard (no scoring)"""
+        results = self._gather(self._broadcast("get_documents", filter, limit, shards=self._target_shards(filter)))
+        return list(itertools.islice(itertools.chain.from_iterable(results), limit))
+
+    def get_by_ids(self, ids: List[str]) -> List[Document]:
+        """Live documents with the given IDs (unknown IDs are skipped)"""
+        ids = list(ids)
+        if self.shard_key == "hash":
+            by_shard: Dict[int, List[str]] = {}
+            for doc_id in ids:
+                by_shard.setdefault(self.shard_for(doc_id, {}), []).append(doc_id)
+            futures = [self._shards[shard].submit("get_by_ids", shard_ids) for shard, shard_ids in by_shard.items()]
+        else:
+            futures = self._broadcast("get_by_ids", ids)
+        found = {doc.id: doc for doc in itertools.chain.from_iterable(self._gather(futures))}
+        return [found[doc_id] for doc_id in ids if doc_id in found]
+
+    def delete(self, ids: List[str]) -> int:
+        """Tombstone documents by ID"""
+        ids = list(ids)
+        if self.shard_key == "hash":
+            by_shard: Dict[int, List[str]] = {}
+            for doc_id in ids:
+                by_shard.setdefault(self.shard_for(doc_id, {}), []).append(doc_id)
+            futures = [self._shards[shard].submit("delete", shard_ids) for shard, shard_ids in by_shard.items()]
+        else:
+            # Field-routed: the owner is not known from the ID alone
+            futures = self._broadcast("delete", ids)
+        return sum(self._gather(futures))
+
+    def clear(self) -> None:
+        """Remove all documents"""
+        self._gather(self._broadcast("clear"))
+
+    def compact(self) -> None:
+        """Reclaim space of deleted documents"""
+        self._gather(self._broadcast("compact"))
+
+    def checkpoint(self) -> None:
+        """Fold every shard's write-ahead log into a new snapshot"""
+        self._gather(self._broadcast("checkpoint"))
+
+    def retrain(self) -> None:
+        """Re-fit the quantization codec / projection of every shard in parallel"""
+        self._gather(self._broadcast("retrain"))
+
+    def close(self) -> None:
+        """Stop the shard workers"""
+        if self._closed:
+            return
+        self._closed = True
+        for shard in self._shards:
+            shard.close()
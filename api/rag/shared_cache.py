@@ -0,0 +1,254 @@
+"""
+Shared Cache module for STRIX v2
+Cross-worker cache tier (SQLite file or Redis) under the per-worker LRU caches
+"""
+from typing import Dict, Any, Optional
+import logging
+import os
+import sqlite3
+import threading
+import time
+from .metrics import ERRORS
+
+logger = logging.getLogger(__name__)
+
+# After a backend error, skip the shared tier this long instead of timing out on every request
+ERROR_BACKOFF_SECONDS = 5.0
+
+
+class SharedCache:
+    """
+    Byte store shared by all workers, plus named version counters
+
+    Keys and values are opaque; the caches above it serialize values and put
+    the corpus version into the key, so bumping a version makes every
+    worker's older entries unreachable (they age out by TTL). Backend errors
+    never fail a request: they count as misses and open a short backoff.
+    """
+
+    name = "none"
+
+    def __init__(self):
+        self._retry_at = 0.0
+        self.errors = 0
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._retry_at
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        self._retry_at = time.monotonic() + ERROR_BACKOFF_SECONDS
+        ERRORS.inc(component="shared_cache")
+        logger.error(f"Shared cache {operation} failed ({self.name}): {error}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Value for a key (None when missing, expired or unavailable)"""
+        if not self._available():
+            return None
+        try:
+            return self._get(key)
+        except Exception as e:
+            self._failed("get", e)
+            return None
+
+    def set(self, key: str, value: bytes, ttl_seconds: float = 0) -> None:
+        """Store a value (ttl_seconds 0 = no expiry)"""
+        if not self._available():
+            return
+        try:
+            self._set(key, value, ttl_seconds)
+        except Exception as e:
+            self._failed("set", e)
+
+    def delete(self, key: str) -> None:
+        """Remove a value (no-op when missing or unavailable)"""
+        if not self._available():
+            return
+        try:
+            self._delete(key)
+        except Exception as e:
+            self._failed("delete", e)
+
+    def version(self, name: str) -> Optional[int]:
+        """Current value of a version counter (0 if never bumped, None if unavailable)"""
+        if not self._available():
+            return None
+        try:
+            return self._version(name)
+        except Exception as e:
+            self._failed("version", e)
+            return None
+
+    def bump_version(self, name: str) -> Optional[int]:
+        """Increment a version counter and return the new value (None if unavailable)"""
+        try:
+            return self._bump_version(name)
+        except Exception as e:
+            self._failed("bump_version", e)
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "errors": self.errors}
+
+    def close(self) -> None:
+        pass
+
+    def _get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def _set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        raise NotImplementedError
+
+    def _delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def _version(self, name: str) -> int:
+        raise NotImplementedError
+
+    def _bump_version(self, name: str) -> int:
+        raise NotImplementedError
+
+
+class SQLiteSharedCache(SharedCache):
+    """
+    Shared cache in a SQLite file (WAL mode) for workers on one host
+
+    Put the file on tmpfs (e.g. /dev/shm) to keep it in shared memory.
+    Each thread uses its own connection. Expired and excess entries
+    (beyond max_entries, soonest-expiring first) are pruned every
+    `prune_interval` writes.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, max_entries: int = 100000, prune_interval: int = 1000):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        expires_at = time.time() + ttl_seconds if ttl_seconds else float("inf")
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, sqlite3.Binary(value), expires_at)
+        )
+        self._writes += 1
+        if self._writes % self.prune_interval == 0:
+            self._prune(conn)
+
+    def _delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        excess = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY expires_at LIMIT ?)",
+                (excess,)
+            )
+
+    def _version(self, name: str) -> int:
+        row = self._connection().execute("SELECT version FROM versions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def _bump_version(self, name: str) -> int:
+        return self._connection().execute(
+            "INSERT INTO versions (name, version) VALUES (?, 1) "
+            "ON CONFLICT (name) DO UPDATE SET version = version + 1 RETURNING version",
+            (name,)
+        ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        try:
+            stats["entries"] = self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        except sqlite3.Error:
+            pass
+        return stats
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisSharedCache(SharedCache):
+    """
+    Shared cache on a Redis-compatible server (Redis, Valkey, KeyDB, ...)
+
+    Works across hosts and pods. Entries expire through Redis TTLs (plus
+    the server's own eviction policy, e.g. allkeys-lru); versions are
+    INCR counters. Requires the `redis` package.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "strix:", timeout_seconds: float = 0.25):
+        super().__init__()
+        import redis
+        self.prefix = prefix
+        # Connection pool shared by all threads of the worker
+        self.client = redis.Redis.from_url(
+            url,
+            socket_timeout=timeout_seconds,
+            socket_connect_timeout=timeout_seconds
+        )
+
+    def _get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def _set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self.client.set(self.prefix + key, value, px=int(ttl_seconds * 1000) if ttl_seconds else None)
+
+    def _delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def _version(self, name: str) -> int:
+        return int(self.client.get(f"{self.prefix}version:{name}") or 0)
+
+    def _bump_version(self, name: str) -> int:
+        return int(self.client.incr(f"{self.prefix}version:{name}"))
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def create_shared_cache(backend: str, path: str = "", url: str = "", max_entries: int = 100000) -> Optional[SharedCache]:
+    """Shared cache for a SHARED_CACHE_BACKEND setting (None = per-worker caches only)"""
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        return SQLiteSharedCache(path, max_entries)
+    if backend == "redis":
+        return RedisSharedCache(url)
+    raise ValueError(f"Unsupported shared cache backend: {backend}")
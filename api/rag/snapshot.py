@@ -0,0 +1,328 @@
+"""
+Snapshot module for STRIX v2
+Memory-mapped on-disk snapshots and a write-ahead log for the local index
+
+Layout of an index directory:
+    CURRENT                  name of the active snapshot directory
+    snapshot-<n>/
+        vectors.npy          (rows, dimensions) float32, normalized
+        codes.npy            quantization codes (optional)
+        codec.npz            codec parameters (optional)
+        ids.npy              fixed-width UTF-8 IDs
+        documents.bin        concatenated JSON documents
+        offsets.npy          (rows + 1) int64 byte offsets into documents.bin
+        metadata_index.json  posting list directory (field, value -> slice)
+        metadata.<name>.npy  posting rows and date columns
+    wal.log                  JSON lines appended after the snapshot
+    LOCK                     flock target serializing WAL appends and checkpoints
+
+Every file is opened with mmap, so workers on one host share pages through
+the OS page cache and opening a snapshot costs no parsing.
+"""
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Sequence, Tuple
+from contextlib import contextmanager
+import base64
+import fcntl
+import json
+import mmap
+import os
+import shutil
+import numpy as np
+from langchain_core.documents import Document
+
+CURRENT_FILE = "CURRENT"
+WAL_FILE = "wal.log"
+LOCK_FILE = "LOCK"
+
+
+class SegmentedMatrix:
+    """
+    Row-wise concatenation of a read-only base (memory-mapped snapshot) and a
+    private writable tail
+
+    Supports the operations the local index needs: shape, contiguous slices,
+    fancy row indexing, matrix-vector products and writes into the tail.
+    """
+
+    def __init__(self, base: np.ndarray, tail: np.ndarray):
+        self.base = base
+        self.tail = tail
+        self.dtype = base.dtype
+
+    @property
+    def shape(self):
+        return (self.base.shape[0] + self.tail.shape[0],) + self.base.shape[1:]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the private tail (the base is shared page cache)"""
+        return self.tail.nbytes
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __array__(self, dtype=None):
+        return np.concatenate([self.base, self.tail]).astype(dtype or self.dtype, copy=False)
+
+    def __getitem__(self, key):
+        split = self.base.shape[0]
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.shape[0])
+            if step != 1:
+                return np.asarray(self)[key]
+            if stop <= split:
+                return self.base[start:stop]
+            if start >= split:
+                return self.tail[start - split:stop - split]
+            return SegmentedMatrix(self.base[start:], self.tail[:stop - split])
+        if isinstance(key, (int, np.integer)):
+            key = int(key)
+            return self.base[key] if key < split else self.tail[key - split]
+        rows = np.asarray(key)
+        result = np.empty((rows.shape[0],) + self.base.shape[1:], dtype=self.dtype)
+        in_base = rows < split
+        result[in_base] = self.base[rows[in_base]]
+        result[~in_base] = self.tail[rows[~in_base] - split]
+        return result
+
+    def __setitem__(self, key: slice, value) -> None:
+        split = self.base.shape[0]
+        start, stop, _ = key.indices(self.shape[0])
+        if start < split:
+            raise ValueError("Snapshot rows are read-only")
+        self.tail[start - split:stop - split] = value
+
+    def __matmul__(self, other: np.ndarray) -> np.ndarray:
+        return np.concatenate([self.base @ other, self.tail @ other])
+
+    def flush(self) -> None:
+        if isinstance(self.tail, np.memmap):
+            self.tail.flush()
+
+
+class SegmentedList(Sequence):
+    """Read-only base sequence followed by an in-memory list of appended items"""
+
+    def __init__(self, base: Sequence, tail: Optional[List] = None):
+        self.base = base
+        self.tail = tail if tail is not None else []
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.tail)
+
+    def __getitem__(self, index: int):
+        split = len(self.base)
+        return self.base[index] if index < split else self.tail[index - split]
+
+    def extend(self, items) -> None:
+        self.tail.extend(items)
+
+
+class LazyIds(Sequence):
+    """IDs decoded on access from a memory-mapped fixed-width byte array"""
+
+    def __init__(self, data: np.ndarray):
+        self.data = data
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def __getitem__(self, index: int) -> str:
+        return self.data[index].decode("utf-8")
+
+
+class LazyDocuments(Sequence):
+    """Documents decoded on access from a memory-mapped JSON blob"""
+
+    def __init__(self, blob, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return self.offsets.shape[0] - 1
+
+    def __getitem__(self, index: int) -> Document:
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        record = json.loads(self.blob[start:end])
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+
+def encode_vectors(vectors: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(vectors, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def decode_vectors(data: str, dimensions: int) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=np.float32).reshape(-1, dimensions)
+
+
+def document_record(doc: Document) -> Dict[str, Any]:
+    return {"page_content": doc.page_content, "metadata": doc.metadata}
+
+
+@contextmanager
+def directory_lock(directory: str) -> Iterator[None]:
+    """Exclusive inter-process lock for WAL appends and checkpoints"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_FILE), "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class WriteAheadLog:
+    """Append-only JSON-lines log of writes made after the current snapshot"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, WAL_FILE)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with directory_lock(self.directory):
+            with open(self.path, "a", encoding="utf-8") as handle:
+                handle.write(line)
+                handle.flush()
+                os.fsync(handle.fileno())
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as handle:
+            for line in handle:
+                if line.endswith("\n"):  # Ignore a torn final line
+                    yield json.loads(line)
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def truncate(self) -> None:
+        with open(self.path, "w"):
+            pass
+
+
+def current_snapshot(directory: str) -> Optional[str]:
+    """Path of the active snapshot, if any"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as handle:
+            name = handle.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(directory, name)
+    return path if name and os.path.isdir(path) else None
+
+
+def write_snapshot(
+    directory: str,
+    vectors: np.ndarray,
+    rows: np.ndarray,
+    ids: Sequence[str],
+    documents: Iterable[Document],
+    metadata_index: Tuple[Dict[str, Any], Dict[str, np.ndarray]],
+    codes: Optional[np.ndarray] = None,
+    codec_arrays: Optional[Dict[str, np.ndarray]] = None,
+    block_rows: int = 65536
+) -> str:
+    """
+    Write the given rows as a new snapshot and atomically make it current
+
+    Args:
+        directory: Index directory
+        vectors: Source matrix (may be memory-mapped or segmented)
+        rows: Source rows to keep, in order
+        ids: IDs of the kept rows
+        documents: Documents of the kept rows (consumed once)
+        metadata_index: MetadataIndex.export() of the kept rows
+        codes: Quantization codes of the kept rows
+        codec_arrays: Codec parameters for the codes
+
+    Returns:
+        Path of the new snapshot directory
+    """
+    os.makedirs(directory, exist_ok=True)
+    previous = current_snapshot(directory)
+    number = int(os.path.basename(previous).split("-")[1]) + 1 if previous else 1
+    name = f"snapshot-{number}"
+    staging = os.path.join(directory, f".{name}.tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    count, dimensions = len(rows), vectors.shape[1]
+    out = np.lib.format.open_memmap(
+        os.path.join(staging, "vectors.npy"), mode="w+", dtype=np.float32, shape=(count, dimensions)
+    )
+    for start in range(0, count, block_rows):
+        out[start:start + block_rows] = vectors[rows[start:start + block_rows]]
+    out.flush()
+    del out
+
+    if codes is not None:
+        np.save(os.path.join(staging, "codes.npy"), np.asarray(codes))
+        np.savez(os.path.join(staging, "codec.npz"), **codec_arrays)
+
+    encoded_ids = [doc_id.encode("utf-8") for doc_id in ids]
+    width = max((len(doc_id) for doc_id in encoded_ids), default=1)
+    np.save(os.path.join(staging, "ids.npy"), np.array(encoded_ids, dtype=f"S{width}"))
+
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    with open(os.path.join(staging, "documents.bin"), "wb") as handle:
+        position = 0
+        for row, doc in enumerate(documents):
+            data = json.dumps(document_record(doc), ensure_ascii=False, default=str).encode("utf-8")
+            handle.write(data)
+            position += len(data)
+            offsets[row + 1] = position
+    np.save(os.path.join(staging, "offsets.npy"), offsets)
+    descriptor, arrays = metadata_index
+    with open(os.path.join(staging, "metadata_index.json"), "w", encoding="utf-8") as handle:
+        json.dump(descriptor, handle, ensure_ascii=False, default=str)
+    for key, array in arrays.items():
+        np.save(os.path.join(staging, f"metadata.{key}.npy"), array)
+
+    final = os.path.join(directory, name)
+    os.replace(staging, final)
+    pointer = os.path.join(directory, f".{CURRENT_FILE}.tmp")
+    with open(pointer, "w") as handle:
+        handle.write(name)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(pointer, os.path.join(directory, CURRENT_FILE))
+
+    # Readers keep their mappings of older snapshots after the files are unlinked
+    for entry in os.listdir(directory):
+        if entry.startswith("snapshot-") and entry != name:
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+    return final
+
+
+class Snapshot:
+    """Memory-mapped view of one snapshot directory"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.ids = LazyIds(np.load(os.path.join(path, "ids.npy"), mmap_mode="r"))
+        offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        with open(os.path.join(path, "documents.bin"), "rb") as handle:
+            blob = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if offsets[-1] else b""
+        self.documents = LazyDocuments(blob, offsets)
+        with open(os.path.join(path, "metadata_index.json"), encoding="utf-8") as handle:
+            descriptor = json.load(handle)
+        arrays = {
+            entry[len("metadata."):-len(".npy")]: np.load(os.path.join(path, entry), mmap_mode="r")
+            for entry in os.listdir(path)
+            if entry.startswith("metadata.") and entry.endswith(".npy")
+        }
+        self.metadata_index = (descriptor, arrays)
+
+        codes_path = os.path.join(path, "codes.npy")
+        self.codes = np.load(codes_path, mmap_mode="r") if os.path.exists(codes_path) else None
+        codec_path = os.path.join(path, "codec.npz")
+        self.codec_arrays = dict(np.load(codec_path)) if os.path.exists(codec_path) else None
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
@@ -0,0 +1,91 @@
+"""
+Tabular module for STRIX v2
+Compact TSV rendering of query and search results for the Excel VBA client
+"""
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from langchain_core.documents import Document
+
+TSV_MEDIA_TYPE = "text/tab-separated-values; charset=utf-8"
+
+QUERY_COLUMNS = ("answer", "confidence", "internal_docs", "external_docs", "request_id", "timestamp")
+SOURCE_COLUMNS = ("rank", "title", "organization", "date", "type", "relevance")
+SEARCH_COLUMNS = ("rank", "relevance_score", "title", "organization", "date", "doc_type", "source", "content")
+
+# Search result content is cut like the JSON response
+CONTENT_PREVIEW_CHARS = 500
+
+
+def wants_tsv(format: Optional[str], accept: Optional[str]) -> bool:
+    """Whether a request asked for TSV (format= wins over the Accept header)"""
+    if format:
+        return format == "tsv"
+    return "text/tab-separated-values" in (accept or "")
+
+
+def escape_cell(value: Any) -> str:
+    """
+    One TSV cell
+
+    Tabs, line breaks and backslashes inside text become \\t, \\n and \\\\,
+    so every record is exactly one line; numbers use '.' as the decimal point.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        return f"{value:.4f}".rstrip("0").rstrip(".") if value == value else ""
+    text = str(value)
+    if "\\" in text:
+        text = text.replace("\\", "\\\\")
+    if "\t" in text or "\n" in text or "\r" in text:
+        text = text.replace("\t", "\\t").replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "\\n")
+    return text
+
+
+def table(columns: Sequence[str], rows: List[Sequence[Any]]) -> str:
+    """Header line plus one line per row"""
+    lines = ["\t".join(columns)]
+    lines.extend("\t".join(escape_cell(value) for value in row) for row in rows)
+    return "\n".join(lines)
+
+
+def query_tsv(result: Dict[str, Any], include_sources: bool = True) -> str:
+    """
+    /api/query result as two tables separated by an empty line
+
+    The first table has one row (answer and counts), the second one row
+    per source.
+    """
+    meta = table(QUERY_COLUMNS, [[result.get(column) for column in QUERY_COLUMNS]])
+    sources = result.get("sources", []) if include_sources else []
+    source_rows = [
+        [rank] + [source.get(column) for column in SOURCE_COLUMNS[1:]]
+        for rank, source in enumerate(sources, 1)
+    ]
+    return meta + "\n\n" + table(SOURCE_COLUMNS, source_rows) + "\n"
+
+
+def search_tsv(
+    results: List[Tuple[Document, float]],
+    start: int = 1,
+    content_chars: int = CONTENT_PREVIEW_CHARS
+) -> str:
+    """/api/documents/search results, one row per document (ranks from start)"""
+    rows = []
+    for rank, (doc, score) in enumerate(results, start):
+        metadata = doc.metadata
+        content = doc.page_content
+        if len(content) > content_chars:
+            content = content[:content_chars] + "..."
+        rows.append([
+            rank,
+            float(score),
+            metadata.get("title"),
+            metadata.get("organization"),
+            metadata.get("date"),
+            metadata.get("doc_type"),
+            metadata.get("source"),
+            content
+        ])
+    return table(SEARCH_COLUMNS, rows) + "\n"
@@ -0,0 +1,348 @@
+"""
+Tracing module for STRIX v2
+OpenTelemetry-compatible request spans with tail-based sampling and JSONL / OTLP export
+"""
+from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+def _new_id(num_bytes: int) -> str:
+    """Random lowercase hex id (16 bytes for traces, 8 for spans)"""
+    return os.urandom(num_bytes).hex()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Convert a Python value to an OTLP AnyValue"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class _Trace:
+    """Spans of one trace buffered until the root span ends"""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+        self.error = False
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span") -> None:
+        with self._lock:
+            self.spans.append(span)
+            if span.status_code == STATUS_ERROR:
+                self.error = True
+
+
+class Span:
+    """A single timed operation"""
+
+    def __init__(
+        self,
+        name: str,
+        trace: _Trace,
+        parent_span_id: Optional[str] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.name = name
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status_code = STATUS_UNSET
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach an attribute to the span"""
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        """Mark the span as failed"""
+        self.status_code = STATUS_ERROR
+        self.status_message = f"{type(exc).__name__}: {exc}"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Serialize in OTLP/JSON span format"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+                if value is not None
+            ],
+            "status": {"code": self.status_code}
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class _NoopSpan:
+    """Span stand-in used when tracing is disabled"""
+
+    trace_id = ""
+    span_id = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("strix_current_span", default=None)
+_request_id: ContextVar[str] = ContextVar("strix_request_id", default="")
+
+
+class JsonlSpanExporter:
+    """Append each sampled trace as one OTLP/JSON line to a local file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, payload: Dict[str, Any]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+
+
+class OTLPHttpExporter:
+    """Send sampled traces to an OTLP/HTTP collector (JSON encoding)"""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.timeout = timeout
+
+    def export(self, payload: Dict[str, Any]) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class Tracer:
+    """Creates spans and exports finished traces off the request path"""
+
+    def __init__(
+        self,
+        service_name: str = "strix-api",
+        exporter: Any = None,
+        slow_threshold_ms: float = 1000.0,
+        sample_rate: float = 0.0
+    ):
+        self.service_name = service_name
+        self.exporter = exporter
+        self.slow_threshold_ms = slow_threshold_ms
+        self.sample_rate = sample_rate
+        self.enabled = exporter is not None
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=1000)
+        self._worker: Optional[threading.Thread] = None
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        trace_id: Optional[str] = None,
+        parent_span_id: Optional[str] = None,
+        **attributes
+    ):
+        """
+        Start a span as a child of the current one (or a new trace)
+
+        Args:
+            name: Span name
+            kind: OTLP span kind
+            trace_id: Continue an incoming trace (root spans only)
+            parent_span_id: Remote parent span (root spans only)
+            **attributes: Initial span attributes
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        if parent is not None:
+            span = Span(name, parent.trace, parent.span_id, kind, attributes)
+        else:
+            span = Span(name, _Trace(trace_id or _new_id(16)), parent_span_id, kind, attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            span.trace.add(span)
+            if parent is None:
+                self._finish_trace(span)
+
+    def _finish_trace(self, root: Span) -> None:
+        """Tail-based sampling: keep errors, slow traces and a random fraction"""
+        trace = root.trace
+        keep = (
+            trace.error
+            or root.duration_ms >= self.slow_threshold_ms
+            or random.random() < self.sample_rate
+        )
+        if not keep:
+            return
+
+        try:
+            self._queue.put_nowait(self._to_otlp(trace))
+        except queue.Full:
+            logger.warning("Trace export queue full, dropping trace")
+            return
+        self._ensure_worker()
+
+    def _to_otlp(self, trace: _Trace) -> Dict[str, Any]:
+        """Build an OTLP ExportTraceServiceRequest for one trace"""
+        return {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": self.service_name}}
+                    ]
+                },
+                "scopeSpans": [{
+                    "scope": {"name": "strix.rag"},
+                    "spans": [span.to_otlp() for span in trace.spans]
+                }]
+            }]
+        }
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._export_loop, name="strix-trace-export", daemon=True)
+            self._worker.start()
+
+    def _export_loop(self) -> None:
+        while True:
+            payload = self._queue.get()
+            try:
+                self.exporter.export(payload)
+            except Exception as e:
+                logger.warning(f"Trace export failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until queued traces are exported"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+def current_span() -> Any:
+    """The active span, or a no-op span outside any trace"""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def current_trace_id() -> str:
+    """Trace ID of the active span ('' when not tracing)"""
+    span = _current_span.get()
+    return span.trace_id if span else ""
+
+
+def set_request_id(request_id: str) -> None:
+    """Bind a request ID to the current context"""
+    _request_id.set(request_id)
+
+
+def current_request_id() -> str:
+    """Request ID of the current context (the client's X-Request-ID, else the trace ID when tracing)"""
+    return _request_id.get() or current_trace_id()
+
+
+def new_request_id() -> str:
+    """Generate a request ID in trace ID format"""
+    return _new_id(16)
+
+
+def parse_traceparent(header: Optional[str]) -> tuple:
+    """
+    Parse a W3C traceparent header
+
+    Returns:
+        (trace_id, parent_span_id) or (None, None) if absent/invalid
+    """
+    if not header:
+        return None, None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    return parts[1], parts[2]
+
+
+def _create_exporter() -> Any:
+    """Build the configured exporter"""
+    if not config.TRACING_ENABLED:
+        return None
+    if config.TRACE_EXPORTER == "otlp":
+        return OTLPHttpExporter(config.OTLP_ENDPOINT)
+    if config.TRACE_EXPORTER == "jsonl":
+        return JsonlSpanExporter(config.TRACE_FILE)
+    raise ValueError(f"Unsupported trace exporter: {config.TRACE_EXPORTER}")
+
+
+# Global tracer
+tracer = Tracer(
+    exporter=_create_exporter(),
+    slow_threshold_ms=config.TRACE_SLOW_THRESHOLD_MS,
+    sample_rate=config.TRACE_SAMPLE_RATE
+)
@@ -0,0 +1,630 @@
+"""
+Trends module for STRIX v2
+Incremental term / entity frequency time series and emerging-issue detection
+"""
+from typing import List, Dict, Any, Optional, Tuple, Sequence, Iterator
+from datetime import date
+import logging
+import re
+import threading
+import time
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate
+from .metadata_index import to_ordinal, MISSING_DATE
+from .metrics import TREND_SECONDS, ERRORS
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+TERM = 0
+ENTITY = 1
+KIND_NAMES = ("term", "entity")
+# Kind of the persisted rows holding the chunks counted per bucket
+TOTAL = -1
+# Count changes sent per call to the persisted table
+PERSIST_BATCH = 5000
+# Share of the vocabulary freed when it is full and a new term arrives
+EVICT_FRACTION = 0.05
+
+# Korean words, and Latin words with an optional Korean tail (SK온, CATL과)
+_TOKEN_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9\-]*[가-힣]*|[가-힣]{2,}")
+# Trailing particles stripped from Korean words (longest first)
+_PARTICLES = tuple(sorted(
+    ("은", "는", "이", "가", "을", "를", "의", "에", "에서", "으로", "로", "와", "과", "도", "만",
+     "까지", "부터", "에게", "이다", "했다", "한다", "하는", "하여", "하고", "된다", "되는"),
+    key=len, reverse=True
+))
+STOPWORDS = frozenset((
+    "있다", "있는", "없는", "대한", "통해", "위해", "관련", "이번", "지난", "또한", "그리고", "하지만",
+    "the", "and", "for", "with", "from", "that", "this", "are", "was", "were", "has", "have"
+))
+
+NARRATIVE_TEMPLATE = """You are STRIX, an analyst for the battery industry.
+
+The following terms and entities show unusual growth in recent documents
+(z-score of their recent share against the preceding weeks, burst ratio,
+recent mentions, an example document title):
+
+{candidates}
+
+For each line above, write one line in Korean in the form
+
+number | issue | probability | impact | recommendation
+
+where number is the number of the candidate line it describes, issue describes the emerging issue, probability is a number between
+0 and 1 that it becomes material, impact is high, medium or low, and
+recommendation is a short action.
+
+Predictions:"""
+
+
+def extract_terms(text: str) -> Tuple[set, set]:
+    """(terms, entities) mentioned in a text"""
+    terms, entities = set(), set()
+    for token in _TOKEN_PATTERN.findall(text):
+        for particle in _PARTICLES:
+            if token.endswith(particle) and len(token) - len(particle) >= 2:
+                token = token[:-len(particle)]
+                break
+        if len(token) < 2:
+            continue
+        # Acronyms and capitalized names (CATL, BYD, IRA, SK온, Tesla) count as entities
+        if token[0].isupper():
+            entities.add(token)
+        elif token.lower() not in STOPWORDS:
+            terms.add(token.lower())
+    return terms, entities
+
+
+class TrendIndex:
+    """
+    Per-bucket document frequency of every term and entity
+
+    An int32 (vocabulary x window) count matrix used as a ring buffer over
+    the last `window_buckets` time buckets. A bucket covers `bucket_days`
+    days of the `date` metadata (falling back to `loaded_at`) and lives in
+    column bucket % window_buckets; a count is the number of chunks
+    mentioning the term. A chunk dated after the latest bucket moves the
+    window forward (clearing the columns it reuses), and chunks dated
+    before the window are not counted, so memory does not depend on how
+    far back the corpus goes. `add` updates the counts with each ingested
+    batch, so detection only reads the window and never rescans the corpus.
+
+    The vocabulary holds at most `max_terms` rows. When it is full, the
+    EVICT_FRACTION of rows with the fewest mentions in the window are
+    freed for new terms (rows mentioned in the latest bucket go last), so a
+    term that appears late still gets a row and keeps it while it grows.
+    `remove` subtracts deleted chunks (their text and metadata are read
+    back before the delete); `rebuild` recounts from the store.
+
+    With a `store` (SupabaseTrendCounts), every change is also added to the
+    persisted counts and `load` restores the window from them at startup,
+    so the index does not have to be rebuilt from the corpus.
+    """
+
+    def __init__(
+        self,
+        bucket_days: int = 7,
+        max_terms: int = 100000,
+        store: Optional["SupabaseTrendCounts"] = None,
+        window_buckets: int = 14
+    ):
+        self.bucket_days = bucket_days
+        self.max_terms = max_terms
+        self.store = store
+        self.window_buckets = max(1, window_buckets)
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vocabulary: Dict[Tuple[int, str], int] = {}
+            self._terms: List[Optional[str]] = []  # None for freed rows
+            self._free: List[int] = []
+            self._kinds = np.zeros(0, dtype=np.int8)
+            self._counts = np.zeros((0, self.window_buckets), dtype=np.int32)
+            self._totals = np.zeros(self.window_buckets, dtype=np.int32)
+            self._latest: Optional[int] = None  # newest bucket in the window
+            self._titles: List[Optional[str]] = []  # latest chunk title per row
+
+    def __len__(self) -> int:
+        return len(self._vocabulary)
+
+    def bucket_of(self, ordinal: int) -> int:
+        return ordinal // self.bucket_days
+
+    def bucket_start(self, bucket: int) -> date:
+        return date.fromordinal(max(1, bucket * self.bucket_days))
+
+    def _column_locked(self, bucket: int) -> Optional[int]:
+        """Ring buffer column of a bucket, moving the window forward to it; None if older than the window"""
+        if self._latest is not None and bucket <= self._latest - self.window_buckets:
+            return None
+        if self._latest is None or bucket > self._latest:
+            if self._latest is not None:
+                # Columns of the buckets that fall out of the window are reused
+                stale = min(bucket - self._latest, self.window_buckets)
+                columns = [(self._latest + offset) % self.window_buckets for offset in range(1, stale + 1)]
+                self._counts[:, columns] = 0
+                self._totals[columns] = 0
+            self._latest = bucket
+        return bucket % self.window_buckets
+
+    def _row_locked(self, kind: int, term: str) -> int:
+        row = self._vocabulary.get((kind, term))
+        if row is not None:
+            return row
+        if not self._free and len(self._terms) >= self.max_terms:
+            self._evict_locked()
+        if self._free:
+            row = self._free.pop()
+            self._terms[row] = term
+        else:
+            row = len(self._terms)
+            if row >= self._counts.shape[0]:
+                capacity = min(self.max_terms, max(1024, 2 * self._counts.shape[0]))
+                counts = np.zeros((capacity, self.window_buckets), dtype=np.int32)
+                counts[:self._counts.shape[0]] = self._counts
+                self._counts = counts
+                kinds = np.zeros(capacity, dtype=np.int8)
+                kinds[:len(self._kinds)] = self._kinds
+                self._kinds = kinds
+            self._terms.append(term)
+            self._titles.append(None)
+        self._vocabulary[(kind, term)] = row
+        self._kinds[row] = kind
+        return row
+
+    def _evict_locked(self) -> None:
+        """Free the rows with the fewest mentions in the window, keeping rows seen in the latest bucket"""
+        rows = len(self._terms)
+        count = max(1, int(rows * EVICT_FRACTION))
+        mentions = self._counts[:rows].sum(axis=1, dtype=np.int64)
+        if self._latest is not None:
+            # A term that just started to appear is what detection looks for
+            current = self._counts[:rows, self._latest % self.window_buckets] > 0
+            mentions[current] += int(mentions.max()) + 1
+        evicted = np.argpartition(mentions, count - 1)[:count]
+        for row in evicted.tolist():
+            del self._vocabulary[(int(self._kinds[row]), self._terms[row])]
+            self._terms[row] = None
+            self._titles[row] = None
+        self._counts[evicted] = 0
+        self._free.extend(evicted.tolist())
+
+    def _parse(self, documents: Sequence[Document]) -> List[Tuple[int, set, set, Optional[str]]]:
+        """(bucket, terms, entities, title) of every dated chunk"""
+        parsed = []
+        for doc in documents:
+            ordinal = to_ordinal(doc.metadata.get("date"))
+            if ordinal == MISSING_DATE:
+                ordinal = to_ordinal(doc.metadata.get("loaded_at"))
+            if ordinal == MISSING_DATE:
+                continue
+            terms, entities = extract_terms(doc.page_content)
+            organization = doc.metadata.get("organization")
+            if organization:
+                entities.add(str(organization))
+            parsed.append((self.bucket_of(ordinal), terms, entities, doc.metadata.get("title")))
+        return parsed
+
+    def add(self, documents: Sequence[Document]) -> int:
+        """Count the terms of newly ingested chunks; returns the chunks counted (dated, within the window)"""
+        start = time.perf_counter()
+        # Tokenize outside the lock
+        parsed = self._parse(documents)
+        counted = self._count(parsed)
+        self._persist(parsed, 1)
+        TREND_SECONDS.observe(time.perf_counter() - start, stage="update")
+        return counted
+
+    def _count(self, parsed: List[Tuple[int, set, set, Optional[str]]]) -> int:
+        counted = 0
+        with self._lock:
+            for bucket, terms, entities, title in parsed:
+                column = self._column_locked(bucket)
+                if column is None:
+                    continue
+                # Counted one term at a time: an eviction may reuse rows not counted yet
+                for kind, names in ((TERM, terms), (ENTITY, entities)):
+                    for name in names:
+                        row = self._row_locked(kind, name)
+                        self._counts[row, column] += 1
+                        if title:
+                            self._titles[row] = title
+                self._totals[column] += 1
+                counted += 1
+        return counted
+
+    def remove(self, documents: Sequence[Document]) -> int:
+        """
+        Subtract the terms of deleted chunks; returns the chunks subtracted
+
+        Documents must carry the text and metadata they were added with.
+        Rows are kept (a term may come back), chunks outside the window are
+        skipped, and counts never go below zero, e.g. for chunks stored
+        before the index was built.
+        """
+        start = time.perf_counter()
+        parsed = self._parse(documents)
+
+        removed = 0
+        with self._lock:
+            for bucket, terms, entities, _ in parsed:
+                if self._latest is None or not self._latest - self.window_buckets < bucket <= self._latest:
+                    continue
+                column = bucket % self.window_buckets
+                rows = [self._vocabulary.get((TERM, term)) for term in terms]
+                rows += [self._vocabulary.get((ENTITY, entity)) for entity in entities]
+                rows = np.array([row for row in rows if row is not None], dtype=np.int64)
+                self._counts[rows, column] = np.maximum(self._counts[rows, column] - 1, 0)
+                self._totals[column] = max(0, self._totals[column] - 1)
+                removed += 1
+        self._persist(parsed, -1)
+        TREND_SECONDS.observe(time.perf_counter() - start, stage="update")
+        return removed
+
+    def _persist(self, parsed: List[Tuple[int, set, set, Optional[str]]], sign: int) -> None:
+        """Add the counts of parsed chunks (sign 1) or subtract them (-1) in the store"""
+        if self.store is None or not parsed:
+            return
+        deltas: Dict[Tuple[int, str, int], int] = {}
+        titles: Dict[Tuple[int, str, int], str] = {}
+        for bucket, terms, entities, title in parsed:
+            keys = [(TERM, term, bucket) for term in terms] + [(ENTITY, entity, bucket) for entity in entities]
+            keys.append((TOTAL, "", bucket))
+            for key in keys:
+                deltas[key] = deltas.get(key, 0) + sign
+                if title and sign > 0:
+                    titles[key] = title
+        try:
+            self.store.apply(self.bucket_days, [
+                (kind, term, bucket, delta, titles.get((kind, term, bucket)))
+                for (kind, term, bucket), delta in deltas.items()
+            ])
+        except Exception as e:
+            # The in-memory counts stay right; the persisted ones miss this change
+            ERRORS.inc(component="trends")
+            logger.error(f"Failed to persist trend counts: {e}")
+
+    def load(self) -> int:
+        """Replace the in-memory counts with the persisted ones of the window; returns its chunks"""
+        if self.store is None:
+            return 0
+        start = time.perf_counter()
+        latest = self.store.latest_bucket(self.bucket_days)
+        rows = [] if latest is None else list(self.store.rows(self.bucket_days, latest - self.window_buckets + 1))
+        self.clear()
+        with self._lock:
+            for kind, term, bucket, count, title in rows:
+                column = self._column_locked(bucket)
+                if count <= 0 or column is None:
+                    continue
+                if kind == TOTAL:
+                    self._totals[column] += count
+                    continue
+                row = self._row_locked(kind, term)
+                self._counts[row, column] = count
+                if title:
+                    self._titles[row] = title
+            chunks = int(self._totals.sum())
+        TREND_SECONDS.observe(time.perf_counter() - start, stage="load")
+        logger.info(f"Trend index loaded {len(rows)} persisted counts ({chunks} chunks in the window)")
+        return chunks
+
+    def reset(self) -> None:
+        """Drop all counts, persisted ones included (e.g. when the corpus is cleared)"""
+        self.clear()
+        if self.store is not None:
+            self.store.clear(self.bucket_days)
+
+    def rebuild(self, documents: Sequence[Document]) -> int:
+        """Recount from scratch in memory (e.g. from the stored corpus at startup)"""
+        self.clear()
+        return self._count(self._parse(documents))
+
+    def window(self, end_bucket: Optional[int], size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Optional[str]], int]:
+        """
+        Copy of the last `size` buckets up to end_bucket (default: the latest bucket)
+
+        Buckets outside the index's window read as zero. Freed rows have
+        zero counts and no term.
+
+        Returns:
+            (counts [rows x size], totals [size], kinds [rows], terms, end bucket)
+        """
+        with self._lock:
+            rows = len(self._terms)
+            if self._latest is None:
+                return (np.zeros((0, size), dtype=np.int32), np.zeros(size, dtype=np.int32),
+                        np.zeros(0, dtype=np.int8), [], 0)
+            if end_bucket is None:
+                end_bucket = self._latest
+            buckets = np.arange(end_bucket - size + 1, end_bucket + 1)
+            held = (buckets > self._latest - self.window_buckets) & (buckets <= self._latest)
+            columns = buckets[held] % self.window_buckets
+            counts = np.zeros((rows, size), dtype=np.int32)
+            totals = np.zeros(size, dtype=np.int32)
+            counts[:, held] = self._counts[:rows][:, columns]
+            totals[held] = self._totals[columns]
+            return counts, totals, self._kinds[:rows].copy(), list(self._terms), end_bucket
+
+    def example_title(self, row: int) -> Optional[str]:
+        """Title of the latest chunk counted for a row"""
+        with self._lock:
+            return self._titles[row] if row < len(self._titles) else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "terms": len(self._vocabulary),
+                "chunks": int(self._totals.sum()),
+                "buckets": int(np.count_nonzero(self._totals)),
+                "window_buckets": self.window_buckets,
+                "bucket_days": self.bucket_days,
+                "first_bucket": (
+                    self.bucket_start(self._latest - self.window_buckets + 1).isoformat()
+                    if self._latest is not None else None
+                ),
+                "matrix_bytes": int(self._counts.nbytes)
+            }
+
+class SupabaseTrendCounts:
+    """
+    Trend counts persisted in a Supabase table (SUPABASE_TREND_TABLE)
+
+    One row per (bucket_days, kind, term, bucket) with its chunk count and
+    latest example title; kind -1 rows count all chunks of a bucket.
+    Changes go through the `add_<table>` function, which adds them in the
+    database, so every worker writes its own documents' counts without
+    overwriting another's. See the README for the table and function.
+    """
+
+    def __init__(self, client, table: str):
+        self.client = client
+        self.table = table
+
+    def apply(self, bucket_days: int, deltas: List[Tuple[int, str, int, int, Optional[str]]]) -> None:
+        """Add (kind, term, bucket, count change, title) rows (counts never go below zero)"""
+        for start in range(0, len(deltas), PERSIST_BATCH):
+            self.client.rpc(f"add_{self.table}", {"deltas": [
+                {"bucket_days": bucket_days, "kind": kind, "term": term, "bucket": bucket, "count": count, "title": title}
+                for kind, term, bucket, count, title in deltas[start:start + PERSIST_BATCH]
+            ]}).execute()
+
+    def latest_bucket(self, bucket_days: int) -> Optional[int]:
+        """Newest bucket with counted chunks"""
+        rows = self.client.table(self.table).select("bucket").eq("bucket_days", bucket_days).eq("kind", TOTAL) \
+            .gt("count", 0).order("bucket", desc=True).limit(1).execute().data
+        return int(rows[0]["bucket"]) if rows else None
+
+    def rows(self, bucket_days: int, since: int, page_size: int = 1000) -> Iterator[Tuple[int, str, int, int, Optional[str]]]:
+        """(kind, term, bucket, count, title) of the persisted counts from bucket `since` on, paged"""
+        offset = 0
+        while True:
+            page = self.client.table(self.table).select("kind, term, bucket, count, title") \
+                .eq("bucket_days", bucket_days).gte("bucket", since).gt("count", 0) \
+                .order("kind").order("term").order("bucket") \
+                .range(offset, offset + page_size - 1).execute().data
+            if not page:
+                return
+            for row in page:
+                yield int(row["kind"]), row["term"], int(row["bucket"]), int(row["count"]), row.get("title")
+            offset += len(page)
+
+    def clear(self, bucket_days: int) -> None:
+        self.client.table(self.table).delete().eq("bucket_days", bucket_days).execute()
+
+def detect_emerging(
+    counts: np.ndarray,
+    totals: np.ndarray,
+    recent: int,
+    baseline: int,
+    min_count: int = 3,
+    z_threshold: float = 2.0
+) -> Dict[str, np.ndarray]:
+    """
+    Vectorized emerging-term statistics over a (terms x buckets) window
+
+    The last `recent` buckets are compared with the `baseline` buckets
+    before them, on each term's share of chunks per bucket:
+    - z: (recent share - baseline mean share) / baseline std, with the std
+      floored by the binomial noise of the baseline counts
+    - burst: smoothed ratio of recent to baseline share
+    - streak: consecutive recent buckets whose rolling z-score (against
+      the preceding `baseline` buckets, via cumulative sums) exceeds
+      z_threshold
+    Terms below z_threshold or with fewer than min_count recent mentions
+    score 0.
+    """
+    counts = counts.astype(np.float64)
+    totals = totals.astype(np.float64)
+    shares = counts / np.maximum(totals, 1.0)
+
+    base = shares[:, -(recent + baseline):-recent]
+    base_totals = totals[-(recent + baseline):-recent]
+    mean = base.mean(axis=1)
+    std = base.std(axis=1)
+    base_chunks = max(base_totals.mean(), 1.0)
+    noise = np.sqrt(np.maximum(mean * (1.0 - mean), 1.0 / base_chunks) / base_chunks)
+    spread = np.maximum(std, noise)
+
+    recent_counts = counts[:, -recent:].sum(axis=1)
+    recent_total = max(totals[-recent:].sum(), 1.0)
+    recent_share = recent_counts / recent_total
+    z = (recent_share - mean) / spread
+
+    prior = 1.0 / max(recent_total, base_chunks)
+    burst = (recent_share + prior) / (mean + prior)
+
+    # Rolling z-score of each recent bucket against the `baseline` buckets before it
+    cumulative = np.concatenate([np.zeros((shares.shape[0], 1)), np.cumsum(shares, axis=1)], axis=1)
+    cumulative_sq = np.concatenate([np.zeros((shares.shape[0], 1)), np.cumsum(shares ** 2, axis=1)], axis=1)
+    columns = np.arange(shares.shape[1] - recent, shares.shape[1])
+    window_sum = cumulative[:, columns] - cumulative[:, columns - baseline]
+    window_sq = cumulative_sq[:, columns] - cumulative_sq[:, columns - baseline]
+    rolling_mean = window_sum / baseline
+    rolling_std = np.sqrt(np.maximum(window_sq / baseline - rolling_mean ** 2, 0.0))
+    rolling_z = (shares[:, columns] - rolling_mean) / np.maximum(rolling_std, noise[:, None])
+    above = rolling_z > z_threshold
+    # Length of the run of True at the end of each row
+    streak = np.where(above.all(axis=1), recent, np.argmin(above[:, ::-1], axis=1))
+
+    eligible = recent_counts >= min_count
+    score = np.where(eligible & (z >= z_threshold), z * np.log1p(recent_counts), 0.0)
+    return {
+        "score": score,
+        "z": z,
+        "burst": burst,
+        "streak": streak,
+        "recent_counts": recent_counts,
+        "baseline_share": mean,
+        "recent_share": recent_share
+    }
+
+
+class IssuePredictor:
+    """
+    Emerging-issue predictions from the trend index
+
+    Statistics are computed for the whole vocabulary at once; only the
+    `narrative_candidates` best-scoring terms are described by the LLM.
+    """
+
+    def __init__(
+        self,
+        rag_chain,
+        index: TrendIndex,
+        recent_buckets: int = 2,
+        baseline_buckets: int = 12,
+        min_count: int = 3,
+        z_threshold: float = 2.0,
+        narrative_candidates: int = 5
+    ):
+        self.rag_chain = rag_chain
+        self.index = index
+        self.recent_buckets = recent_buckets
+        self.baseline_buckets = baseline_buckets
+        self.min_count = min_count
+        self.z_threshold = z_threshold
+        self.narrative_candidates = narrative_candidates
+        self.narrative_prompt = ChatPromptTemplate.from_template(NARRATIVE_TEMPLATE)
+
+    def candidates(self, as_of: Optional[str] = None, top_k: int = 10) -> Dict[str, Any]:
+        """Top emerging terms/entities with their statistics and recent series"""
+        start = time.perf_counter()
+        end_bucket = None
+        if as_of:
+            ordinal = to_ordinal(as_of)
+            if ordinal == MISSING_DATE:
+                raise ValueError(f"Invalid as_of date: {as_of}")
+            end_bucket = self.index.bucket_of(ordinal)
+        size = self.recent_buckets + self.baseline_buckets
+        counts, totals, kinds, terms, end_bucket = self.index.window(end_bucket, size)
+
+        results = []
+        if len(terms):
+            stats = detect_emerging(counts, totals, self.recent_buckets, self.baseline_buckets,
+                                    self.min_count, self.z_threshold)
+            score = stats["score"]
+            k = min(top_k, int(np.count_nonzero(score)))
+            if k:
+                rows = np.argpartition(-score, k - 1)[:k]
+                rows = rows[np.argsort(-score[rows])]
+                for row in rows.tolist():
+                    results.append({
+                        "term": terms[row],
+                        "kind": KIND_NAMES[kinds[row]],
+                        "score": round(float(score[row]), 3),
+                        "z_score": round(float(stats["z"][row]), 2),
+                        "burst_ratio": round(float(stats["burst"][row]), 2),
+                        "streak": int(stats["streak"][row]),
+                        "recent_count": int(stats["recent_counts"][row]),
+                        "recent_share": round(float(stats["recent_share"][row]), 4),
+                        "baseline_share": round(float(stats["baseline_share"][row]), 4),
+                        "series": counts[row].tolist(),
+                        "example": self.index.example_title(row)
+                    })
+        TREND_SECONDS.observe(time.perf_counter() - start, stage="detect")
+        return {
+            "candidates": results,
+            "window": {
+                "start": self.index.bucket_start(end_bucket - size + 1).isoformat() if terms else None,
+                "end": self.index.bucket_start(end_bucket).isoformat() if terms else None,
+                "bucket_days": self.index.bucket_days,
+                "chunks": totals.tolist()
+            }
+        }
+
+    def predict(self, as_of: Optional[str] = None, top_k: int = 10, narrative: bool = True) -> Dict[str, Any]:
+        """Predictions ({issue, probability, impact, recommendation}) for the top emerging candidates"""
+        with tracer.span("trends.predict", top_k=top_k):
+            detected = self.candidates(as_of, top_k)
+            predictions = [_statistical_prediction(candidate) for candidate in detected["candidates"]]
+            if narrative and predictions and self.rag_chain.llm is not None:
+                self._describe(detected["candidates"][:self.narrative_candidates], predictions)
+        return {"predictions": predictions, "window": detected["window"], "index": self.index.stats()}
+
+    def _describe(self, candidates: List[Dict[str, Any]], predictions: List[Dict[str, Any]]) -> None:
+        """Replace the templated text of the top predictions with the LLM's (kept on failure)"""
+        lines = [
+            f"{i}. {candidate['term']} ({candidate['kind']}): z={candidate['z_score']}, "
+            f"burst={candidate['burst_ratio']}, mentions={candidate['recent_count']}, "
+            f"example: {candidate['example'] or '-'}"
+            for i, candidate in enumerate(candidates, 1)
+        ]
+        try:
+            prompt = self.narrative_prompt.invoke({"candidates": "\n".join(lines)})
+            text = self.rag_chain._call_llm("issues", prompt).content
+        except Exception as e:
+            ERRORS.inc(component="trends")
+            logger.error(f"Issue narrative failed: {e}")
+            return
+        # Matched on the echoed candidate number (or term), so skipped or reordered lines keep their candidate
+        numbers = {candidate["term"]: i for i, candidate in enumerate(candidates, 1)}
+        for key, parsed in _parse_predictions(text):
+            number = int(key) if key.isdigit() else numbers.get(key)
+            if number is not None and 1 <= number <= len(candidates):
+                predictions[number - 1].update(parsed)
+
+
+def _statistical_prediction(candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """Prediction from the statistics alone (used when no narrative is generated)"""
+    z = candidate["z_score"]
+    probability = 1.0 / (1.0 + np.exp(-(z - 3.0)))
+    if z >= 4.0 or candidate["burst_ratio"] >= 3.0:
+        impact = "high"
+    elif z >= 2.5:
+        impact = "medium"
+    else:
+        impact = "low"
+    return {
+        "issue": f"'{candidate['term']}' 언급 급증 (최근 {candidate['recent_count']}건, z={z})",
+        "probability": round(float(probability), 2),
+        "impact": impact,
+        "recommendation": "관련 동향 모니터링 강화",
+        **candidate
+    }
+
+
+_PREDICTION_LINE = re.compile(
+    r"^\s*[-*]?\s*(.+?)[.)]?\s*\|\s*(.+?)\s*\|\s*([01](?:\.\d+)?)\s*\|\s*(high|medium|low)\s*\|\s*(.+?)\s*$",
+    re.IGNORECASE
+)
+
+
+def _parse_predictions(text: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """(candidate number or term, prediction) of every well-formed line"""
+    parsed = []
+    for line in text.splitlines():
+        match = _PREDICTION_LINE.match(line)
+        if match:
+            key, issue, probability, impact, recommendation = match.groups()
+            parsed.append((key.strip(), {
+                "issue": issue,
+                "probability": min(1.0, float(probability)),
+                "impact": impact.lower(),
+                "recommendation": recommendation
+            }))
+    return parsed
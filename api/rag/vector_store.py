@@ -2,61 +2,272 @@
 Vector Store module for STRIX v2
 Handles Supabase vector database operations
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union, Iterator, Tuple, TYPE_CHECKING
+import numpy as np
 from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import SupabaseVectorStore
-from supabase import create_client, Client
+from langchain_core.embeddings import Embeddings
 import logging
 from ..config import config
+from .metrics import EMBEDDING_SECONDS, VECTOR_SEARCH_SECONDS, ERRORS
+from .tracing import tracer, SPAN_KIND_CLIENT
+from .fakes import FakeEmbeddings
+from .local_store import LocalVectorStore
+from .sharded_store import ShardedVectorStore
+from .metadata_index import split_filter, matches_filter
+from .retrieval_cache import RetrievalCache, filter_key
+from .mmr import mmr_select
+from .recency import RecencyScorer
+from .trends import TrendIndex, SupabaseTrendCounts
+from .context import ChunkIndex, SECTION_FIELDS, section_key
+from .ingest import IngestPipeline, AdaptiveBatchSizer
+from .registry import registry
+
+if TYPE_CHECKING:
+    # Provider SDKs are imported when the configured backend is initialized
+    from langchain_community.vectorstores import SupabaseVectorStore
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
+# Over-fetch factor when set/range conditions must be applied after a Supabase search
+POST_FILTER_FETCH_FACTOR = 4
+# IDs per Supabase `id in (...)` request
+GET_BY_IDS_BATCH = 100
+# Rows per Supabase page in get_documents (PostgREST's default max-rows)
+SUPABASE_PAGE_SIZE = 1000
+
+class InstrumentedEmbeddings(Embeddings):
+    """Embeddings wrapper recording latency of every embedding call (and caching query embeddings)"""
+    
+    def __init__(self, embeddings: Embeddings, cache: Optional[RetrievalCache] = None):
+        self.embeddings = embeddings
+        self.cache = cache
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with EMBEDDING_SECONDS.time(operation="documents"), \
+                tracer.span("embeddings.embed_documents", kind=SPAN_KIND_CLIENT, texts=len(texts)):
+            return self.embeddings.embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        version = 0
+        if self.cache is not None:
+            cached, version = self.cache.get(text)
+            if cached is not None:
+                return cached.tolist()
+        with EMBEDDING_SECONDS.time(operation="query"), \
+                tracer.span("embeddings.embed_query", kind=SPAN_KIND_CLIENT):
+            embedding = self.embeddings.embed_query(text)
+        if self.cache is not None:
+            self.cache.put(text, np.asarray(embedding, dtype=np.float32), version)
+        return embedding
+
 class STRIXVectorStore:
     """Manages vector store operations for STRIX RAG system"""
     
     def __init__(self):
         """Initialize vector store with Supabase"""
-        self.client: Optional[Client] = None
-        self.vector_store: Optional[SupabaseVectorStore] = None
+        self.client: Optional["Client"] = None
+        self.vector_store: Optional[Union["SupabaseVectorStore", LocalVectorStore, ShardedVectorStore]] = None
         self.embeddings = None
+        # Per-worker LRU caches, over the cross-worker tier when SHARED_CACHE_BACKEND is set
+        shared = registry.shared_cache()
+        self.cache: Optional[RetrievalCache] = None
+        if config.RETRIEVAL_CACHE_SIZE > 0:
+            self.cache = RetrievalCache.for_collection(
+                config.VECTOR_COLLECTION_NAME,
+                config.RETRIEVAL_CACHE_SIZE,
+                config.RETRIEVAL_CACHE_TTL_SECONDS,
+                shared=shared,
+                version_poll_seconds=config.SHARED_CACHE_VERSION_POLL_SECONDS
+            )
+        # Generated answers depend on the corpus too, so they share its version
+        self.answer_cache: Optional[RetrievalCache] = None
+        if config.ANSWER_CACHE_SIZE > 0:
+            self.answer_cache = RetrievalCache.for_collection(
+                config.VECTOR_COLLECTION_NAME,
+                config.ANSWER_CACHE_SIZE,
+                config.ANSWER_CACHE_TTL_SECONDS,
+                kind="answer",
+                shared=shared,
+                version_poll_seconds=config.SHARED_CACHE_VERSION_POLL_SECONDS
+            )
+        # Query embeddings depend only on the model
+        self.embedding_cache: Optional[RetrievalCache] = None
+        if config.EMBEDDING_CACHE_SIZE > 0:
+            model = config.EMBEDDING_MODEL if config.EMBEDDING_PROVIDER == 'openai' else config.EMBEDDING_PROVIDER
+            dimensions = config.EMBEDDING_DIMENSIONS if config.EMBEDDING_PROVIDER == 'openai' else config.FAKE_EMBEDDING_DIMENSIONS
+            self.embedding_cache = RetrievalCache.for_collection(
+                f"{model}:{dimensions}",
+                config.EMBEDDING_CACHE_SIZE,
+                config.EMBEDDING_CACHE_TTL_SECONDS,
+                kind="embedding",
+                shared=shared,
+                version_name=f"embedding:{model}:{dimensions}"
+            )
+        
+        # Term/entity counts per date bucket, updated on every add_documents
+        self.trends: Optional[TrendIndex] = None
+        # Chunks by (source, start_index) for context expansion, updated on every write
+        self.chunks: Optional[ChunkIndex] = None
+        # Bulk embedding/writing for add_documents; the sizer keeps the learned batch size between calls
+        self.ingest: Optional[IngestPipeline] = None
         
         if not config.MOCK_MODE:
             self._initialize_store()
+            self.ingest = IngestPipeline(
+                self.embeddings,
+                self.vector_store.add_vectors,
+                AdaptiveBatchSizer(
+                    batch_tokens=config.INGEST_BATCH_TOKENS,
+                    min_tokens=config.INGEST_MIN_BATCH_TOKENS,
+                    max_tokens=config.INGEST_MAX_BATCH_TOKENS,
+                    max_concurrency=config.INGEST_MAX_CONCURRENCY,
+                    target_seconds=config.INGEST_TARGET_SECONDS
+                ),
+                max_retries=config.INGEST_MAX_RETRIES
+            )
+            if config.TREND_INDEX_ENABLED:
+                # On Supabase the counts can be kept in a table instead of recounted from the corpus
+                trend_store = None
+                if self.client is not None and config.SUPABASE_TREND_TABLE:
+                    trend_store = SupabaseTrendCounts(self.client, config.SUPABASE_TREND_TABLE)
+                self.trends = TrendIndex(
+                    config.TREND_BUCKET_DAYS, config.TREND_MAX_TERMS, trend_store,
+                    window_buckets=config.TREND_RECENT_BUCKETS + config.TREND_BASELINE_BUCKETS
+                )
+                if trend_store is not None:
+                    self.trends.load()
+            if config.CONTEXT_EXPANSION != "none":
+                self.chunks = ChunkIndex()
+            # Trend counts still to be built from the stored documents
+            rebuild_trends = self.trends is not None and self.trends.store is None
+            if self.client is not None and not config.SUPABASE_PREBUILD_INDEXES:
+                # Unindexed chunks are expanded from a metadata query instead (expand_context)
+                if rebuild_trends:
+                    logger.warning(
+                        "The trend index starts empty on Supabase and covers only documents added by this "
+                        "process (set SUPABASE_TREND_TABLE to persist trend counts, "
+                        "SUPABASE_PREBUILD_INDEXES=true reads the table at startup)"
+                    )
+            elif rebuild_trends or self.chunks is not None:
+                # Index the documents already stored (persistent or shared index), once
+                stored = self.get_documents()
+                if rebuild_trends:
+                    counted = self.trends.rebuild(stored)
+                    logger.info(f"Trend index built from {counted} stored chunks")
+                if self.chunks is not None:
+                    indexed = self.chunks.add(stored)
+                    logger.info(f"Chunk position index built from {indexed} stored chunks")
     
     def _initialize_store(self):
-        """Initialize Supabase client and vector store"""
+        """Initialize embeddings and the configured vector backend"""
         try:
-            # Initialize Supabase client
-            self.client = create_client(
-                config.SUPABASE_URL,
-                config.SUPABASE_KEY
-            )
-            
             # Initialize embeddings
-            self.embeddings = OpenAIEmbeddings(
-                model=config.EMBEDDING_MODEL,
-                openai_api_key=config.OPENAI_API_KEY
-            )
+            self.embeddings = InstrumentedEmbeddings(self._initialize_embeddings(), self.embedding_cache)
             
-            # Initialize vector store
-            self.vector_store = SupabaseVectorStore(
-                client=self.client,
-                embedding=self.embeddings,
-                table_name=config.VECTOR_COLLECTION_NAME,
-                query_name=f"match_{config.VECTOR_COLLECTION_NAME}"
-            )
+            if config.VECTOR_BACKEND == 'local' and config.LOCAL_INDEX_SHARDS > 1:
+                # Shard worker processes shared by all stores of this collection
+                self.vector_store = ShardedVectorStore.for_collection(
+                    config.VECTOR_COLLECTION_NAME,
+                    self.embeddings
+                )
+            elif config.VECTOR_BACKEND == 'local':
+                # In-process index shared by all stores of this collection
+                self.vector_store = LocalVectorStore.for_collection(
+                    config.VECTOR_COLLECTION_NAME,
+                    self.embeddings
+                )
+            elif config.VECTOR_BACKEND == 'supabase':
+                from langchain_community.vectorstores import SupabaseVectorStore
+                from supabase import create_client
+                
+                # Initialize Supabase client
+                self.client = create_client(
+                    config.SUPABASE_URL,
+                    config.SUPABASE_KEY
+                )
+                
+                # Initialize vector store
+                self.vector_store = SupabaseVectorStore(
+                    client=self.client,
+                    embedding=self.embeddings,
+                    table_name=config.VECTOR_COLLECTION_NAME,
+                    query_name=f"match_{config.VECTOR_COLLECTION_NAME}"
+                )
+            else:
+                raise ValueError(f"Unsupported vector backend: {config.VECTOR_BACKEND}")
             
-            logger.info("Vector store initialized successfully")
+            logger.info(f"Vector store initialized successfully ({config.VECTOR_BACKEND})")
             
         except Exception as e:
             logger.error(f"Failed to initialize vector store: {e}")
             raise
     
+    def _initialize_embeddings(self) -> Embeddings:
+        """Initialize embeddings based on configuration"""
+        if config.EMBEDDING_PROVIDER == 'openai':
+            from langchain_openai import OpenAIEmbeddings
+            return OpenAIEmbeddings(
+                model=config.EMBEDDING_MODEL,
+                openai_api_key=config.OPENAI_API_KEY,
+                # Matryoshka truncation by the API (text-embedding-3-*); must match the table's vector column
+                dimensions=config.EMBEDDING_DIMENSIONS or None,
+                # Keep-alive connection pool shared with the chat model
+                http_client=registry.http_client()
+            )
+        elif config.EMBEDDING_PROVIDER == 'fake':
+            return FakeEmbeddings(
+                dimensions=config.FAKE_EMBEDDING_DIMENSIONS,
+                latency_ms=config.FAKE_EMBEDDING_LATENCY_MS,
+                error_rate=config.FAKE_ERROR_RATE,
+                seed=config.FAKE_SEED,
+                ms_per_1k_tokens=config.FAKE_EMBEDDING_MS_PER_1K_TOKENS,
+                tokens_per_minute=config.FAKE_EMBEDDING_TOKENS_PER_MINUTE
+            )
+        else:
+            raise ValueError(f"Unsupported embedding provider: {config.EMBEDDING_PROVIDER}")
+    
+    def _plan_filter(self, filter: Optional[Dict[str, Any]], k: int) -> tuple:
+        """
+        Decide how a filter is applied
+        
+        The local backend pre-filters with its metadata index. Supabase only
+        supports exact matches in the RPC, so set/range conditions are applied
+        afterwards on an over-fetched result.
+        
+        Returns:
+            (backend filter, post filter, fetch k)
+        """
+        if config.VECTOR_BACKEND == 'local' or not filter:
+            return filter, None, k
+        exact, rest = split_filter(filter)
+        if not rest:
+            return exact, None, k
+        return exact or None, rest, k * POST_FILTER_FETCH_FACTOR
+    
+    def _invalidate_cache(self) -> None:
+        """Bump the corpus version after a write"""
+        for cache in (self.cache, self.answer_cache):
+            if cache is not None:
+                cache.invalidate()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Per-cache, per-layer hit/miss statistics (None for disabled caches)"""
+        shared = registry.shared_cache()
+        return {
+            "retrieval": self.cache.stats() if self.cache is not None else None,
+            "embedding": self.embedding_cache.stats() if self.embedding_cache is not None else None,
+            "answer": self.answer_cache.stats() if self.answer_cache is not None else None,
+            "shared": shared.stats() if shared is not None else None
+        }
+    
     def add_documents(self, documents: List[Document]) -> List[str]:
         """
         Add documents to vector store
         
+        Embedding requests are batched by estimated tokens and run
+        concurrently while finished batches are written (see IngestPipeline).
+        
         Args:
             documents: List of documents to add
             
@@ -67,10 +278,20 @@ class STRIXVectorStore:
             return [f"mock_id_{i}" for i in range(len(documents))]
         
         try:
-            ids = self.vector_store.add_documents(documents)
+            with VECTOR_SEARCH_SECONDS.time(operation="add_documents"), \
+                    tracer.span("vector_store.add_documents", documents=len(documents)):
+                try:
+                    ids = self.ingest.run(documents)
+                finally:
+                    self._invalidate_cache()
+            if self.trends is not None:
+                self.trends.add(documents)
+            if self.chunks is not None:
+                self.chunks.add(documents, ids)
             logger.info(f"Added {len(ids)} documents to vector store")
             return ids
         except Exception as e:
+            ERRORS.inc(component="vector_store")
             logger.error(f"Failed to add documents: {e}")
             raise
     
@@ -86,7 +307,8 @@ class STRIXVectorStore:
         Args:
             query: Search query
             k: Number of results to return
-            filter: Optional metadata filter
+            filter: Optional metadata filter (exact, set or date range conditions,
+                see metadata_index)
             
         Returns:
             List of relevant documents
@@ -96,15 +318,31 @@ class STRIXVectorStore:
         
         k = k or config.MAX_SEARCH_RESULTS
         
+        cache_key = ("similarity_search", query, k, filter_key(filter))
+        version = None
+        if self.cache is not None:
+            cached, version = self.cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+        
         try:
-            results = self.vector_store.similarity_search(
-                query,
-                k=k,
-                filter=filter
-            )
+            backend_filter, post_filter, fetch_k = self._plan_filter(filter, k)
+            with VECTOR_SEARCH_SECONDS.time(operation="similarity_search"), \
+                    tracer.span("vector_store.similarity_search", k=k, filter=str(filter)) as span:
+                results = self.vector_store.similarity_search(
+                    query,
+                    k=fetch_k,
+                    filter=backend_filter
+                )
+                if post_filter:
+                    results = [doc for doc in results if matches_filter(doc.metadata, post_filter)][:k]
+                span.set_attribute("results", len(results))
+            if self.cache is not None:
+                self.cache.put(cache_key, tuple(results), version)
             logger.info(f"Found {len(results)} similar documents")
             return results
         except Exception as e:
+            ERRORS.inc(component="vector_store")
             logger.error(f"Search failed: {e}")
             return []
     
@@ -112,7 +350,8 @@ class STRIXVectorStore:
         self, 
         query: str, 
         k: int = None,
-        filter: Optional[Dict[str, Any]] = None
+        filter: Optional[Dict[str, Any]] = None,
+        recency_weight: Optional[float] = None
     ) -> List[tuple[Document, float]]:
         """
         Search with relevance scores
@@ -120,7 +359,10 @@ class STRIXVectorStore:
         Args:
             query: Search query
             k: Number of results
-            filter: Optional metadata filter
+            filter: Optional metadata filter (exact, set or date range conditions,
+                see metadata_index)
+            recency_weight: Share of the score given to document recency
+                (defaults to config.RECENCY_WEIGHT, 0 = similarity only)
             
         Returns:
             List of (document, score) tuples
@@ -131,23 +373,202 @@ class STRIXVectorStore:
         
         k = k or config.MAX_SEARCH_RESULTS
         
+        recency = RecencyScorer.create(recency_weight)
+        
+        # Cached after the relevance cut-off, which is fixed per process
+        cache_key = (
+            "similarity_search_with_score", query, k, filter_key(filter),
+            recency.cache_key() if recency else None
+        )
+        version = None
+        if self.cache is not None:
+            cached, version = self.cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+        
         try:
-            results = self.vector_store.similarity_search_with_score(
-                query,
-                k=k,
-                filter=filter
+            filtered_results, _ = self._scored_search(query, k, filter, recency)
+            if self.cache is not None:
+                self.cache.put(cache_key, tuple(filtered_results), version)
+            logger.info(f"Found {len(filtered_results)} relevant documents")
+            return filtered_results
+        except Exception as e:
+            ERRORS.inc(component="vector_store")
+            logger.error(f"Search with score failed: {e}")
+            return []
+    
+    def _scored_search(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[Dict[str, Any]],
+        recency: Optional[RecencyScorer]
+    ) -> Tuple[List[tuple[Document, float]], bool]:
+        """
+        Uncached similarity_search_with_score
+        
+        Returns:
+            (results, exhausted) where exhausted means no relevant document
+            ranks below the ones the backend returned, judged on the backend
+            result before the post filter and the relevance cut-off
+        """
+        backend_filter, post_filter, fetch_k = self._plan_filter(filter, k)
+        with VECTOR_SEARCH_SECONDS.time(operation="similarity_search_with_score"), \
+                tracer.span("vector_store.similarity_search_with_score", k=k, filter=str(filter)) as span:
+            if self.client is None:
+                # Local backends apply the relevance cut-off and recency while searching (per shard)
+                results = self.vector_store.similarity_search_with_score(
+                    query,
+                    k=fetch_k,
+                    filter=backend_filter,
+                    score_threshold=config.MIN_RELEVANCE_SCORE,
+                    recency=recency
+                )
+                exhausted = len(results) < fetch_k
+            else:
+                if recency is not None:
+                    # Over-fetch by similarity, then re-rank the candidates by blended score
+                    fetch_k *= config.RECENCY_FETCH_MULTIPLIER
+                results = self.vector_store.similarity_search_with_score(
+                    query,
+                    k=fetch_k,
+                    filter=backend_filter
+                )
+                # The RPC returns similarities in descending order
+                exhausted = len(results) < fetch_k or (
+                    bool(results) and results[-1][1] < config.MIN_RELEVANCE_SCORE
+                )
+            if post_filter:
+                results = [(doc, score) for doc, score in results if matches_filter(doc.metadata, post_filter)]
+                if recency is None:
+                    results = results[:k]
+            span.set_attribute("results", len(results))
+        if recency is not None:
+            # Threshold on similarity; blended scores returned (no-op re-sort for local backends)
+            filtered_results = (
+                results[:k] if self.client is None
+                else recency.rerank(results, k, config.MIN_RELEVANCE_SCORE)
             )
+        else:
             # Filter by minimum relevance score
             filtered_results = [
                 (doc, score) for doc, score in results 
                 if score >= config.MIN_RELEVANCE_SCORE
             ]
-            logger.info(f"Found {len(filtered_results)} relevant documents")
-            return filtered_results
+        return filtered_results, exhausted
+    
+    def search_with_score(
+        self,
+        query: str,
+        k: int = None,
+        filter: Optional[Dict[str, Any]] = None,
+        search_type: Optional[str] = None,
+        mmr_lambda: Optional[float] = None,
+        recency_weight: Optional[float] = None
+    ) -> List[tuple[Document, float]]:
+        """
+        Search with the requested retrieval mode
+        
+        Args:
+            query: Search query
+            k: Number of results
+            filter: Optional metadata filter
+            search_type: "similarity" or "mmr" (defaults to config.SEARCH_TYPE)
+            mmr_lambda: MMR relevance/diversity trade-off (defaults to config.MMR_LAMBDA)
+            recency_weight: Recency share of the score for similarity search
+                (defaults to config.RECENCY_WEIGHT)
+            
+        Returns:
+            List of (document, score) tuples
+        """
+        search_type = search_type or config.SEARCH_TYPE
+        if search_type == "mmr":
+            return self.mmr_search_with_score(query, k=k, filter=filter, lambda_mult=mmr_lambda)
+        if search_type != "similarity":
+            raise ValueError(f"Unsupported search type: {search_type}")
+        return self.similarity_search_with_score(query, k=k, filter=filter, recency_weight=recency_weight)
+    
+    def mmr_search_with_score(
+        self,
+        query: str,
+        k: int = None,
+        filter: Optional[Dict[str, Any]] = None,
+        fetch_k: Optional[int] = None,
+        lambda_mult: Optional[float] = None
+    ) -> List[tuple[Document, float]]:
+        """
+        Search a wider candidate pool and rerank it with Maximal Marginal Relevance
+        
+        Candidates come back with their stored embeddings in the same call, so
+        diversity costs no extra round trip; near-duplicate chunks of one
+        document give way to other relevant chunks.
+        
+        Args:
+            query: Search query
+            k: Number of results
+            filter: Optional metadata filter
+            fetch_k: Candidate pool size (defaults to k * config.MMR_FETCH_MULTIPLIER)
+            lambda_mult: 1.0 = relevance only, 0.0 = diversity only
+            
+        Returns:
+            List of (document, relevance score) tuples in MMR order
+        """
+        if config.MOCK_MODE:
+            docs = self._mock_search(query, k)
+            return [(doc, 0.95 - i*0.05) for i, doc in enumerate(docs)]
+        
+        k = k or config.MAX_SEARCH_RESULTS
+        fetch_k = fetch_k or k * config.MMR_FETCH_MULTIPLIER
+        lambda_mult = config.MMR_LAMBDA if lambda_mult is None else lambda_mult
+        
+        cache_key = ("mmr_search_with_score", query, k, fetch_k, lambda_mult, filter_key(filter))
+        version = None
+        if self.cache is not None:
+            cached, version = self.cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
+        
+        try:
+            backend_filter, post_filter, pool_k = self._plan_filter(filter, fetch_k)
+            with VECTOR_SEARCH_SECONDS.time(operation="mmr_search_with_score"), \
+                    tracer.span("vector_store.mmr_search_with_score", k=k, fetch_k=fetch_k, filter=str(filter)) as span:
+                query_vector = self.embeddings.embed_query(query)
+                candidates = self.vector_store.similarity_search_by_vector_returning_embeddings(
+                    query_vector,
+                    k=pool_k,
+                    filter=backend_filter
+                )
+                candidates = [
+                    (doc, score, vector) for doc, score, vector in candidates
+                    if score >= config.MIN_RELEVANCE_SCORE
+                    and (not post_filter or matches_filter(doc.metadata, post_filter))
+                ][:fetch_k]
+                results = []
+                if candidates:
+                    vectors = self._candidate_vectors(candidates, len(query_vector))
+                    order = mmr_select(np.asarray(query_vector, dtype=np.float32), vectors, k, lambda_mult)
+                    results = [(candidates[i][0], candidates[i][1]) for i in order]
+                span.set_attribute("candidates", len(candidates))
+                span.set_attribute("results", len(results))
+            if self.cache is not None:
+                self.cache.put(cache_key, tuple(results), version)
+            logger.info(f"Selected {len(results)} of {len(candidates)} candidates with MMR")
+            return results
         except Exception as e:
-            logger.error(f"Search with score failed: {e}")
+            ERRORS.inc(component="vector_store")
+            logger.error(f"MMR search failed: {e}")
             return []
     
+    def _candidate_vectors(self, candidates: List[tuple], dimensions: int) -> np.ndarray:
+        """Stack candidate embeddings, re-embedding in one batch if the backend did not return them"""
+        vectors = [vector for _, _, vector in candidates]
+        if all(vector is not None and len(vector) == dimensions for vector in vectors):
+            return np.stack(vectors).astype(np.float32, copy=False)
+        return np.asarray(
+            self.embeddings.embed_documents([doc.page_content for doc, _, _ in candidates]),
+            dtype=np.float32
+        )
+    
     def _mock_search(self, query: str, k: int = None) -> List[Document]:
         """Mock search for testing"""
         k = k or config.MAX_SEARCH_RESULTS
@@ -187,6 +608,229 @@ class STRIXVectorStore:
         
         return mock_docs[:k]
     
+    def get_documents(
+        self,
+        filter: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None
+    ) -> List[Document]:
+        """
+        Stored chunks matching a metadata filter, without a query
+        
+        Args:
+            filter: Metadata filter (same syntax as searches)
+            limit: Maximum number of chunks
+            
+        Returns:
+            List of documents (with their IDs)
+        """
+        if config.MOCK_MODE:
+            return []
+        
+        try:
+            with VECTOR_SEARCH_SECONDS.time(operation="get_documents"), \
+                    tracer.span("vector_store.get_documents", limit=limit):
+                if self.client is None:
+                    return self.vector_store.get_documents(filter=filter, limit=limit)
+                
+                # Exact conditions go to PostgREST (metadata @> ...), the rest is applied here
+                exact, rest = split_filter(filter)
+                documents = []
+                offset = 0
+                # PostgREST caps every response (max-rows): page by ID until a page comes back empty
+                while limit is None or len(documents) < limit:
+                    size = SUPABASE_PAGE_SIZE if limit is None or rest else min(SUPABASE_PAGE_SIZE, limit - len(documents))
+                    query = self.client.table(config.VECTOR_COLLECTION_NAME).select("id, content, metadata")
+                    if exact:
+                        query = query.contains("metadata", exact)
+                    rows = query.order("id").range(offset, offset + size - 1).execute().data
+                    if not rows:
+                        break
+                    offset += len(rows)
+                    page = [
+                        Document(id=str(row["id"]), page_content=row["content"], metadata=row.get("metadata") or {})
+                        for row in rows
+                    ]
+                    if rest:
+                        page = [doc for doc in page if matches_filter(doc.metadata, rest)]
+                    documents.extend(page)
+                return documents[:limit]
+        except Exception as e:
+            ERRORS.inc(component="vector_store")
+            logger.error(f"Failed to get documents: {e}")
+            raise
+    
+    def get_by_ids(self, ids: List[str]) -> List[Document]:
+        """
+        Stored chunks by ID (unknown IDs are skipped)
+        
+        Args:
+            ids: Document IDs
+            
+        Returns:
+            List of documents (with their IDs)
+        """
+        if config.MOCK_MODE or not ids:
+            return []
+        
+        try:
+            with VECTOR_SEARCH_SECONDS.time(operation="get_by_ids"), \
+                    tracer.span("vector_store.get_by_ids", documents=len(ids)):
+                if self.client is None:
+                    return self.vector_store.get_by_ids(ids)
+                
+                documents = []
+                # IDs travel in the request URL: fetch in slices
+                for start in range(0, len(ids), GET_BY_IDS_BATCH):
+                    rows = self.client.table(config.VECTOR_COLLECTION_NAME).select("id, content, metadata") \
+                        .in_("id", ids[start:start + GET_BY_IDS_BATCH]).execute().data
+                    documents.extend(
+                        Document(id=str(row["id"]), page_content=row["content"], metadata=row.get("metadata") or {})
+                        for row in rows
+                    )
+                return documents
+        except Exception as e:
+            ERRORS.inc(component="vector_store")
+            logger.error(f"Failed to get documents by ID: {e}")
+            raise
+    
+    def iter_search(
+        self,
+        query: str,
+        filter: Optional[Dict[str, Any]] = None,
+        recency_weight: Optional[float] = None,
+        after: Optional[Tuple[float, str]] = None,
+        batch_size: int = 500
+    ) -> Iterator[List[tuple[Document, float]]]:
+        """
+        Every relevant document by similarity, in batches of about batch_size
+        
+        Results are ordered by (score desc, document ID asc); `after` is the
+        (score, ID) of the last result already seen, so a cursor built from
+        it resumes exactly there.
+        
+        The local backend scores the candidates once and copies documents
+        batch by batch. Other backends re-run the top-k search with a
+        doubling k and skip what was already returned.
+        
+        Args:
+            query: Search query
+            filter: Optional metadata filter
+            recency_weight: Recency share of the score (defaults to config.RECENCY_WEIGHT)
+            after: Resume after this (score, document ID)
+            batch_size: Documents per batch
+        """
+        if config.MOCK_MODE:
+            results = self.similarity_search_with_score(query, filter=filter)
+            yield [item for item in results if _is_after(item, after)]
+            return
+        
+        recency = RecencyScorer.create(recency_weight)
+        if not isinstance(self.vector_store, LocalVectorStore):
+            yield from self._iter_search_by_top_k(query, filter, recency_weight, after, batch_size)
+            return
+        
+        try:
+            with tracer.span("vector_store.iter_search", filter=str(filter)):
+                embedding = self.embeddings.embed_query(query)
+        except Exception as e:
+            ERRORS.inc(component="vector_store")
+            logger.error(f"Search iteration failed: {e}")
+            raise
+        yield from self.vector_store.iter_similarity_by_vector_with_score(
+            embedding,
+            filter=filter,
+            score_threshold=config.MIN_RELEVANCE_SCORE,
+            recency=recency,
+            after=after,
+            batch_size=batch_size
+        )
+    
+    def _iter_search_by_top_k(
+        self,
+        query: str,
+        filter: Optional[Dict[str, Any]],
+        recency_weight: Optional[float],
+        after: Optional[Tuple[float, str]],
+        batch_size: int
+    ) -> Iterator[List[tuple[Document, float]]]:
+        """iter_search for backends that only answer top-k queries"""
+        recency = RecencyScorer.create(recency_weight)
+        k = batch_size
+        while True:
+            try:
+                results, exhausted = self._scored_search(query, k, filter, recency)
+            except Exception as e:
+                ERRORS.inc(component="vector_store")
+                logger.error(f"Search iteration failed: {e}")
+                raise
+            ranked = sorted(results, key=lambda item: (-item[1], item[0].id or ""))
+            if not exhausted and ranked:
+                # The lowest score may tie with results beyond k: leave it to the next round
+                ranked = [item for item in ranked if item[1] > ranked[-1][1]]
+            ranked = [item for item in ranked if _is_after(item, after)]
+            for start in range(0, len(ranked), batch_size):
+                yield ranked[start:start + batch_size]
+            if exhausted:
+                return
+            if ranked:
+                after = (ranked[-1][1], ranked[-1][0].id or "")
+            k *= 2
+    
+    def expand_context(self, documents: List[Document]) -> List[Document]:
+        """
+        Retrieved chunks widened with their neighbouring chunks for prompting
+        
+        Uses the in-memory chunk position index (no vector query):
+        CONTEXT_EXPANSION=neighbors adds up to CONTEXT_WINDOW_CHUNKS chunks
+        on each side, parent the rest of the page/sheet/file, both within
+        CONTEXT_MAX_CHARS per hit. On Supabase, hits the index does not
+        know (documents added by other processes) are expanded from their
+        section's chunks, read with a metadata query. Documents are
+        returned unchanged when expansion is off.
+        """
+        if self.chunks is None or not documents:
+            return documents
+        window = None if config.CONTEXT_EXPANSION == "parent" else config.CONTEXT_WINDOW_CHUNKS
+        with tracer.span("vector_store.expand_context", documents=len(documents)) as span:
+            missing = [doc for doc in documents if not self.chunks.contains(doc.metadata)]
+            expanded = self.chunks.expand(documents, window, config.CONTEXT_MAX_CHARS)
+            if self.client is not None and missing:
+                sections = self._section_index(missing)
+                if len(sections):
+                    expanded = sections.expand(expanded, window, config.CONTEXT_MAX_CHARS)
+                span.set_attribute("fetched_chunks", len(sections))
+            span.set_attribute("chars", sum(len(doc.page_content) for doc in expanded))
+        return expanded
+    
+    def _section_index(self, documents: List[Document]) -> ChunkIndex:
+        """Position index over the stored chunks of the documents' sections (Supabase)"""
+        sections = ChunkIndex()
+        for key, metadata in {section_key(doc.metadata): doc.metadata for doc in documents}.items():
+            if key is None or metadata.get("start_index") is None:
+                continue
+            # Cached until the corpus changes, like search results
+            cache_key = ("section", key)
+            version = None
+            chunks = None
+            if self.cache is not None:
+                chunks, version = self.cache.get(cache_key)
+            if chunks is None:
+                section_filter = {"source": metadata["source"]}
+                field = next((field for field in SECTION_FIELDS if metadata.get(field) is not None), None)
+                if field is not None:
+                    section_filter[field] = metadata[field]
+                try:
+                    chunks = tuple(
+                        doc for doc in self.get_documents(section_filter) if section_key(doc.metadata) == key
+                    )
+                except Exception:
+                    # Logged by get_documents; the hit keeps its own text
+                    continue
+                if self.cache is not None:
+                    self.cache.put(cache_key, chunks, version)
+            sections.add(list(chunks))
+        return sections
+    
     def delete_documents(self, ids: List[str]) -> bool:
         """
         Delete documents from vector store
@@ -201,24 +845,81 @@ class STRIXVectorStore:
             return True
         
         try:
+            # Deleted chunks' text and dates, to subtract their term counts
+            removed = self.get_by_ids(ids) if self.trends is not None else []
             # Supabase delete implementation
-            for doc_id in ids:
-                self.client.table(config.VECTOR_COLLECTION_NAME).delete().eq('id', doc_id).execute()
+            with VECTOR_SEARCH_SECONDS.time(operation="delete_documents"), \
+                    tracer.span("vector_store.delete_documents", documents=len(ids)):
+                try:
+                    if self.client is None:
+                        self.vector_store.delete(ids)
+                    else:
+                        for doc_id in ids:
+                            self.client.table(config.VECTOR_COLLECTION_NAME).delete().eq('id', doc_id).execute()
+                finally:
+                    self._invalidate_cache()
+            if self.trends is not None:
+                self.trends.remove(removed)
+            if self.chunks is not None:
+                self.chunks.remove(ids)
             logger.info(f"Deleted {len(ids)} documents")
             return True
         except Exception as e:
+            ERRORS.inc(component="vector_store")
             logger.error(f"Failed to delete documents: {e}")
             return False
     
+    def refit_index(self) -> bool:
+        """
+        Re-fit the local index's projection / quantization on the current corpus
+        
+        Returns:
+            Success status (False for backends without a fitted index)
+        """
+        if config.MOCK_MODE or self.client is not None:
+            return False
+        
+        try:
+            try:
+                with tracer.span("vector_store.refit_index"):
+                    self.vector_store.retrain()
+            finally:
+                self._invalidate_cache()
+            logger.info("Re-fitted local index")
+            return True
+        except Exception as e:
+            ERRORS.inc(component="vector_store")
+            logger.error(f"Failed to re-fit index: {e}")
+            return False
+    
     def clear(self) -> bool:
         """Clear all documents from vector store"""
         if config.MOCK_MODE:
             return True
         
         try:
-            self.client.table(config.VECTOR_COLLECTION_NAME).delete().execute()
+            try:
+                if self.client is None:
+                    self.vector_store.clear()
+                else:
+                    self.client.table(config.VECTOR_COLLECTION_NAME).delete().execute()
+            finally:
+                self._invalidate_cache()
+            if self.trends is not None:
+                self.trends.reset()
+            if self.chunks is not None:
+                self.chunks.clear()
             logger.info("Cleared vector store")
             return True
         except Exception as e:
+            ERRORS.inc(component="vector_store")
             logger.error(f"Failed to clear vector store: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+def _is_after(item: tuple[Document, float], after: Optional[Tuple[float, str]]) -> bool:
+    """Whether a result comes after (score, ID) in (score desc, ID asc) order"""
+    if after is None:
+        return True
+    doc, score = item
+    return score < after[0] or (score == after[0] and (doc.id or "") > after[1])
@@ -0,0 +1,436 @@
+"""
+Watcher module for STRIX v2
+Near-real-time incremental indexing of watched folders from inotify events
+"""
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+import ctypes
+import ctypes.util
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from .metrics import WATCH_LAG_SECONDS, ERRORS
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Files are indexed once written and closed (or moved in), never while being written
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+READ_BUFFER_BYTES = 64 * 1024
+# Editor / Office temporary files
+IGNORED_PREFIXES = ("~$", ".")
+# Manifest chunk IDs looked up per request when verifying the manifest at start
+VERIFY_BATCH = 1000
+
+
+class StaleChunksError(RuntimeError):
+    """Chunks a file no longer has could not be deleted from the vector store"""
+
+
+class Inotify:
+    """Minimal ctypes binding of the Linux inotify API"""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("Watching folders requires Linux inotify")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_init1 failed: {os.strerror(error)}")
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return wd
+
+    def read(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """(wd, mask, name) of the events available within timeout seconds"""
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, READ_BUFFER_BYTES)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def parse_watch_dirs(value: str, default_doc_type: str = "internal") -> Dict[str, Dict[str, Any]]:
+    """'path[=doc_type],...' -> {absolute path: metadata added to its documents}"""
+    directories = {}
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        path, _, doc_type = entry.partition("=")
+        directories[os.path.abspath(os.path.expanduser(path.strip()))] = {
+            "doc_type": doc_type.strip() or default_doc_type
+        }
+    return directories
+
+
+class DirectoryWatcher:
+    """
+    Keeps the vector store in sync with a set of folders
+
+    Every folder (recursively) is watched with inotify, so a change costs
+    one event instead of a scan. Events are debounced per file: a file is
+    processed once it has been quiet for `debounce_seconds` (or, under a
+    constant stream of writes, after `max_delay_seconds`), so a save that
+    writes, renames and rewrites a report is indexed once.
+
+    A manifest (path -> content hash and chunk IDs) persisted at
+    `state_path` makes the work incremental: a changed file's new chunks
+    are added before its old chunks are deleted (it never disappears from
+    search), an unchanged rewrite is skipped by hash, and a deleted or
+    moved-away file drops exactly its chunks. At start the manifest's chunk
+    IDs are checked against the store, so files whose chunks are gone (an
+    in-memory index after a restart, a cleared collection) are indexed
+    again, and the folders are reconciled with the manifest (files changed
+    while nothing was watching); after that only events are processed. An inotify queue
+    overflow, which loses events, triggers one more reconciliation.
+
+    One watcher per state file: `start` takes an exclusive lock on it, so
+    several API workers or a CLI watcher never index the same change twice.
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        loader,
+        directories: Dict[str, Dict[str, Any]],
+        state_path: str,
+        debounce_seconds: float = 2.0,
+        max_delay_seconds: float = 30.0
+    ):
+        self.vector_store = vector_store
+        self.loader = loader
+        self.directories = directories
+        self.state_path = state_path
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Tuple[str, float, float]] = {}  # path -> (action, due, first event)
+        self._watches: Dict[int, str] = {}
+        self._inotify: Optional[Inotify] = None
+        self._lock_handle = None
+        self._resync = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"indexed": 0, "unchanged": 0, "deleted": 0, "failed": 0, "events": 0}
+
+    def acquire(self) -> bool:
+        """Take the state file lock; False if another watcher holds it"""
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handle = open(self.state_path + ".lock", "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._lock_handle = handle
+        return True
+
+    def start(self) -> bool:
+        """Watch in a background thread; False if another watcher is running"""
+        if not self.acquire():
+            logger.info(f"Watcher not started: {self.state_path} is locked by another watcher")
+            return False
+        self._thread = threading.Thread(target=self.run, name="strix-watch", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self) -> None:
+        """Reconcile once, then process events until stop()"""
+        self._load_manifest()
+        self._verify_manifest()
+        self._inotify = Inotify()
+        try:
+            for directory in self.directories:
+                if os.path.isdir(directory):
+                    self._watch_tree(directory)
+                else:
+                    logger.warning(f"Watched folder not found: {directory}")
+            logger.info(f"Watching {len(self._watches)} folders under {', '.join(self.directories)}")
+            self.sync()
+            while not self._stop.is_set():
+                now = time.monotonic()
+                timeout = min([due for _, due, _ in self._pending.values()], default=now + 1.0) - now
+                for wd, mask, name in self._inotify.read(min(timeout, 1.0)):
+                    self._handle(wd, mask, name)
+                if self._resync:
+                    self._resync = False
+                    self.sync()
+                self._flush(time.monotonic())
+        finally:
+            self._inotify.close()
+            self._inotify = None
+            if self._lock_handle is not None:
+                self._lock_handle.close()
+                self._lock_handle = None
+
+    def _root_metadata(self, path: str) -> Optional[Dict[str, Any]]:
+        for directory, metadata in self.directories.items():
+            if path == directory or path.startswith(directory + os.sep):
+                return metadata
+        return None
+
+    def _wanted(self, path: str) -> bool:
+        name = os.path.basename(path)
+        return (
+            not name.startswith(IGNORED_PREFIXES)
+            and os.path.splitext(name)[1].lower() in self.loader.supported_extensions
+        )
+
+    def _watch_tree(self, directory: str) -> List[str]:
+        """Watch a folder and its subfolders; returns the files found in them"""
+        files = []
+        for root, subdirectories, names in os.walk(directory):
+            subdirectories[:] = [name for name in subdirectories if not name.startswith(".")]
+            try:
+                self._watches[self._inotify.add_watch(root)] = root
+            except OSError as e:
+                ERRORS.inc(component="watcher")
+                logger.error(f"Cannot watch {root}: {e}")
+                continue
+            files.extend(os.path.join(root, name) for name in names)
+        return [path for path in files if self._wanted(path)]
+
+    def _handle(self, wd: int, mask: int, name: str) -> None:
+        self.stats["events"] += 1
+        if mask & IN_Q_OVERFLOW:
+            ERRORS.inc(component="watcher")
+            logger.warning("inotify queue overflowed: reconciling the watched folders")
+            self._resync = True
+            return
+        directory = self._watches.get(wd)
+        if directory is None:
+            return
+        if mask & IN_IGNORED:
+            del self._watches[wd]
+            return
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            if directory in self.directories:
+                logger.warning(f"Watched folder removed or moved: {directory}")
+                self._schedule_tree(directory, "delete")
+            return
+        path = os.path.join(directory, name)
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                # Files may land before the watch is added: index what is there now
+                for file in self._watch_tree(path):
+                    self._schedule(file, "index")
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._schedule_tree(path, "delete")
+            return
+        if not self._wanted(path):
+            return
+        if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+            self._schedule(path, "index")
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            self._schedule(path, "delete")
+
+    def _schedule(self, path: str, action: str) -> None:
+        """(Re)start a file's debounce period; the last event decides the action"""
+        now = time.monotonic()
+        previous = self._pending.get(path)
+        first = previous[2] if previous else now
+        self._pending[path] = (action, min(now + self.debounce_seconds, first + self.max_delay_seconds), first)
+
+    def _schedule_tree(self, directory: str, action: str) -> None:
+        prefix = directory + os.sep
+        for path in [path for path in self.manifest if path.startswith(prefix)]:
+            self._schedule(path, action)
+
+    def _verify_manifest(self) -> None:
+        """Forget manifest chunks the store no longer has; files missing some are re-indexed by sync"""
+        ids = [doc_id for entry in self.manifest.values() for doc_id in entry["ids"]]
+        if not ids or config.MOCK_MODE:
+            return
+        present = set()
+        try:
+            for start in range(0, len(ids), VERIFY_BATCH):
+                present.update(doc.id for doc in self.vector_store.get_by_ids(ids[start:start + VERIFY_BATCH]))
+        except Exception as e:
+            # Keep the manifest: treating every chunk as missing would index everything twice
+            ERRORS.inc(component="watcher")
+            logger.error(f"Could not verify the watch manifest against the vector store: {e}")
+            return
+        stale = 0
+        for entry in self.manifest.values():
+            kept = [doc_id for doc_id in entry["ids"] if doc_id in present]
+            if len(kept) < len(entry["ids"]):
+                # sync() sees a changed file; _index then deletes the chunks that survived
+                entry.update(ids=kept, size=-1, sha256="")
+                stale += 1
+        if stale:
+            logger.warning(f"Watch manifest: {stale} files have chunks missing from the vector store, re-indexing them")
+
+    def sync(self) -> None:
+        """Reconcile the manifest with the files on disk (start and queue overflow only)"""
+        on_disk = set()
+        for directory in self.directories:
+            for root, subdirectories, names in os.walk(directory):
+                subdirectories[:] = [name for name in subdirectories if not name.startswith(".")]
+                on_disk.update(path for path in (os.path.join(root, name) for name in names) if self._wanted(path))
+        for path in on_disk:
+            entry = self.manifest.get(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+                self._schedule(path, "index")
+        for path in set(self.manifest) - on_disk:
+            self._schedule(path, "delete")
+        logger.info(f"Watch reconciliation: {len(on_disk)} files, {len(self._pending)} to update")
+
+    def _flush(self, now: float) -> None:
+        due = [path for path, (_, deadline, _) in self._pending.items() if deadline <= now]
+        if not due:
+            return
+        for path in due:
+            action, _, first = self._pending.pop(path)
+            try:
+                if action == "index" and os.path.isfile(path):
+                    self._index(path)
+                else:
+                    action = "delete"
+                    self._remove(path)
+            except Exception as e:
+                self.stats["failed"] += 1
+                ERRORS.inc(component="watcher")
+                logger.error(f"Watcher failed to {action} {path}: {e}")
+                if isinstance(e, StaleChunksError) and path not in self._pending:
+                    # The manifest still lists the chunks: retry instead of waiting for another event
+                    self._pending[path] = (action, now + self.max_delay_seconds, first)
+                continue
+            WATCH_LAG_SECONDS.observe(time.monotonic() - first, action=action)
+        self._save_manifest()
+
+    def _index(self, path: str) -> None:
+        """Index a new or changed file; its previous chunks are replaced"""
+        stat = os.stat(path)
+        digest = _file_digest(path)
+        entry = self.manifest.get(path)
+        if entry is not None and entry["sha256"] == digest:
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            self.stats["unchanged"] += 1
+            return
+
+        metadata = dict(self._root_metadata(path) or {})
+        metadata.setdefault("title", os.path.splitext(os.path.basename(path))[0])
+        metadata.setdefault("date", datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d"))
+        chunks = self.loader.load_document(path, metadata)
+        if not chunks:
+            # Unreadable (or mid-copy) file: keep what is indexed, retry on the next event
+            raise ValueError("no chunks loaded")
+        ids = self.vector_store.add_documents(chunks)
+        if entry is not None and entry["ids"] and not self.vector_store.delete_documents(entry["ids"]):
+            # Keep the old digest so the file is re-indexed; the retry deletes both chunk sets
+            entry["ids"] = entry["ids"] + list(ids)
+            raise StaleChunksError(f"previous {len(entry['ids']) - len(ids)} chunks not deleted")
+        self.manifest[path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+            "ids": list(ids)
+        }
+        self.stats["indexed"] += 1
+        logger.info(f"Watcher indexed {path} ({len(ids)} chunks)")
+
+    def _remove(self, path: str) -> None:
+        entry = self.manifest.get(path)
+        if entry is None:
+            return
+        if entry["ids"] and not self.vector_store.delete_documents(entry["ids"]):
+            raise StaleChunksError(f"{len(entry['ids'])} chunks not deleted")
+        del self.manifest[path]
+        self.stats["deleted"] += 1
+        logger.info(f"Watcher removed {path} ({len(entry['ids'])} chunks)")
+
+    def _load_manifest(self) -> None:
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as handle:
+                self.manifest = json.load(handle)
+        except (OSError, ValueError) as e:
+            ERRORS.inc(component="watcher")
+            logger.error(f"Unreadable watch manifest {self.state_path} (re-indexing): {e}")
+            self.manifest = {}
+
+    def _save_manifest(self) -> None:
+        temporary = self.state_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(self.manifest, handle, ensure_ascii=False)
+        os.replace(temporary, self.state_path)
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def create_watcher(
+    vector_store,
+    loader,
+    directories: Optional[Dict[str, Dict[str, Any]]] = None,
+    **options
+) -> DirectoryWatcher:
+    """Watcher over WATCH_DIRS (or the given folders) with the configured settings"""
+    settings = {
+        "state_path": config.WATCH_STATE_PATH or "watch/strix_watch.json",
+        "debounce_seconds": config.WATCH_DEBOUNCE_SECONDS,
+        "max_delay_seconds": config.WATCH_MAX_DELAY_SECONDS
+    }
+    settings.update(options)
+    if directories is None:
+        directories = parse_watch_dirs(config.WATCH_DIRS, config.WATCH_DOC_TYPE)
+    return DirectoryWatcher(vector_store, loader, directories, **settings)
@@ -0,0 +1,81 @@
+"""
+Folder watcher for STRIX v2
+Indexes new, changed and deleted documents in watched folders as they happen
+
+Usage (from the repository root):
+    python -m api.watch /data/reports=internal /data/news=external
+    python -m api.watch            # folders from WATCH_DIRS
+"""
+from typing import List, Optional
+import argparse
+import logging
+import os
+import sys
+
+# The rag package imports config relatively, so load both through the `api` package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.config import config
+from api.rag.registry import registry
+from api.rag.watcher import create_watcher, parse_watch_dirs
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="STRIX v2 folder watcher (incremental indexing)")
+    parser.add_argument("directories", nargs="*", help="Folders as path[=doc_type] (default: WATCH_DIRS)")
+    parser.add_argument("--doc-type", default=config.WATCH_DOC_TYPE, help="doc_type of folders listed without one")
+    parser.add_argument("--debounce", type=float, default=config.WATCH_DEBOUNCE_SECONDS,
+                        help="Seconds a file must be quiet before it is indexed")
+    parser.add_argument("--max-delay", type=float, default=config.WATCH_MAX_DELAY_SECONDS,
+                        help="Index a constantly changing file at the latest after this many seconds")
+    parser.add_argument("--state", default=config.WATCH_STATE_PATH or "watch/strix_watch.json",
+                        help="Manifest of indexed files (also the single-watcher lock)")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+    args.directories = parse_watch_dirs(",".join(args.directories) or config.WATCH_DIRS, args.doc_type)
+    if not args.directories:
+        parser.error("No folders to watch (pass them as arguments or set WATCH_DIRS)")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if config.MOCK_MODE:
+        logger.error("MOCK_MODE is on: documents would not be stored")
+        return 1
+    if config.VECTOR_BACKEND == "local" and not config.LOCAL_INDEX_PERSIST:
+        logger.error(
+            "VECTOR_BACKEND=local without LOCAL_INDEX_PERSIST keeps the index in this process: "
+            "the API server would never see it (use Supabase, LOCAL_INDEX_PERSIST=true or WATCH_ON_STARTUP)"
+        )
+        return 1
+    if config.VECTOR_BACKEND == "local":
+        logger.warning(
+            f"Local index under {config.LOCAL_INDEX_DIR}: running API workers see files indexed here "
+            "only after the next checkpoint and a restart"
+        )
+
+    watcher = create_watcher(
+        registry.vector_store(),
+        registry.document_loader(),
+        args.directories,
+        state_path=args.state,
+        debounce_seconds=args.debounce,
+        max_delay_seconds=args.max_delay
+    )
+    if not watcher.acquire():
+        logger.error(f"Another watcher is running for {args.state}")
+        return 1
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    logger.info(f"Watcher stopped: {watcher.stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
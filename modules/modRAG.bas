@@ -15,6 +15,7 @@ Public Type RAGResponse
     externalCount As Integer
     errorMessage As String
     responseTime As Double
+    sourceTable As Variant      ' TSV 응답: 2차원 배열 (1행 = 헤더)
 End Type
 
 ' 소스 문서 타입
@@ -82,6 +83,252 @@ ErrorHandler:
     CallRAGAPI = response
 End Function
 
+' =====================================
+' RAG API 호출 - TSV 응답 (대용량 결과용)
+' 한 번의 Split으로 파싱하고, gzip 압축 응답은
+' MSXML2.XMLHTTP(WinInet)가 자동으로 해제
+' (API_TIMEOUT 초과 시 요청을 중단하고 오류 반환)
+' =====================================
+Public Function CallRAGAPICompact(question As String, Optional docType As String = "both") As RAGResponse
+    Dim response As RAGResponse
+    Dim http As Object
+    Dim startTime As Double
+    
+    On Error GoTo ErrorHandler
+    
+    response.success = False
+    startTime = Timer
+    
+    Set http = CreateObject("MSXML2.XMLHTTP.6.0")
+    
+    With http
+        .Open "POST", GetAPIUrl("query") & "?format=tsv", True
+        .setRequestHeader "Content-Type", "application/json; charset=utf-8"
+        .setRequestHeader "Accept", "text/tab-separated-values"
+        SendWithTimeout http, modUTF8.StringToUTF8Bytes(CreateRAGRequest(question, docType))
+        
+        If .Status = 200 Then
+            response = ParseRAGTsv(modUTF8.DecodeUTF8Response(.responseBody))
+            ' ParseRAGTsv는 잘못된/잘린 응답을 errorMessage로만 알림
+            response.success = (Len(response.errorMessage) = 0)
+        Else
+            response.errorMessage = "API Error: " & .Status & " - " & .statusText
+        End If
+    End With
+    
+    response.responseTime = Timer - startTime
+    CallRAGAPICompact = response
+    Exit Function
+    
+ErrorHandler:
+    response.errorMessage = "Error: " & Err.Description
+    response.success = False
+    CallRAGAPICompact = response
+End Function
+
+' =====================================
+' 문서 검색 - TSV 응답을 Range에 바로 쓸 수 있는 배열로 반환
+' (실패 시 Empty)
+' =====================================
+Public Function SearchDocumentsTable(query As String, Optional docType As String = "", _
+                                     Optional limit As Long = 50) As Variant
+    Dim http As Object
+    Dim url As String
+    
+    On Error GoTo ErrorHandler
+    
+    url = GetAPIUrl("documents/search") & "?format=tsv&limit=" & limit & _
+          "&query=" & modUTF8.URLEncode(query)
+    If docType <> "" Then url = url & "&doc_type=" & docType
+    
+    Set http = CreateObject("MSXML2.XMLHTTP.6.0")
+    http.Open "GET", url, True
+    http.setRequestHeader "Accept", "text/tab-separated-values"
+    SendWithTimeout http
+    
+    If http.Status = 200 Then
+        SearchDocumentsTable = TsvToArray(modUTF8.DecodeUTF8Response(http.responseBody))
+    Else
+        SearchDocumentsTable = Empty
+    End If
+    Exit Function
+    
+ErrorHandler:
+    SearchDocumentsTable = Empty
+End Function
+
+' =====================================
+' 검색 결과 전체를 target부터 페이지 단위로 기록
+' (X-Next-Cursor 헤더로 다음 페이지를 요청, 1행 = 헤더)
+' 반환: 기록한 문서 수 (실패 시 -1)
+' =====================================
+Public Function ExportSearchToRange(query As String, target As Range, _
+                                    Optional docType As String = "", _
+                                    Optional pageSize As Long = 1000, _
+                                    Optional maxRows As Long = 100000) As Long
+    Dim http As Object
+    Dim baseUrl As String
+    Dim cursor As String
+    Dim table As Variant
+    Dim written As Long
+    Dim rowCount As Long
+    
+    On Error GoTo ErrorHandler
+    
+    baseUrl = GetAPIUrl("documents/search") & "?format=tsv&limit=" & pageSize & _
+              "&query=" & modUTF8.URLEncode(query)
+    If docType <> "" Then baseUrl = baseUrl & "&doc_type=" & docType
+    Set http = CreateObject("MSXML2.XMLHTTP.6.0")
+    
+    Do
+        If cursor = "" Then
+            http.Open "GET", baseUrl, True
+        Else
+            http.Open "GET", baseUrl & "&cursor=" & cursor, True
+        End If
+        http.setRequestHeader "Accept", "text/tab-separated-values"
+        SendWithTimeout http
+        If http.Status <> 200 Then GoTo ErrorHandler
+        
+        table = TsvToArray(modUTF8.DecodeUTF8Response(http.responseBody))
+        rowCount = UBound(table, 1) - 1
+        If written = 0 Then
+            WriteTableToRange target, table
+        ElseIf rowCount > 0 Then
+            ' 다음 페이지는 헤더 행을 빼고 이어서 기록
+            target.Offset(written + 1, 0).Resize(rowCount, UBound(table, 2)).Value = DropHeaderRow(table)
+        End If
+        written = written + rowCount
+        cursor = http.getResponseHeader("X-Next-Cursor")
+    Loop While cursor <> "" And written < maxRows
+    
+    ExportSearchToRange = written
+    Exit Function
+    
+ErrorHandler:
+    ExportSearchToRange = -1
+End Function
+
+' =====================================
+' 비동기로 연 XMLHTTP 요청을 보내고 API_TIMEOUT까지 대기
+' (MSXML2.XMLHTTP에는 setTimeouts가 없어 서버가 멈추면 Excel도 멈춤)
+' =====================================
+Private Sub SendWithTimeout(http As Object, Optional body As Variant)
+    Dim startTime As Double
+    Dim elapsed As Double
+    
+    startTime = Timer
+    If IsMissing(body) Then
+        http.send
+    Else
+        http.send body
+    End If
+    
+    Do While http.readyState <> 4
+        DoEvents
+        elapsed = Timer - startTime
+        If elapsed < 0 Then elapsed = elapsed + 86400   ' 자정을 넘긴 경우
+        If elapsed * 1000 > API_TIMEOUT Then
+            http.abort
+            Err.Raise vbObjectError + 408, "modRAG", "Request timed out (" & API_TIMEOUT \ 1000 & "s)"
+        End If
+    Loop
+End Sub
+
+Private Function DropHeaderRow(table As Variant) As Variant
+    Dim result() As Variant
+    Dim r As Long
+    Dim c As Long
+    
+    ReDim result(1 To UBound(table, 1) - 1, 1 To UBound(table, 2))
+    For r = 2 To UBound(table, 1)
+        For c = 1 To UBound(table, 2)
+            result(r - 1, c) = table(r, c)
+        Next c
+    Next r
+    DropHeaderRow = result
+End Function
+
+' =====================================
+' 2차원 배열을 target 위치부터 한 번에 기록
+' =====================================
+Public Sub WriteTableToRange(target As Range, table As Variant)
+    If IsEmpty(table) Then Exit Sub
+    target.Resize(UBound(table, 1), UBound(table, 2)).Value = table
+End Sub
+
+' =====================================
+' TSV → 2차원 배열 (1-based, 1행 = 헤더)
+' 셀 안의 \t \n \\ 는 복원하고, forRange이면 "="로
+' 시작하는 값은 수식으로 해석되지 않도록 텍스트 처리
+' =====================================
+Public Function TsvToArray(ByVal tsvText As String, Optional forRange As Boolean = True) As Variant
+    Dim lines() As String
+    Dim fields() As String
+    Dim result() As Variant
+    Dim rowCount As Long
+    Dim colCount As Long
+    Dim r As Long
+    Dim c As Long
+    Dim cell As String
+    
+    If Right(tsvText, 1) = vbLf Then tsvText = Left(tsvText, Len(tsvText) - 1)
+    lines = Split(tsvText, vbLf)
+    rowCount = UBound(lines) + 1
+    colCount = UBound(Split(lines(0), vbTab)) + 1
+    ReDim result(1 To rowCount, 1 To colCount)
+    
+    For r = 0 To rowCount - 1
+        fields = Split(lines(r), vbTab)
+        For c = 0 To UBound(fields)
+            If c >= colCount Then Exit For
+            cell = fields(c)
+            If InStr(cell, "\") > 0 Then cell = UnescapeTsv(cell)
+            If forRange And Left(cell, 1) = "=" Then cell = "'" & cell
+            result(r + 1, c + 1) = cell
+        Next c
+    Next r
+    
+    TsvToArray = result
+End Function
+
+Private Function UnescapeTsv(cell As String) As String
+    Dim value As String
+    value = Replace(cell, "\\", ChrW(1))
+    value = Replace(value, "\t", vbTab)
+    value = Replace(value, "\n", vbLf)
+    UnescapeTsv = Replace(value, ChrW(1), "\")
+End Function
+
+' =====================================
+' RAG TSV 응답 파싱
+' 빈 줄로 구분된 두 표: 답변 1행 + 소스 문서 행들
+' =====================================
+Private Function ParseRAGTsv(tsvText As String) As RAGResponse
+    Dim response As RAGResponse
+    Dim sections() As String
+    Dim meta As Variant
+    
+    On Error GoTo ParseError
+    
+    sections = Split(tsvText, vbLf & vbLf)
+    meta = TsvToArray(sections(0), False)
+    
+    response.answer = meta(2, 1)
+    response.confidence = Val(meta(2, 2))
+    response.internalCount = CInt(Val(meta(2, 3)))
+    response.externalCount = CInt(Val(meta(2, 4)))
+    If UBound(sections) >= 1 Then response.sourceTable = TsvToArray(sections(1))
+    Set response.sources = New Collection
+    
+    ParseRAGTsv = response
+    Exit Function
+    
+ParseError:
+    response.errorMessage = "Parse error: " & Err.Description
+    ParseRAGTsv = response
+End Function
+
 ' =====================================
 ' RAG 요청 JSON 생성
 ' =====================================
@@ -208,8 +455,8 @@ Sub RunRAGSearch()
     ' 상태 표시
     Application.StatusBar = GetLabel("STATUS_PROCESSING") & " RAG API..."
     
-    ' RAG API 호출
-    response = CallRAGAPI(question)
+    ' RAG API 호출 (TSV 응답)
+    response = CallRAGAPICompact(question)
     
     ' 결과 처리
     If response.success Then
@@ -238,6 +485,36 @@ ErrorHandler:
     MsgBox GetLabel("ERR_GENERAL") & ": " & Err.Description, vbCritical
 End Sub
 
+' =====================================
+' 문서 검색 결과를 활성 셀 위치에 표로 기록
+' =====================================
+Sub RunDocumentSearchTable()
+    Dim query As String
+    Dim table As Variant
+    
+    On Error GoTo ErrorHandler
+    
+    query = InputBox("검색어를 입력하세요:", "STRIX Document Search")
+    If query = "" Then Exit Sub
+    
+    Application.StatusBar = GetLabel("STATUS_PROCESSING") & " Search API..."
+    table = SearchDocumentsTable(query, "", 100)
+    
+    If IsEmpty(table) Then
+        MsgBox "API 서버 연결 실패", vbExclamation
+    Else
+        Call WriteTableToRange(ActiveCell, table)
+        ActiveCell.Resize(1, UBound(table, 2)).Font.Bold = True
+    End If
+    
+    Application.StatusBar = GetLabel("STATUS_READY")
+    Exit Sub
+    
+ErrorHandler:
+    Application.StatusBar = GetLabel("STATUS_READY")
+    MsgBox GetLabel("ERR_GENERAL") & ": " & Err.Description, vbCritical
+End Sub
+
 ' =====================================
 ' Mock RAG 검색 (오프라인 모드)
 ' =====================================
@@ -285,20 +562,36 @@ Private Sub DisplayRAGResults(ws As Worksheet, response As RAGResponse)
         .Borders.LineStyle = xlContinuous
     End With
     
-    ' 소스 문서 표시
+    ' 소스 문서 표시 (TSV 응답은 sourceTable, JSON 응답은 sources)
+    Dim sourceCount As Long
+    If IsEmpty(response.sourceTable) Then
+        sourceCount = response.sources.Count
+    Else
+        sourceCount = UBound(response.sourceTable, 1) - 1
+    End If
+    
     startRow = startRow + 7
     With ws.Range("B" & startRow & ":M" & startRow)
         .Merge
-        .Value = "📚 참조 문서 (" & response.sources.Count & "건)"
+        .Value = "📚 참조 문서 (" & sourceCount & "건)"
         .Font.Bold = True
         .Interior.Color = RGB(230, 230, 230)
     End With
     
     Dim i As Integer
     Dim source As SourceDoc
-    For i = 1 To response.sources.Count
+    For i = 1 To sourceCount
         If i > 5 Then Exit For
-        source = response.sources(i)
+        If IsEmpty(response.sourceTable) Then
+            source = response.sources(i)
+        Else
+            ' 열: rank, title, organization, date, type, relevance
+            source.title = response.sourceTable(i + 1, 2)
+            source.organization = response.sourceTable(i + 1, 3)
+            source.docDate = response.sourceTable(i + 1, 4)
+            source.docType = response.sourceTable(i + 1, 5)
+            source.relevance = Val(response.sourceTable(i + 1, 6))
+        End If
         
         ws.Cells(startRow + i, 2).Value = i
         ws.Cells(startRow + i, 3).Value = source.title